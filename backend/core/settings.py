@@ -1,6 +1,8 @@
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +53,8 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    # Primeiro: o tempo total medido inclui os demais (Server-Timing e /api/metrics/)
+    'custos.metricas.MetricasMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -91,6 +95,82 @@ DATABASES = {
     )
 }
 
+# Segunda conexão com o mesmo banco, usada só para gravar o progresso dos jobs
+# de importação fora da transação da importação (ver custos/jobs.py).
+# No SQLite (um escritor por vez) não adianta: lá o progresso só aparece no final.
+if 'sqlite' not in DATABASES['default'].get('ENGINE', ''):
+    DATABASES['progresso'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+
+# Cache
+# O 'default' fica em memória. O alias 'resumos' é opcional e compartilhado
+# entre os workers do gunicorn (ver custos/cache.py):
+#   CACHE_RESUMOS_COMPARTILHADO=arquivo -> FileBasedCache em CACHE_RESUMOS_DIR
+#   CACHE_RESUMOS_COMPARTILHADO=banco   -> DatabaseCache (rodar "python manage.py createcachetable")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+CACHE_RESUMOS_COMPARTILHADO = config('CACHE_RESUMOS_COMPARTILHADO', default='')
+CACHE_RESUMOS_MAX_ITENS = config('CACHE_RESUMOS_MAX_ITENS', default=256, cast=int)
+
+if CACHE_RESUMOS_COMPARTILHADO == 'arquivo':
+    CACHES['resumos'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_RESUMOS_DIR', default=str(BASE_DIR / 'cache_resumos')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
+elif CACHE_RESUMOS_COMPARTILHADO == 'banco':
+    CACHES['resumos'] = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'custos_cache_resumos',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
+
+# Mapas de exibição em memória (custos/mapas.py): segundos sem reconferir o
+# contador no banco. 0 = confere a cada acesso (uma query simples)
+MAPAS_EXIBICAO_TTL = config('MAPAS_EXIBICAO_TTL', default=30, cast=float)
+
+# Métricas por endpoint (custos/metricas.py): requisições guardadas por janela móvel
+METRICAS_JANELA = config('METRICAS_JANELA', default=1000, cast=int)
+
+# Motor colunar (custos/colunar.py): resumos calculados num snapshot NumPy do
+# rollup, memory-mapped e compartilhado pelos workers. Gerar o primeiro com
+# "python manage.py snapshot_colunar"; depois é atualizado a cada importação.
+MOTOR_COLUNAR = config('MOTOR_COLUNAR', default=False, cast=bool)
+MOTOR_COLUNAR_DIR = config('MOTOR_COLUNAR_DIR', default=str(BASE_DIR / 'media' / 'colunar'))
+
+# Arquivos Parquet das transações por ano (custos/parquet.py, pyarrow no requirements.txt).
+# Gravados por "python manage.py gravar_parquet" e regravados a cada alteração;
+# com RESUMOS_PARQUET=True as views de resumo leem deles os anos que estão em dia.
+RESUMOS_PARQUET = config('RESUMOS_PARQUET', default=False, cast=bool)
+if RESUMOS_PARQUET and find_spec('pyarrow') is None:
+    # Sem pyarrow o leitor cairia no SQL sem avisar
+    raise ImproperlyConfigured('RESUMOS_PARQUET=True exige o pyarrow (pip install -r requirements.txt)')
+PARQUET_DIR = config('PARQUET_DIR', default=str(BASE_DIR / 'media' / 'parquet'))
+
+
+# Importação de planilhas
+# Linhas lidas/inseridas por bloco no upload (limita o pico de memória)
+IMPORTACAO_TAMANHO_BLOCO = config('IMPORTACAO_TAMANHO_BLOCO', default=5000, cast=int)
+# Backend de carga: 'auto' (COPY no PostgreSQL, INSERT em lote nos demais), 'copy' ou 'insert'
+IMPORTACAO_CARREGADOR = config('IMPORTACAO_CARREGADOR', default='auto')
+
+# Importação assíncrona (upload com ?assincrono=1, ver custos/jobs.py)
+# 'thread': roda num pool de threads do próprio processo web
+# 'comando': fica pendente até "python manage.py processar_importacoes" pegar
+IMPORTACAO_EXECUTOR = config('IMPORTACAO_EXECUTOR', default='thread')
+IMPORTACAO_THREADS = config('IMPORTACAO_THREADS', default=1, cast=int)
+IMPORTACAO_DIRETORIO = config('IMPORTACAO_DIRETORIO', default=str(BASE_DIR / 'media' / 'importacoes'))
+# Segundos em 'processando' até processar_importacoes considerar o job abandonado
+# (thread/processo que morreu) e devolvê-lo para a fila
+IMPORTACAO_TIMEOUT_JOB = config('IMPORTACAO_TIMEOUT_JOB', default=3600, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -123,6 +203,12 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Default primary key field type
+# https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
@@ -158,7 +244,11 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "if-none-match",
 ]
+# ETag dos endpoints de resumo (GET condicional, ver custos/cache.py)
+# e tempos por requisição (custos/metricas.py)
+CORS_EXPOSE_HEADERS = ["etag", "server-timing"]
 
 # Fly.io SSL Termination - Confia se o load balancer disser que é HTTPS
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
\ No newline at end of file
@@ -1,13 +1,78 @@
 from django.contrib import admin
-from .models import ResponsavelCusto, Transacao
+from django.db import transaction
+from .models import LoteImportacao, ResponsavelCusto, Transacao
+from .agregados import atualizar_agregados
+from .busca import ErroBusca, busca_indexada, filtrar_busca
+from .cache import incrementar_versao
 
 @admin.register(ResponsavelCusto)
 class ResponsavelAdmin(admin.ModelAdmin):
     list_display = ('nome', 'orcamento_mensal')
     search_fields = ('nome',)
 
+    # Edições pelo admin também invalidam os resumos em cache
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        incrementar_versao()
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        incrementar_versao()
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        incrementar_versao()
+
 @admin.register(Transacao)
 class TransacaoAdmin(admin.ModelAdmin):
-    list_display = ('data', 'responsavel', 'descricao_conta', 'valor', 'arquivo_origem')
-    list_filter = ('responsavel', 'data', 'arquivo_origem')
-    search_fields = ('descricao_conta', 'txt_detalhe')
\ No newline at end of file
+    list_display = ('data', 'responsavel', 'descricao_conta', 'valor', 'lote')
+    list_filter = ('responsavel', 'data', 'lote')
+    list_select_related = ('responsavel', 'lote')
+    search_fields = ('descricao_conta', 'txt_detalhe')
+    readonly_fields = ('lote',)
+
+    # Chaves das dimensões: derivadas dos textos no save() (custos/dimensoes.py)
+    exclude = ('fornecedor_ref', 'conta_ref')
+
+    def get_search_results(self, request, queryset, search_term):
+        # No PostgreSQL, pelo índice GIN da busca textual em vez de ILIKE '%...%' na tabela toda
+        if busca_indexada() and search_term.strip():
+            try:
+                return filtrar_busca(queryset, search_term), False
+            except ErroBusca:
+                pass
+        return super().get_search_results(request, queryset, search_term)
+
+    # Edições pelo admin também atualizam o rollup diário e invalidam o cache
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        datas = {obj.data}
+        if change:
+            datas.update(Transacao.objects.filter(pk=obj.pk).values_list('data', flat=True))
+        super().save_model(request, obj, form, change)
+        atualizar_agregados(datas)
+        incrementar_versao()
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        data = obj.data
+        super().delete_model(request, obj)
+        atualizar_agregados([data])
+        incrementar_versao()
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        datas = set(queryset.values_list('data', flat=True))
+        super().delete_queryset(request, queryset)
+        atualizar_agregados(datas)
+        incrementar_versao()
+
+@admin.register(LoteImportacao)
+class LoteImportacaoAdmin(admin.ModelAdmin):
+    # Histórico só para consulta: desfazer um lote é pela API (ver custos/importacao.py)
+    list_display = ('arquivo_nome', 'linhas', 'inseridas', 'usuario', 'iniciado_em', 'finalizado_em', 'desfeito_em', 'substituido_em')
+    search_fields = ('arquivo_nome', 'checksum')
+    readonly_fields = [campo.name for campo in LoteImportacao._meta.fields]
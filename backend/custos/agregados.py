@@ -0,0 +1,59 @@
+# backend/custos/agregados.py
+"""
+Manutenção da tabela de rollup diário (AgregadoDiario).
+
+Os endpoints de resumo leem do rollup; sempre que transações de uma data
+mudam (upload, importação, edição via API) o rollup dessas datas precisa
+ser recalculado chamando atualizar_agregados(datas).
+"""
+from django.db import connection, transaction
+from django.db.models import Sum, Count
+
+from .dimensoes import completar_referencias
+from .models import Transacao, AgregadoDiario
+from .parquet import registrar_alteracao
+
+
+def atualizar_agregados(datas=None):
+    """
+    Recalcula o rollup das datas informadas (ou da tabela inteira se datas=None).
+
+    Apaga os agregados dessas datas e regrava tudo com um único
+    INSERT ... SELECT ... GROUP BY, sem trazer as linhas para o Python.
+    Retorna a quantidade de linhas de agregado gravadas.
+    """
+    transacoes = Transacao.objects.order_by()
+    agregados = AgregadoDiario.objects.all()
+
+    if datas is not None:
+        datas = sorted(set(datas))
+        if not datas:
+            return 0
+        transacoes = transacoes.filter(data__in=datas)
+        agregados = agregados.filter(data__in=datas)
+        # Arquivos Parquet dos anos dessas datas (reconstrução completa não muda transações)
+        registrar_alteracao(datas)
+
+    # O rollup agrupa pelas chaves inteiras das dimensões
+    completar_referencias(transacoes)
+
+    # A ordem das colunas do SELECT segue values() + annotate()
+    grupos = transacoes.values(
+        'data', 'responsavel_id', 'fornecedor_ref_id', 'conta_ref_id'
+    ).annotate(
+        total=Sum('valor'),
+        quantidade=Count('id')
+    )
+    select_sql, params = grupos.query.sql_with_params()
+
+    colunas = ', '.join(
+        connection.ops.quote_name(AgregadoDiario._meta.get_field(nome).column)
+        for nome in ('data', 'responsavel', 'fornecedor_ref', 'conta_ref', 'valor', 'quantidade')
+    )
+    tabela = connection.ops.quote_name(AgregadoDiario._meta.db_table)
+
+    with transaction.atomic():
+        agregados.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {tabela} ({colunas}) {select_sql}", params)
+            return cursor.rowcount
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CustosConfig(AppConfig):
     name = 'custos'
+
+    def ready(self):
+        # Registra os mapas de exibição em cache e os sinais que os invalidam,
+        # e o motor colunar como ouvinte da versão dos dados
+        from . import colunar, dimensoes, fornecedores, mapas, parquet  # noqa: F401
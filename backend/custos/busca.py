@@ -0,0 +1,102 @@
+# backend/custos/busca.py
+"""
+Busca textual nas transações (descrição da conta, TXT e fornecedor).
+
+No PostgreSQL usa busca full-text: o índice GIN da migração 0018 é sobre a
+mesma expressão de VETOR (to_tsvector('portuguese', conta || txt || fornecedor)),
+então o filtro @@ não varre a tabela. Cada palavra digitada vira um prefixo
+('manut' acha "manutenção"), menos os números, que casam inteiros (NF 123 não
+acha a 1234); todas precisam aparecer. O resultado vem ordenado pela
+relevância (ts_rank) ou pela data.
+
+Nos outros bancos (SQLite, desenvolvimento) cada palavra vira um icontains
+nos três campos, sem índice e sem relevância.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, Q
+
+try:
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+except ImportError:  # psycopg2 ausente: só o caminho sem índice
+    SearchVector = None
+
+CAMPOS = ('descricao_conta', 'txt_detalhe', 'fornecedor')
+CONFIGURACAO = 'portuguese'
+# Palavras consideradas por busca (o resto é ignorado)
+MAXIMO_TERMOS = 10
+ORDENS = ('relevancia', 'data')
+
+VETOR = SearchVector(*CAMPOS, config=CONFIGURACAO) if SearchVector else None
+
+
+class ErroBusca(Exception):
+    """Busca vazia ou ordem desconhecida. Vira HTTP 400."""
+
+
+def busca_indexada():
+    return VETOR is not None and connection.vendor == 'postgresql'
+
+
+def termos(texto):
+    """Palavras da busca (letras e números), sem a sintaxe do to_tsquery."""
+    return re.findall(r'[^\W_]+', texto or '')[:MAXIMO_TERMOS]
+
+
+def filtrar_busca(queryset, texto, indexada=None):
+    """Transações com todas as palavras do texto (sem ordenar)."""
+    palavras = termos(texto)
+    if not palavras:
+        raise ErroBusca("Informe ao menos uma palavra em 'q'")
+
+    if busca_indexada() if indexada is None else indexada:
+        return queryset.annotate(vetor=VETOR).filter(vetor=_consulta(palavras))
+
+    for palavra in palavras:
+        queryset = queryset.filter(
+            Q(descricao_conta__icontains=palavra) | Q(txt_detalhe__icontains=palavra) | Q(fornecedor__icontains=palavra)
+        )
+    return queryset
+
+
+def buscar(queryset, texto, limite=50, ordem='relevancia', indexada=None):
+    """
+    Até `limite` transações do queryset (já filtrado por data/setor) que casam
+    com o texto, como dicts prontos para a resposta. 'relevancia' é None fora
+    do PostgreSQL ou com ordem='data'.
+    """
+    if ordem not in ORDENS:
+        raise ErroBusca(f"Ordem desconhecida: {ordem} (use {' ou '.join(ORDENS)})")
+    indexada = busca_indexada() if indexada is None else indexada
+
+    queryset = filtrar_busca(queryset, texto, indexada)
+    if indexada and ordem == 'relevancia':
+        # O ts_rank recalcula o vetor de cada linha encontrada: filtros de data/setor ajudam
+        queryset = queryset.annotate(relevancia=SearchRank(F('vetor'), _consulta(termos(texto))))
+        queryset = queryset.order_by('-relevancia', '-data', '-id')
+    else:
+        queryset = queryset.order_by('-data', '-id')
+
+    campos = ['id', 'data', 'responsavel__nome', *CAMPOS, 'valor']
+    if indexada and ordem == 'relevancia':
+        campos.append('relevancia')
+    return [
+        {
+            "id": linha['id'],
+            "data": linha['data'],
+            "setor": linha['responsavel__nome'],
+            "descricao_conta": linha['descricao_conta'],
+            "txt_detalhe": linha['txt_detalhe'],
+            "fornecedor": linha['fornecedor'],
+            "valor": float(linha['valor']),
+            "relevancia": round(linha['relevancia'], 4) if 'relevancia' in linha else None,
+        }
+        for linha in queryset.values(*campos)[:limite]
+    ]
+
+
+def _consulta(palavras):
+    # to_tsquery com as palavras como prefixo; termos() já tirou &, |, !, : e aspas
+    consulta = ' & '.join(palavra if palavra.isdigit() else f'{palavra}:*' for palavra in palavras)
+    return SearchQuery(consulta, search_type='raw', config=CONFIGURACAO)
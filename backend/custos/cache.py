@@ -0,0 +1,197 @@
+# backend/custos/cache.py
+"""
+Cache de respostas dos endpoints de resumo.
+
+A chave de cada resposta é (endpoint, query params normalizados, versão dos dados).
+A versão fica no banco (VersaoDados) e é incrementada por uploads e por edições
+de transações/configurações, então nenhum worker serve dado velho: basta a
+versão mudar para todas as chaves antigas deixarem de ser usadas.
+
+Dois níveis:
+    1. LRU em memória do processo (limitado a CACHE_RESUMOS_MAX_ITENS)
+    2. Opcional: cache compartilhado entre os workers do gunicorn
+       (alias 'resumos' em settings.CACHES, em arquivo ou no banco)
+
+A mesma chave vira o ETag da resposta: se o navegador manda If-None-Match
+com ela, a view responde 304 sem rodar nenhuma agregação (só a consulta
+da versão).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import VersaoDados
+
+VERSAO_DADOS = 'dados'
+
+# Funções chamadas com a versão 'dados' lida a cada requisição de resumo
+# (custos/mapas.py usa para revalidar os mapas de exibição quando ela muda)
+ouvintes_versao_dados = []
+
+
+# --- Versão dos dados ---
+def obter_versao(chave=VERSAO_DADOS):
+    """Versão atual dos dados (uma query simples pela chave única)."""
+    return VersaoDados.objects.filter(chave=chave).values_list('versao', flat=True).first() or 0
+
+
+def incrementar_versao(chave=VERSAO_DADOS):
+    """
+    Incrementa a versão dos dados, invalidando os caches de todos os workers.
+    Chamar dentro da mesma transação que altera os dados.
+    """
+    atualizados = VersaoDados.objects.filter(chave=chave).update(versao=F('versao') + 1)
+    if not atualizados:
+        VersaoDados.objects.get_or_create(chave=chave, defaults={'versao': 1})
+
+
+# --- Cache em dois níveis ---
+class CacheResumos:
+    """LRU em memória + cache compartilhado opcional, com contadores de acerto/erro."""
+
+    def __init__(self, max_itens, alias_compartilhado=None):
+        self.max_itens = max_itens
+        self.alias_compartilhado = alias_compartilhado
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_compartilhado = 0
+        self.erros = 0
+
+    @property
+    def compartilhado(self):
+        if self.alias_compartilhado:
+            return caches[self.alias_compartilhado]
+        return None
+
+    def obter(self, chave):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos_memoria += 1
+                return self._itens[chave]
+
+        if self.compartilhado is not None:
+            valor = self.compartilhado.get(chave)
+            if valor is not None:
+                with self._lock:
+                    self.acertos_compartilhado += 1
+                self._guardar_local(chave, valor)
+                return valor
+
+        # Contadores só mudam com o lock (+= não é atômico entre threads)
+        with self._lock:
+            self.erros += 1
+        return None
+
+    def gravar(self, chave, valor):
+        self._guardar_local(chave, valor)
+        if self.compartilhado is not None:
+            self.compartilhado.set(chave, valor)
+
+    def _guardar_local(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self.acertos_memoria = self.acertos_compartilhado = self.erros = 0
+
+    def estatisticas(self):
+        consultas = self.acertos_memoria + self.acertos_compartilhado + self.erros
+        acertos = self.acertos_memoria + self.acertos_compartilhado
+        return {
+            'acertos_memoria': self.acertos_memoria,
+            'acertos_compartilhado': self.acertos_compartilhado,
+            'erros': self.erros,
+            'taxa_acerto': round(acertos / consultas, 4) if consultas else 0.0,
+            'itens_memoria': len(self._itens),
+            'max_itens_memoria': self.max_itens,
+            'compartilhado': self.alias_compartilhado,
+        }
+
+
+cache_resumos = CacheResumos(
+    max_itens=getattr(settings, 'CACHE_RESUMOS_MAX_ITENS', 256),
+    alias_compartilhado='resumos' if 'resumos' in settings.CACHES else None,
+)
+
+
+def chave_cache(request, versao):
+    """
+    Chave = endpoint + query params ordenados + versão dos dados.
+    O dia atual entra na chave porque várias views usam o ano/mês corrente
+    como padrão quando o parâmetro não é enviado.
+    """
+    params = sorted(
+        (nome, tuple(sorted(request.query_params.getlist(nome))))
+        for nome in request.query_params
+    )
+    base = f"{request.path}|{params}|{versao}|{date.today().isoformat()}"
+    return 'resumo:' + hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+def _com_etag(resposta, etag):
+    resposta['ETag'] = etag
+    # Navegador pode guardar, mas sempre revalida (If-None-Match) antes de usar
+    resposta['Cache-Control'] = 'private, no-cache'
+    return resposta
+
+
+def resposta_em_cache(metodo):
+    """
+    Decorator para o get() das APIViews de resumo.
+    Só respostas 200 são guardadas; erros de validação sempre recalculam.
+    Respostas 200 levam ETag; If-None-Match com o ETag atual recebe 304.
+    """
+    @wraps(metodo)
+    def wrapper(self, request, *args, **kwargs):
+        versao = obter_versao()
+        for ouvinte in ouvintes_versao_dados:
+            ouvinte(versao)
+        chave = chave_cache(request, versao)
+        etag = '"' + chave.removeprefix('resumo:') + '"'
+
+        enviados = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in enviados or '*' in enviados:
+            return _com_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        dados = cache_resumos.obter(chave)
+        if dados is not None:
+            return _com_etag(Response(dados), etag)
+
+        resposta = metodo(self, request, *args, **kwargs)
+        if resposta.status_code == 200:
+            cache_resumos.gravar(chave, resposta.data)
+            _com_etag(resposta, etag)
+        return resposta
+    return wrapper
+
+
+class InvalidaCacheMixin:
+    """Para ModelViewSets: qualquer escrita incrementa a versão dos dados."""
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        incrementar_versao()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        incrementar_versao()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        incrementar_versao()
@@ -0,0 +1,137 @@
+# backend/custos/carga.py
+"""
+Backends de carga das transações preparadas pela importação.
+
+Cada carregador recebe linhas já prontas (tuplas na ordem de CAMPOS_CARGA):
+    - CarregadorCopy: COPY FROM STDIN via psycopg2 (PostgreSQL), sem ORM
+    - CarregadorInsert: INSERT de várias linhas por comando (fallback, ex. SQLite)
+
+Nenhum dos dois instancia models: as tuplas vão direto para o banco.
+obter_carregador() escolhe automaticamente pelo banco em uso, ou segue
+settings.IMPORTACAO_CARREGADOR ('auto', 'copy' ou 'insert').
+"""
+import io
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import Transacao
+
+CAMPOS_CARGA = (
+    'responsavel_id', 'data', 'descricao_conta', 'txt_detalhe',
+    'valor', 'fornecedor', 'fornecedor_ref_id', 'conta_ref_id',
+    'lote_id', 'hash_conteudo',
+)
+
+
+class CarregadorInsert:
+    """
+    Fallback portável (ex. SQLite): INSERT de várias linhas por comando,
+    com as tuplas passadas direto como parâmetros, sem instanciar models.
+    """
+    nome = 'insert'
+
+    def __init__(self, batch_size=2000):
+        self.batch_size = batch_size
+
+    def carregar(self, linhas):
+        linhas = list(linhas)
+        if not linhas:
+            return 0
+
+        agora = connection.ops.adapt_datetimefield_value(timezone.now())
+        colunas = _colunas_carga()
+        por_comando = max(1, min(self.batch_size, connection.ops.bulk_batch_size(colunas, linhas)))
+        placeholder = '(' + ', '.join(['%s'] * len(colunas)) + ')'
+        sql_base = 'INSERT INTO {} ({}) VALUES '.format(
+            connection.ops.quote_name(Transacao._meta.db_table),
+            ', '.join(connection.ops.quote_name(c) for c in colunas),
+        )
+
+        with connection.cursor() as cursor:
+            for inicio in range(0, len(linhas), por_comando):
+                lote = linhas[inicio:inicio + por_comando]
+                params = [valor for linha in lote for valor in (*linha, agora)]
+                cursor.execute(sql_base + ', '.join([placeholder] * len(lote)), params)
+        return len(linhas)
+
+
+class CarregadorCopy:
+    """
+    Caminho rápido do PostgreSQL: escreve as linhas no formato texto do COPY
+    num buffer e envia tudo com um único COPY ... FROM STDIN.
+    """
+    nome = 'copy'
+
+    def carregar(self, linhas):
+        agora = timezone.now().isoformat()
+        buffer = io.StringIO()
+        total = 0
+        for linha in linhas:
+            buffer.write('\t'.join(_valor_copy(v) for v in linha))
+            buffer.write('\t')
+            buffer.write(agora)
+            buffer.write('\n')
+            total += 1
+
+        if not total:
+            return 0
+
+        sql = 'COPY {} ({}) FROM STDIN'.format(
+            connection.ops.quote_name(Transacao._meta.db_table),
+            ', '.join(connection.ops.quote_name(c) for c in _colunas_carga()),
+        )
+
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(sql, buffer)
+        return total
+
+
+def _colunas_carga():
+    """Colunas do banco na ordem de CAMPOS_CARGA, mais data_importacao no fim."""
+    meta = Transacao._meta
+    colunas = [meta.get_field(campo.removesuffix('_id')).column for campo in CAMPOS_CARGA]
+    colunas.append(meta.get_field('data_importacao').column)
+    return colunas
+
+
+def _valor_copy(valor):
+    """Formata um valor para o formato texto do COPY (NULL = \\N, com escapes)."""
+    if valor is None:
+        return '\\N'
+    return (
+        str(valor)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+CARREGADORES = {
+    CarregadorCopy.nome: CarregadorCopy,
+    CarregadorInsert.nome: CarregadorInsert,
+}
+
+
+def copy_disponivel():
+    """COPY só funciona no PostgreSQL com psycopg2 (cursor.copy_expert)."""
+    if connection.vendor != 'postgresql':
+        return False
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def obter_carregador(nome=None):
+    """Retorna o carregador pedido, ou escolhe automaticamente pelo banco."""
+    nome = nome or getattr(settings, 'IMPORTACAO_CARREGADOR', 'auto')
+    if nome == 'auto':
+        nome = CarregadorCopy.nome if copy_disponivel() else CarregadorInsert.nome
+    if nome not in CARREGADORES:
+        raise ValueError(f"Carregador desconhecido: {nome}")
+    return CARREGADORES[nome]()
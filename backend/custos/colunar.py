@@ -0,0 +1,361 @@
+# backend/custos/colunar.py
+"""
+Motor analítico colunar (opcional, settings.MOTOR_COLUNAR=True).
+
+Um snapshot do rollup diário (AgregadoDiario) em arrays NumPy, um por coluna:
+    data (dias desde 1970-01-01), mes, dia,
+    responsavel / fornecedor / conta (códigos de dicionário),
+    centavos (valor em centavos inteiros), quantidade
+ordenados por data. Cada geração fica em MOTOR_COLUNAR_DIR/<geração>/*.npy e é
+aberta com np.load(mmap_mode='r'): os workers do gunicorn compartilham as mesmas
+páginas pelo cache do sistema operacional, sem uma cópia por processo.
+
+Os resumos (mensal, diário, detalhes do setor e resumo geral) viram
+searchsorted no período + np.bincount nos códigos, com as somas em centavos.
+O snapshot parte do rollup e não das transações: tem as mesmas somas e contagens
+que as views já usam, com muito menos linhas.
+
+O snapshot guarda a versão 'dados' em que foi gerado. Se a versão atual for outra
+(edição via API, admin...), as views voltam para o SQL até o próximo snapshot.
+Depois de cada importação ele é refeito incrementalmente: mantém as linhas das
+datas que não mudaram e relê do banco só as datas alteradas.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .cache import obter_versao, ouvintes_versao_dados
+from .models import AgregadoDiario
+from .periodos import intervalo_periodo
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+EPOCA = date(1970, 1, 1)
+COLUNAS = ('data', 'mes', 'dia', 'responsavel', 'fornecedor', 'conta', 'centavos', 'quantidade')
+DICIONARIOS = ('responsavel', 'fornecedor', 'conta')
+ARQUIVO_ATUAL = 'ATUAL'
+
+_local = threading.local()
+_lock = threading.Lock()
+_aberto = None
+
+
+def ativo():
+    return getattr(settings, 'MOTOR_COLUNAR', False)
+
+
+def _raiz():
+    return Path(settings.MOTOR_COLUNAR_DIR)
+
+
+def _dias(valor):
+    return (valor - EPOCA).days
+
+
+def _reais(centavos):
+    return int(centavos) / 100
+
+
+class Colunas:
+    """
+    Colunas codificadas (arrays em COLUNAS, ordenados por data) e seus dicionários,
+    com as consultas dos resumos. Base do Snapshot e dos arquivos Parquet (parquet.py).
+    """
+
+    def __init__(self, colunas, dicionarios):
+        self.colunas = colunas
+        self.dicionarios = dicionarios
+        self.codigos_responsavel = {nome: i for i, nome in enumerate(dicionarios['responsavel'])}
+
+    # --- Primitivas ---
+    def _fatia(self, inicio=None, fim=None):
+        """Linhas com inicio <= data < fim (None = sem limite)."""
+        datas = self.colunas['data']
+        a = np.searchsorted(datas, _dias(inicio)) if inicio else 0
+        b = np.searchsorted(datas, _dias(fim)) if fim else len(datas)
+        return slice(a, b)
+
+    def _somar(self, codigos, fatia, tamanho, mascara=None):
+        """
+        Soma por código: (códigos presentes, centavos, quantidade).
+        Um grupo existe se tem ao menos uma linha, como no GROUP BY.
+        """
+        centavos = self.colunas['centavos'][fatia]
+        quantidade = self.colunas['quantidade'][fatia]
+        if mascara is not None:
+            codigos, centavos, quantidade = codigos[mascara], centavos[mascara], quantidade[mascara]
+        presentes = np.flatnonzero(np.bincount(codigos, minlength=tamanho))
+        # float64 soma inteiros exatamente até 2**53 centavos
+        totais = np.bincount(codigos, weights=centavos, minlength=tamanho).round().astype(np.int64)
+        contagens = np.bincount(codigos, weights=quantidade, minlength=tamanho).round().astype(np.int64)
+        return presentes, totais, contagens
+
+    def _total(self, fatia):
+        return _reais(self.colunas['centavos'][fatia].sum())
+
+    # --- Consultas das views (mesmos formatos do caminho SQL) ---
+    def resumo_mensal(self, ano):
+        """(por_mes, por_setor_mes, total_ano, meses_com_dados) de ResumoMensalView."""
+        fatia = self._fatia(*intervalo_periodo(ano))
+        mes = self.colunas['mes'][fatia].astype(np.int64)
+        n_resp = len(self.dicionarios['responsavel'])
+
+        meses, totais, _ = self._somar(mes, fatia, 13)
+        por_mes = [{'mes': int(m), 'total': _reais(totais[m])} for m in meses]
+
+        chave = mes * n_resp + self.colunas['responsavel'][fatia]
+        grupos, totais, _ = self._somar(chave, fatia, 13 * n_resp)
+        por_setor_mes = sorted(
+            ({'mes': int(g // n_resp), 'responsavel__nome': self.dicionarios['responsavel'][g % n_resp],
+              'total': _reais(totais[g])} for g in grupos),
+            key=lambda item: (item['mes'], -item['total'])
+        )
+        return por_mes, por_setor_mes, self._total(fatia), [int(m) for m in meses]
+
+    def resumo_diario(self, ano, mes):
+        """(por_dia, por_setor top 10, total_mes, dias_com_dados) de ResumoDiarioView."""
+        fatia = self._fatia(*intervalo_periodo(ano, mes))
+
+        dias, totais, _ = self._somar(self.colunas['dia'][fatia].astype(np.int64), fatia, 32)
+        por_dia = [{'dia': int(d), 'total': _reais(totais[d])} for d in dias]
+
+        por_setor = self._ranking(self.colunas['responsavel'][fatia], fatia, 'responsavel')[:10]
+        return por_dia, por_setor, self._total(fatia), [int(d) for d in dias]
+
+    def detalhes_setor(self, ano, setor, mes=None):
+        """Linhas {descricao_conta, total, count} de DetalhesSetorView."""
+        codigo = self.codigos_responsavel.get(setor)
+        if codigo is None:
+            return []
+        fatia = self._fatia(*intervalo_periodo(ano, mes))
+        mascara = self.colunas['responsavel'][fatia] == codigo
+        contas, totais, contagens = self._somar(
+            self.colunas['conta'][fatia], fatia, len(self.dicionarios['conta']), mascara
+        )
+        linhas = [
+            {'descricao_conta': self.dicionarios['conta'][c], 'total': _reais(totais[c]), 'count': int(contagens[c])}
+            for c in contas
+        ]
+        return sorted(linhas, key=lambda item: -item['total'])
+
+    def resumo_geral(self, inicio=None, fim=None):
+        """
+        (top_setores top 15, fornecedores ordenados, total_geral) de ResumoGeralView.
+        fim é exclusivo. Os fornecedores vêm todos: as configurações de exibição
+        são aplicadas na view, que corta nos 15 primeiros visíveis.
+        """
+        fatia = self._fatia(inicio, fim)
+        top_setores = self._ranking(self.colunas['responsavel'][fatia], fatia, 'responsavel')[:15]
+
+        fornecedores = [
+            item for item in self._ranking(self.colunas['fornecedor'][fatia], fatia, 'fornecedor')
+            if item['fornecedor']
+        ]
+        return top_setores, fornecedores, self._total(fatia)
+
+    def _ranking(self, codigos, fatia, dicionario):
+        campo = 'responsavel__nome' if dicionario == 'responsavel' else dicionario
+        valores = self.dicionarios[dicionario]
+        presentes, totais, _ = self._somar(codigos, fatia, len(valores))
+        return sorted(
+            ({campo: valores[c], 'total': _reais(totais[c])} for c in presentes),
+            key=lambda item: -item['total']
+        )
+
+
+class Snapshot(Colunas):
+    """Uma geração do snapshot, aberta em modo somente leitura (memory-mapped)."""
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+        self.geracao = self.diretorio.name
+        meta = json.loads((self.diretorio / 'meta.json').read_text(encoding='utf-8'))
+        self.versao = meta['versao']
+        self.linhas = meta['linhas']
+        # mmap de arquivo vazio não é suportado; sem linhas, carrega normalmente
+        modo = 'r' if self.linhas else None
+        super().__init__(
+            {nome: np.load(self.diretorio / f'{nome}.npy', mmap_mode=modo) for nome in COLUNAS},
+            meta['dicionarios']
+        )
+
+
+# --- Leitura (por processo) ---
+def _observar_versao(versao):
+    # Chamado pelo resposta_em_cache com a versão já lida na requisição
+    _local.versao = versao
+
+
+ouvintes_versao_dados.append(_observar_versao)
+
+
+def snapshot_atual():
+    """Abre a geração apontada pelo arquivo ATUAL (reaproveita a já aberta)."""
+    global _aberto
+    try:
+        geracao = (_raiz() / ARQUIVO_ATUAL).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    with _lock:
+        if _aberto is None or _aberto.geracao != geracao or _aberto.diretorio.parent != _raiz():
+            _aberto = Snapshot(_raiz() / geracao)
+        return _aberto
+
+
+def obter_snapshot():
+    """Snapshot da versão atual dos dados, ou None (desligado, inexistente ou desatualizado)."""
+    if not ativo():
+        return None
+    versao = getattr(_local, 'versao', None)
+    if versao is None:
+        versao = obter_versao()
+    snapshot = snapshot_atual()
+    if snapshot is None or snapshot.versao != versao:
+        return None
+    return snapshot
+
+
+def obter_motor(inicio=None, fim=None):
+    """
+    De onde as views de resumo calculam o período [inicio, fim):
+    o snapshot NumPy, os arquivos Parquet por ano (RESUMOS_PARQUET) ou,
+    com None, o SQL de sempre.
+    """
+    from .parquet import obter_colunas
+
+    return obter_snapshot() or obter_colunas(inicio, fim)
+
+
+# --- Construção ---
+@contextmanager
+def _trava():
+    """Uma reconstrução por vez, entre threads e (no Unix) entre processos."""
+    raiz = _raiz()
+    raiz.mkdir(parents=True, exist_ok=True)
+    with open(raiz / '.trava', 'w') as arquivo:
+        if fcntl:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _ler_agregados(queryset, dicionarios):
+    """Colunas codificadas das linhas do rollup; estende os dicionários (listas) recebidos."""
+    indices = {nome: {valor: i for i, valor in enumerate(valores)} for nome, valores in dicionarios.items()}
+
+    def codigo(nome, valor):
+        indice = indices[nome]
+        if valor not in indice:
+            indice[valor] = len(dicionarios[nome])
+            dicionarios[nome].append(valor)
+        return indice[valor]
+
+    colunas = {nome: [] for nome in COLUNAS}
+    for data, responsavel, fornecedor, conta, valor, quantidade in queryset.order_by('data').values_list(
+        'data', 'responsavel__nome', 'fornecedor_ref__nome', 'conta_ref__nome', 'valor', 'quantidade'
+    ).iterator(chunk_size=5000):
+        colunas['data'].append(_dias(data))
+        colunas['mes'].append(data.month)
+        colunas['dia'].append(data.day)
+        colunas['responsavel'].append(codigo('responsavel', responsavel))
+        colunas['fornecedor'].append(codigo('fornecedor', fornecedor))
+        colunas['conta'].append(codigo('conta', conta))
+        colunas['centavos'].append(int(valor * 100))
+        colunas['quantidade'].append(quantidade)
+
+    tipos = {'data': np.int32, 'mes': np.int8, 'dia': np.int8, 'centavos': np.int64, 'quantidade': np.int64}
+    return {nome: np.array(valores, dtype=tipos.get(nome, np.int32)) for nome, valores in colunas.items()}
+
+
+def _gravar(colunas, dicionarios, versao):
+    """Grava uma nova geração e troca o ATUAL de forma atômica. Apaga as antigas."""
+    raiz = _raiz()
+    geracao = f'{versao:010d}-{uuid.uuid4().hex[:8]}'
+    destino = raiz / geracao
+    destino.mkdir(parents=True)
+
+    for nome in COLUNAS:
+        np.save(destino / f'{nome}.npy', np.ascontiguousarray(colunas[nome]))
+    (destino / 'meta.json').write_text(json.dumps({
+        'versao': versao,
+        'linhas': int(len(colunas['data'])),
+        'dicionarios': dicionarios,
+    }), encoding='utf-8')
+
+    atual = raiz / ARQUIVO_ATUAL
+    anterior = atual.read_text(encoding='utf-8').strip() if atual.exists() else None
+    temporario = raiz / f'{ARQUIVO_ATUAL}.{uuid.uuid4().hex[:8]}'
+    temporario.write_text(geracao, encoding='utf-8')
+    os.replace(temporario, atual)
+
+    # Mantém a anterior: algum worker pode estar no meio de uma leitura dela
+    # (no Linux, arquivos já mapeados continuam válidos mesmo apagados)
+    for pasta in raiz.iterdir():
+        if pasta.is_dir() and pasta.name not in (geracao, anterior):
+            shutil.rmtree(pasta, ignore_errors=True)
+    return Snapshot(destino)
+
+
+def _reconstruir():
+    # A versão é lida ANTES das linhas: no pior caso o snapshot tem dados mais
+    # novos que a versão, e só é usado depois que o próximo snapshot o corrigir.
+    versao = obter_versao()
+    dicionarios = {nome: [] for nome in DICIONARIOS}
+    colunas = _ler_agregados(AgregadoDiario.objects.all(), dicionarios)
+    return _gravar(colunas, dicionarios, versao)
+
+
+def reconstruir_snapshot():
+    """Snapshot completo a partir do rollup inteiro. Retorna o Snapshot gravado."""
+    with _trava():
+        return _reconstruir()
+
+
+def atualizar_snapshot(datas, versao):
+    """
+    Atualiza o snapshot depois de uma alteração que gerou a versão `versao`
+    e mexeu só nas `datas`. Incremental quando o snapshot atual é o da versão
+    imediatamente anterior; caso contrário (outras escritas no meio), completo.
+    """
+    with _trava():
+        atual = snapshot_atual()
+        if atual is not None and atual.versao == versao:
+            return atual
+        if atual is None or atual.versao != versao - 1:
+            return _reconstruir()
+
+        dicionarios = {nome: list(atual.dicionarios[nome]) for nome in DICIONARIOS}
+        novas = _ler_agregados(AgregadoDiario.objects.filter(data__in=datas), dicionarios)
+        manter = ~np.isin(atual.colunas['data'], [_dias(d) for d in datas])
+        colunas = {nome: np.concatenate([atual.colunas[nome][manter], novas[nome]]) for nome in COLUNAS}
+
+        ordem = np.argsort(colunas['data'], kind='stable')
+        return _gravar({nome: coluna[ordem] for nome, coluna in colunas.items()}, dicionarios, versao)
+
+
+def agendar_atualizacao(datas):
+    """
+    Chamar dentro da transação que alterou as datas, DEPOIS do incrementar_versao().
+    O snapshot é atualizado após o commit; uma falha nele não desfaz a importação.
+    """
+    if not ativo():
+        return
+    versao = obter_versao()
+    datas = set(datas)
+    transaction.on_commit(lambda: atualizar_snapshot(datas, versao), robust=True)
+
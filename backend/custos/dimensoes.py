@@ -0,0 +1,122 @@
+# backend/custos/dimensoes.py
+"""
+Dimensões Fornecedor e ContaContabil: os textos repetidos das transações
+viram tabelas pequenas (id, nome) e o rollup e os filtros trabalham com o id.
+
+    - ingestão: resolver_nomes() resolve os nomes de um bloco inteiro de uma
+      vez (uma consulta e, se preciso, um INSERT em lote);
+    - rollup: AgregadoDiario agrupa por (fornecedor_ref, conta_ref), inteiros;
+    - views: filtram e agrupam pelos ids e só no fim trocam id -> nome pelos
+      mapas em memória (obter_dimensao), no registro de custos/mapas.py.
+
+Transacao guarda a chave ao lado do texto, não no lugar dele: o texto ainda é
+usado pela API de edição, pela exportação, pela busca textual (índice GIN) e
+pelo hash de conteúdo. Só AgregadoDiario é codificado só por ids.
+
+Texto vazio ou nulo não tem linha na dimensão: a chave fica nula.
+"""
+from django.db.models import OuterRef, Subquery
+
+from .cache import incrementar_versao
+from .mapas import limpar_mapa, obter_mapa, registrar_mapa
+from .models import ContaContabil, Fornecedor
+
+# Modelo -> nome do mapa (e chave de versão) {id: nome}
+MAPAS = {
+    Fornecedor: 'dimensao_fornecedores',
+    ContaContabil: 'dimensao_contas',
+}
+
+# (dimensão, chave em Transacao, texto de origem em Transacao)
+REFERENCIAS = (
+    (Fornecedor, 'fornecedor_ref', 'fornecedor'),
+    (ContaContabil, 'conta_ref', 'descricao_conta'),
+)
+
+
+class Dimensao:
+    """Nomes de uma dimensão nos dois sentidos."""
+
+    def __init__(self, pares):
+        """pares: iterável de (id, nome)."""
+        self.nomes = dict(pares)
+        self.ids = {nome: id_ for id_, nome in self.nomes.items()}
+
+    def nome(self, id_):
+        return self.nomes.get(id_)
+
+    def ids_de(self, nomes):
+        """Ids dos nomes que existem na dimensão (os outros não têm linha nenhuma)."""
+        return [self.ids[nome] for nome in nomes if nome in self.ids]
+
+
+for _modelo, _mapa in MAPAS.items():
+    registrar_mapa(
+        _mapa, lambda modelo=_modelo: Dimensao(modelo.objects.values_list('id', 'nome')), [_modelo]
+    )
+
+
+def obter_dimensao(modelo, ids=()):
+    """
+    Dimensão em memória. Se algum dos ids pedidos ainda não estiver nela
+    (criado por outro worker dentro do TTL dos mapas), recarrega uma vez.
+    """
+    dimensao = obter_mapa(MAPAS[modelo])
+    if any(id_ is not None and id_ not in dimensao.nomes for id_ in ids):
+        limpar_mapa(MAPAS[modelo])
+        dimensao = obter_mapa(MAPAS[modelo])
+    return dimensao
+
+
+def com_nomes(linhas, modelo, chave, campo):
+    """
+    Linhas já agrupadas pelo id da dimensão (linha[chave]) com o nome em linha[campo].
+    Chamar depois do ORDER BY/LIMIT: só as linhas que vão para a resposta têm nome.
+    """
+    linhas = list(linhas)
+    dimensao = obter_dimensao(modelo, [linha[chave] for linha in linhas])
+    for linha in linhas:
+        linha[campo] = dimensao.nome(linha[chave])
+    return linhas
+
+
+def resolver_nomes(modelo, nomes, mapa):
+    """
+    Completa o mapa {nome: id} com os nomes informados,
+    criando em lote os que ainda não existem na dimensão.
+    """
+    faltando = [nome for nome in nomes if nome and nome not in mapa]
+    if not faltando:
+        return
+
+    mapa.update(modelo.objects.filter(nome__in=faltando).values_list('nome', 'id'))
+    novos = [modelo(nome=nome) for nome in faltando if nome not in mapa]
+    if novos:
+        # ignore_conflicts: outra importação pode ter criado o mesmo nome agora
+        modelo.objects.bulk_create(novos, ignore_conflicts=True)
+        mapa.update(modelo.objects.filter(nome__in=[n.nome for n in novos]).values_list('nome', 'id'))
+        # bulk_create não dispara sinais: invalida o mapa {id: nome} aqui
+        incrementar_versao(MAPAS[modelo])
+
+
+def resolver_nome(modelo, nome):
+    """Id de um nome só (edições pelo admin/API); None para texto vazio."""
+    mapa = {}
+    resolver_nomes(modelo, [nome], mapa)
+    return mapa.get(nome)
+
+
+def completar_referencias(transacoes):
+    """
+    Preenche fornecedor_ref/conta_ref das transações do queryset que ainda
+    estão sem (criadas por bulk_create ou antes das dimensões existirem).
+    Chamado por atualizar_agregados() antes de agrupar pelas chaves.
+    """
+    for modelo, chave, campo in REFERENCIAS:
+        pendentes = transacoes.filter(**{f'{chave}__isnull': True}).exclude(
+            **{f'{campo}__isnull': True}
+        ).exclude(**{campo: ''})
+        nomes = list(pendentes.order_by().values_list(campo, flat=True).distinct())
+        if nomes:
+            resolver_nomes(modelo, nomes, {})
+            pendentes.update(**{chave: Subquery(modelo.objects.filter(nome=OuterRef(campo)).values('id')[:1])})
@@ -0,0 +1,74 @@
+# backend/custos/exportacao.py
+"""
+Exportação das transações filtradas em CSV ou NDJSON, em streaming.
+
+As linhas vêm de values_list().iterator(chunk_size=...) (cursor no servidor
+no PostgreSQL) e são escritas em pedaços, então a memória do servidor não
+depende de quantas linhas são exportadas.
+"""
+import csv
+import json
+
+TAMANHO_LOTE = 2000
+
+COLUNAS = (
+    ('id', 'id'),
+    ('data', 'data'),
+    ('responsavel', 'responsavel__nome'),
+    ('descricao_conta', 'descricao_conta'),
+    ('txt_detalhe', 'txt_detalhe'),
+    ('valor', 'valor'),
+    ('fornecedor', 'fornecedor'),
+    ('arquivo_origem', 'lote__arquivo_nome'),
+)
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de gravá-la."""
+    def write(self, valor):
+        return valor
+
+
+def _linhas(queryset):
+    campos = [campo for _, campo in COLUNAS]
+    return queryset.values_list(*campos).iterator(chunk_size=TAMANHO_LOTE)
+
+
+def gerar_csv(queryset):
+    # BOM para o Excel reconhecer o UTF-8 (acentos nas contas/fornecedores)
+    yield '﻿'
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow([nome for nome, _ in COLUNAS])
+
+    lote = []
+    for linha in _linhas(queryset):
+        lote.append(escritor.writerow(linha))
+        if len(lote) >= TAMANHO_LOTE:
+            yield ''.join(lote)
+            lote = []
+    if lote:
+        yield ''.join(lote)
+
+
+def gerar_ndjson(queryset):
+    nomes = [nome for nome, _ in COLUNAS]
+    lote = []
+    for linha in _linhas(queryset):
+        # valor como string para não perder os centavos (Decimal)
+        lote.append(json.dumps(dict(zip(nomes, linha)), ensure_ascii=False, default=str))
+        if len(lote) >= TAMANHO_LOTE:
+            yield '\n'.join(lote) + '\n'
+            lote = []
+    if lote:
+        yield '\n'.join(lote) + '\n'
+
+
+GERADORES = {
+    'csv': gerar_csv,
+    'ndjson': gerar_ndjson,
+}
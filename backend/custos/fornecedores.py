@@ -0,0 +1,63 @@
+# backend/custos/fornecedores.py
+"""
+Índice em memória das configurações de exibição dos fornecedores (FornecedorConfig).
+
+Nos dois sentidos:
+    - original -> {'nome_exibicao', 'exibir'}  (config_map, como antes)
+    - exibição -> [originais]  (vários originais podem ser mesclados num nome só)
+
+O índice fica no registro de custos/mapas.py: montado uma vez por processo e
+remontado só quando a versão 'fornecedores' (VersaoDados) muda, o que os
+sinais post_save/post_delete de FornecedorConfig fazem.
+"""
+from .mapas import obter_mapa, registrar_mapa
+from .models import FornecedorConfig
+
+VERSAO_FORNECEDORES = 'fornecedores'
+
+
+class IndiceFornecedores:
+
+    def __init__(self, configs):
+        """configs: iterável de (nome_original, nome_exibicao, exibir)."""
+        self.config_map = {
+            original: {'nome_exibicao': exibicao or original, 'exibir': exibir}
+            for original, exibicao, exibir in configs
+        }
+
+        # Só os visíveis: um original oculto não entra no drill-down do nome mesclado
+        self.originais_por_exibicao = {}
+        for original, config in self.config_map.items():
+            if config['exibir']:
+                self.originais_por_exibicao.setdefault(config['nome_exibicao'], []).append(original)
+
+    def exibicao(self, nome_original):
+        """Nome de exibição do fornecedor, ou None se deve ser oculto."""
+        config = self.config_map.get(nome_original)
+        if config is None:
+            return nome_original  # Sem configuração, usa o original
+        return config['nome_exibicao'] if config['exibir'] else None
+
+    def originais(self, nome_exibicao):
+        """
+        Nomes originais que aparecem na tela como nome_exibicao (para fornecedor__in).
+        Um original sem configuração é exibido com o próprio nome, então também entra.
+        """
+        originais = list(self.originais_por_exibicao.get(nome_exibicao, ()))
+        if nome_exibicao not in self.config_map and nome_exibicao not in originais:
+            originais.append(nome_exibicao)
+        return sorted(originais) or [nome_exibicao]
+
+
+def _construir_indice():
+    return IndiceFornecedores(
+        FornecedorConfig.objects.values_list('nome_original', 'nome_exibicao', 'exibir')
+    )
+
+
+registrar_mapa('fornecedores', _construir_indice, [FornecedorConfig], chave_versao=VERSAO_FORNECEDORES)
+
+
+def obter_indice_fornecedores():
+    """Índice atual (ver custos/mapas.py para a validade do cache)."""
+    return obter_mapa('fornecedores')
@@ -0,0 +1,447 @@
+# backend/custos/importacao.py
+"""
+Pipeline de importação da planilha de custos (usado pelo UploadExcelView).
+
+A leitura é feita em blocos para que o pico de memória dependa do tamanho
+do bloco e não do tamanho do arquivo:
+    - CSV: pd.read_csv(chunksize=...)
+    - XLSX: openpyxl em modo read_only, linha a linha
+
+Cada bloco é validado, transformado e inserido dentro da MESMA transação,
+então ou o arquivo entra inteiro ou nada muda.
+
+O reenvio é incremental: cada linha tem um hash de conteúdo
+(Transacao.hash_conteudo) e, nas datas presentes no arquivo, só o que mudou
+é gravado. Linhas iguais às existentes ficam como estão, linhas novas são
+inseridas e as existentes que não aparecem mais no arquivo são apagadas.
+
+Cada arquivo vira um LoteImportacao: as linhas que ele trouxe (inseridas ou
+iguais às que já existiam) passam a apontar para ele, então desfazer_lote
+apaga de uma vez o que o lote deixou vigente; um arquivo idêntico (mesmo SHA-256)
+a um lote ainda vigente é pulado antes de qualquer leitura. Quando um lote
+muda alguma data de um lote anterior, o anterior é marcado como substituído
+e o arquivo dele volta a ser importado se for reenviado.
+"""
+import hashlib
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from .agregados import atualizar_agregados
+from .cache import incrementar_versao
+from .carga import obter_carregador
+from .colunar import agendar_atualizacao
+from .dimensoes import resolver_nomes
+from .models import ContaContabil, Fornecedor, LoteImportacao, ResponsavelCusto, Transacao, hash_conteudo
+from .particoes import garantir_particoes
+
+COLUNAS_OBRIGATORIAS = ['MA', 'AMOUNTMST', 'TRANSDATE', 'Descrição Conta', 'Fornecedor']
+
+TAMANHO_BLOCO = getattr(settings, 'IMPORTACAO_TAMANHO_BLOCO', 5000)
+
+CAMPOS_HASH = ('responsavel_id', 'data', 'descricao_conta', 'txt_detalhe', 'valor', 'fornecedor')
+
+
+class ErroImportacao(Exception):
+    """Problema nos dados da planilha (coluna faltando, data inválida...). Vira HTTP 400."""
+
+
+# --- Reenvio idêntico ---
+def calcular_checksum(arquivo):
+    """SHA-256 do arquivo, lido em pedaços; o arquivo volta para o início."""
+    sha = hashlib.sha256()
+    arquivo.seek(0)
+    for pedaco in iter(lambda: arquivo.read(1 << 20), b''):
+        sha.update(pedaco)
+    arquivo.seek(0)
+    return sha.hexdigest()
+
+
+def lote_identico(checksum):
+    """
+    Lote mais recente de um arquivo com esse checksum que ainda vale (nem
+    desfeito nem substituído por um lote posterior), ou None.
+    """
+    return LoteImportacao.objects.filter(
+        checksum=checksum, desfeito_em__isnull=True, substituido_em__isnull=True
+    ).first()
+
+
+# --- Leitura em blocos ---
+def ler_blocos(arquivo, nome_arquivo, tamanho_bloco=None):
+    """Gera DataFrames de no máximo tamanho_bloco linhas."""
+    tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO
+    if nome_arquivo.lower().endswith('.csv'):
+        # Tudo como texto: sem isso o pandas infere o tipo de cada bloco separadamente
+        # (TXT "789" viraria "789.0" num bloco com vazios) e o hash da linha dependeria
+        # de onde o bloco corta. Só a célula vazia vira NaN ("NA", "null"... ficam texto).
+        yield from pd.read_csv(
+            arquivo, chunksize=tamanho_bloco, dtype=str, keep_default_na=False, na_values=['']
+        )
+    else:
+        yield from _ler_blocos_xlsx(arquivo, tamanho_bloco)
+
+
+def _ler_blocos_xlsx(arquivo, tamanho_bloco):
+    """
+    Lê a primeira aba com o iterador read_only do openpyxl.
+    A primeira linha é o cabeçalho, como no pd.read_excel.
+    """
+    workbook = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = workbook.worksheets[0].iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+
+        colunas = [
+            str(c) if c is not None else f'Unnamed: {i}'
+            for i, c in enumerate(cabecalho)
+        ]
+        n_colunas = len(colunas)
+
+        bloco = []
+        for linha in linhas:
+            # Linhas no modo read_only podem vir mais curtas/longas que o cabeçalho
+            if len(linha) != n_colunas:
+                linha = (tuple(linha) + (None,) * n_colunas)[:n_colunas]
+            bloco.append(linha)
+            if len(bloco) >= tamanho_bloco:
+                yield pd.DataFrame.from_records(bloco, columns=colunas)
+                bloco = []
+
+        if bloco:
+            yield pd.DataFrame.from_records(bloco, columns=colunas)
+    finally:
+        workbook.close()
+
+
+# --- Limpeza de cada bloco ---
+def limpar_bloco(df, colunas_obrigatorias=COLUNAS_OBRIGATORIAS):
+    """Valida as colunas e aplica a limpeza vetorizada. Lança ErroImportacao."""
+    df.columns = df.columns.str.strip()
+
+    for col in colunas_obrigatorias:
+        if col not in df.columns:
+            raise ErroImportacao(f"Coluna obrigatória não encontrada: {col}")
+
+    # Remove linhas onde MA é vazio ou NaN
+    df = df.dropna(subset=['MA'])
+    df = df[df['MA'].astype(str).str.strip() != '']
+
+    # Converter TRANSDATE para datetime para garantir formato correto
+    try:
+        df['TRANSDATE'] = pd.to_datetime(df['TRANSDATE'])
+    except Exception as e:
+        raise ErroImportacao(f"Erro ao processar coluna TRANSDATE: {e}")
+
+    return df
+
+
+def _resolver_responsaveis(nomes, mapa_responsaveis):
+    """
+    Completa o mapa {nome: id} com os nomes do bloco,
+    criando em lote os responsáveis que ainda não existem.
+    """
+    faltando = [nome for nome in nomes if nome not in mapa_responsaveis]
+    if not faltando:
+        return
+
+    existentes = ResponsavelCusto.objects.filter(nome__in=faltando).values_list('nome', 'id')
+    mapa_responsaveis.update(existentes)
+
+    novos_para_criar = [
+        ResponsavelCusto(nome=nome)
+        for nome in faltando
+        if nome not in mapa_responsaveis
+    ]
+    if novos_para_criar:
+        ResponsavelCusto.objects.bulk_create(novos_para_criar)
+        novos = ResponsavelCusto.objects.filter(nome__in=[n.nome for n in novos_para_criar]).values_list('nome', 'id')
+        mapa_responsaveis.update(novos)
+
+
+def _texto(df, coluna):
+    """Coluna como texto; NaN/ausente vira '' (e não 'nan')."""
+    if coluna not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    serie = df[coluna]
+    return serie.astype(str).where(serie.notna(), '')
+
+
+def preparar_bloco(df, nomes_ma, mapa_responsaveis, lote_id, mapa_fornecedores=None, mapa_contas=None):
+    """
+    Transforma o bloco limpo em tuplas na ordem de CAMPOS_CARGA usando só
+    operações colunares (nada de model por linha). O hash de conteúdo é
+    calculado por último, sobre os campos já convertidos.
+    Fornecedores e contas viram ids das dimensões, resolvidos em lote para o
+    bloco inteiro (os mapas {nome: id} passam de um bloco para o outro).
+    """
+    # MA -> responsavel_id via Series.map; nomes sem id (não deveria acontecer) saem
+    responsavel_ids = nomes_ma.map(mapa_responsaveis)
+    validos = responsavel_ids.notna()
+    if not validos.all():
+        df, responsavel_ids = df[validos], responsavel_ids[validos]
+
+    # AMOUNTMST -> centavos inteiros uma única vez, depois Decimal exato
+    try:
+        valores = pd.to_numeric(df['AMOUNTMST']).to_numpy(dtype=float)
+    except (TypeError, ValueError) as e:
+        raise ErroImportacao(f"Erro ao processar coluna AMOUNTMST: {e}")
+    if np.isnan(valores).any():
+        raise ErroImportacao("Coluna AMOUNTMST com valores vazios")
+    centavos = np.rint(valores * 100).astype(np.int64)
+
+    fornecedor = df['Fornecedor'] if 'Fornecedor' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    fornecedor = fornecedor.astype(str).str.strip().where(fornecedor.notna(), None)
+
+    colunas = (
+        responsavel_ids.astype(np.int64).tolist(),
+        df['TRANSDATE'].dt.date.tolist(),
+        _texto(df, 'Descrição Conta').tolist(),
+        _texto(df, 'TXT').tolist(),
+        [Decimal(c).scaleb(-2) for c in centavos.tolist()],
+        fornecedor.tolist(),
+    )
+    descricoes, fornecedores = colunas[2], colunas[5]
+    mapa_fornecedores = {} if mapa_fornecedores is None else mapa_fornecedores
+    mapa_contas = {} if mapa_contas is None else mapa_contas
+    resolver_nomes(Fornecedor, set(fornecedores), mapa_fornecedores)
+    resolver_nomes(ContaContabil, set(descricoes), mapa_contas)
+
+    return [
+        (*linha, mapa_fornecedores.get(linha[5]), mapa_contas.get(linha[2]), lote_id, hash_conteudo(*linha))
+        for linha in zip(*colunas)
+    ]
+
+
+def _carregar_existentes(datas, existentes, lotes_por_data):
+    """
+    Acrescenta em existentes {hash: [(id, data), ...]} as transações já gravadas
+    nas datas informadas e em lotes_por_data {data: {lote_id}} os lotes delas.
+    Linhas sem hash (anteriores ao campo ou criadas via bulk_create) têm o hash
+    calculado e gravado aqui.
+    """
+    sem_hash = []
+    consulta = Transacao.objects.filter(data__in=datas).order_by().values_list('id', 'data', 'lote_id', 'hash_conteudo')
+    for id_, data, lote_id, hash_ in consulta.iterator(chunk_size=TAMANHO_BLOCO):
+        if lote_id is not None:
+            lotes_por_data.setdefault(data, set()).add(lote_id)
+        if hash_ is None:
+            sem_hash.append(id_)
+        else:
+            existentes.setdefault(hash_, []).append((id_, data))
+
+    for inicio in range(0, len(sem_hash), TAMANHO_BLOCO):
+        lote = list(Transacao.objects.filter(id__in=sem_hash[inicio:inicio + TAMANHO_BLOCO]).only('id', *CAMPOS_HASH))
+        for t in lote:
+            t.hash_conteudo = hash_conteudo(*(getattr(t, campo) for campo in CAMPOS_HASH))
+            existentes.setdefault(t.hash_conteudo, []).append((t.id, t.data))
+        Transacao.objects.bulk_update(lote, ['hash_conteudo'])
+
+
+# --- Pipeline completo ---
+class ImportacaoIncremental:
+    """
+    Estado da importação incremental entre blocos (e entre arquivos, no
+    comando importar_custos). Deve ser usada dentro de transaction.atomic():
+
+        importacao = ImportacaoIncremental()
+        lote = importacao.abrir_lote(nome_arquivo, checksum, usuario)
+        for df in blocos_limpos:
+            importacao.processar_bloco(df, lote)
+        resultado = importacao.finalizar()
+
+    Para cada data vista, as transações existentes são comparadas pelo hash
+    de conteúdo (como multiconjunto: linhas repetidas contam uma a uma).
+    Linhas inalteradas passam para o lote atual: cada transação fica no último
+    lote que a trouxe, e desfazer um lote antigo não apaga o que um lote
+    posterior confirmou.
+    """
+
+    def __init__(self):
+        self.datas_vistas = set()
+        self.datas_alteradas = set()
+        self.existentes = {}
+        self.lotes_por_data = {}
+        self.mapa_responsaveis = {}
+        self.mapa_fornecedores = {}
+        self.mapa_contas = {}
+        self.anos_com_particao = set()
+        self.lotes = []
+        self.linhas = self.inseridas = self.inalteradas = self.removidas = 0
+        self.carregador = obter_carregador()
+
+    def abrir_lote(self, arquivo_nome, checksum='', usuario=None):
+        """Cria o LoteImportacao de um arquivo (na mesma transação das linhas dele)."""
+        lote = LoteImportacao.objects.create(arquivo_nome=arquivo_nome, checksum=checksum, usuario=usuario)
+        self.lotes.append(lote)
+        return lote
+
+    def processar_bloco(self, df, lote):
+        """Grava a diferença de um bloco já limpo (limpar_bloco). Retorna as linhas lidas."""
+        if df.empty:
+            return 0
+
+        # --- PASSO 0: TRANSAÇÕES EXISTENTES DAS DATAS DO BLOCO ---
+        # Carregadas uma vez só por data, na primeira vez que ela aparece.
+        datas_novas = set(df['TRANSDATE'].dt.date.unique()) - self.datas_vistas
+        if datas_novas:
+            _carregar_existentes(datas_novas, self.existentes, self.lotes_por_data)
+            self.datas_vistas |= datas_novas
+
+        # --- PASSO 1: RESPONSÁVEIS (FOREIGN KEY) ---
+        nomes_ma = df['MA'].astype(str).str.strip()
+        _resolver_responsaveis(nomes_ma.unique(), self.mapa_responsaveis)
+
+        # --- PASSO 2: PREPARAÇÃO COLUNAR DO BLOCO ---
+        linhas = preparar_bloco(
+            df, nomes_ma, self.mapa_responsaveis, lote.id, self.mapa_fornecedores, self.mapa_contas
+        )
+
+        # --- PASSO 3: DIFERENÇA PELO HASH ---
+        # Cada linha igual a uma existente "consome" essa existente;
+        # as que sobrarem no fim são as removidas.
+        novas, confirmadas = [], []
+        for linha in linhas:
+            iguais = self.existentes.get(linha[-1])
+            if iguais:
+                confirmadas.append(iguais.pop())
+            else:
+                novas.append(linha)
+                self.datas_alteradas.add(linha[1])
+        self.inalteradas += len(confirmadas)
+
+        # As inalteradas passam a ser deste lote (não mudam rollup nem cache)
+        for inicio in range(0, len(confirmadas), TAMANHO_BLOCO):
+            parte = confirmadas[inicio:inicio + TAMANHO_BLOCO]
+            Transacao.objects.filter(
+                data__in={data for _, data in parte}, id__in=[id_ for id_, _ in parte]
+            ).update(lote=lote)
+
+        # --- PASSO 4: CARGA SÓ DAS NOVAS (COPY no Postgres, INSERT em lote nos demais) ---
+        # Partição do ano antes de inserir (Postgres particionado, ver custos/particoes.py)
+        anos = {linha[1].year for linha in novas} - self.anos_com_particao
+        if anos:
+            garantir_particoes(anos)
+            self.anos_com_particao |= anos
+        inseridas = self.carregador.carregar(novas)
+        self.inseridas += inseridas
+        self.linhas += len(linhas)
+        lote.inseridas += inseridas
+        lote.linhas += len(linhas)
+        return len(linhas)
+
+    def finalizar(self):
+        """
+        Remove as existentes que não apareceram, atualiza rollup e cache, marca
+        como substituídos os lotes anteriores com linhas nas datas alteradas e
+        fecha os lotes. Retorna {'linhas', 'inseridas', 'removidas', 'inalteradas', 'datas',
+        'datas_alteradas', 'carregador', 'lotes'}.
+        """
+        # --- PASSO 5: REMOÇÃO DAS QUE NÃO ESTÃO MAIS NO ARQUIVO ---
+        sobras = [item for iguais in self.existentes.values() for item in iguais]
+        for inicio in range(0, len(sobras), TAMANHO_BLOCO):
+            lote = sobras[inicio:inicio + TAMANHO_BLOCO]
+            # Com as datas no filtro o Postgres só toca as partições desses anos
+            self.removidas += Transacao.objects.filter(
+                data__in={data for _, data in lote}, id__in=[id_ for id_, _ in lote]
+            ).delete()[0]
+            self.datas_alteradas.update(data for _, data in lote)
+        self.existentes = {}
+
+        # --- PASSO 6: ROLLUP E CACHE ---
+        # Só as datas que de fato mudaram; sem mudança nenhuma, o cache continua válido
+        if self.datas_alteradas:
+            atualizar_agregados(self.datas_alteradas)
+            incrementar_versao()
+            # Snapshot do motor colunar (se ligado): relê só essas datas após o commit
+            agendar_atualizacao(self.datas_alteradas)
+
+        # --- PASSO 7: LOTES ---
+        # Um lote anterior com linhas numa data que mudou deixa de ser o retrato
+        # atual dessa data: reenviar o arquivo dele não pode ser pulado
+        agora = timezone.now()
+        substituidos = set()
+        for data in self.datas_alteradas:
+            substituidos |= self.lotes_por_data.get(data, set())
+        substituidos -= {lote.id for lote in self.lotes}
+        if substituidos:
+            LoteImportacao.objects.filter(id__in=substituidos, substituido_em__isnull=True).update(substituido_em=agora)
+        self.lotes_por_data = {}
+
+        for lote in self.lotes:
+            lote.finalizado_em = agora
+            lote.save(update_fields=['linhas', 'inseridas', 'finalizado_em'])
+
+        return {
+            'linhas': self.linhas,
+            'inseridas': self.inseridas,
+            'removidas': self.removidas,
+            'inalteradas': self.inalteradas,
+            'datas': len(self.datas_vistas),
+            'datas_alteradas': len(self.datas_alteradas),
+            'carregador': self.carregador.nome,
+            'lotes': [lote.id for lote in self.lotes],
+        }
+
+
+def importar_planilha(arquivo, nome_arquivo, tamanho_bloco=None, ao_progredir=None, usuario=None, forcar=False):
+    """
+    Importa a planilha bloco a bloco numa única transação, gravando só a diferença
+    nas datas presentes no arquivo (ver ImportacaoIncremental).
+    ao_progredir(linhas) é chamado após cada bloco (usado pelos jobs assíncronos).
+
+    Retorna o resultado de finalizar() mais 'lote' e 'duplicado'. Um arquivo
+    idêntico a um lote vigente (lote_identico) não é lido (duplicado=True, 'lote' é o existente),
+    a menos que forcar=True.
+    """
+    checksum = calcular_checksum(arquivo)
+    if not forcar and (existente := lote_identico(checksum)):
+        return {
+            'linhas': 0, 'inseridas': 0, 'removidas': 0, 'inalteradas': 0, 'datas': 0,
+            'datas_alteradas': 0, 'carregador': None, 'lotes': [], 'lote': existente.id, 'duplicado': True,
+        }
+
+    with transaction.atomic():
+        importacao = ImportacaoIncremental()
+        lote = importacao.abrir_lote(nome_arquivo, checksum, usuario)
+        for df in ler_blocos(arquivo, nome_arquivo, tamanho_bloco):
+            importacao.processar_bloco(limpar_bloco(df), lote)
+            if ao_progredir:
+                ao_progredir(importacao.linhas)
+        return {**importacao.finalizar(), 'lote': lote.id, 'duplicado': False}
+
+
+def desfazer_lote(lote_id):
+    """
+    Desfaz uma importação: apaga as transações do lote com um DELETE só, pelo
+    índice de Transacao.lote (sem carregar as linhas), e atualiza rollup e cache
+    das datas delas. Como cada linha fica no último lote que a trouxe, só sai o
+    que este lote deixou vigente: as linhas confirmadas ou trocadas por um lote
+    posterior ficam. Para voltar ao arquivo anterior, reenvie-o (o lote dele foi
+    marcado como substituído e não é pulado).
+    Retorna (lote, linhas apagadas). Lança ErroImportacao se já foi desfeito.
+    """
+    with transaction.atomic():
+        lote = LoteImportacao.objects.select_for_update().get(pk=lote_id)
+        if lote.desfeito_em:
+            raise ErroImportacao(f"O lote {lote.id} já foi desfeito")
+
+        transacoes = Transacao.objects.filter(lote=lote)
+        datas = set(transacoes.order_by().values_list('data', flat=True).distinct())
+        apagadas = transacoes.delete()[0]
+
+        if datas:
+            atualizar_agregados(datas)
+            incrementar_versao()
+            agendar_atualizacao(datas)
+
+        lote.desfeito_em = timezone.now()
+        lote.save(update_fields=['desfeito_em'])
+        return lote, apagadas
@@ -0,0 +1,140 @@
+# backend/custos/jobs.py
+"""
+Importações assíncronas (JobImportacao).
+
+O UploadExcelView salva o arquivo em disco, cria o job e responde 202 na hora.
+O job roda o mesmo pipeline de custos/importacao.py em um destes executores
+(settings.IMPORTACAO_EXECUTOR):
+    - 'thread': pool de threads dentro do próprio processo web (padrão)
+    - 'comando': o job fica pendente até o worker
+                 "python manage.py processar_importacoes" pegá-lo
+
+O progresso é gravado pela conexão 'progresso' (mesmo banco, outra conexão),
+para ficar visível enquanto a transação da importação ainda está aberta.
+
+Um job cujo executor morreu no meio ficaria 'processando' para sempre:
+processar_importacoes devolve para a fila os que passaram de
+IMPORTACAO_TIMEOUT_JOB (reabrir_jobs_travados). Como a importação roda numa
+transação só, nada do job interrompido ficou gravado.
+"""
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .importacao import importar_planilha
+from .models import JobImportacao
+
+ALIAS_PROGRESSO = 'progresso' if 'progresso' in settings.DATABASES else 'default'
+
+_executor = None
+
+
+def _obter_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMPORTACAO_THREADS', 1),
+            thread_name_prefix='importacao',
+        )
+    return _executor
+
+
+def enfileirar_importacao(arquivo, usuario=None):
+    """Salva o arquivo enviado em disco e cria o job pendente."""
+    diretorio = Path(settings.IMPORTACAO_DIRETORIO)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    caminho = diretorio / f"{uuid.uuid4().hex}_{Path(arquivo.name).name}"
+
+    with open(caminho, 'wb') as destino:
+        for pedaco in arquivo.chunks():
+            destino.write(pedaco)
+
+    try:
+        job = JobImportacao.objects.create(
+            arquivo_nome=arquivo.name,
+            caminho=str(caminho),
+            usuario=usuario if usuario and usuario.is_authenticated else None,
+        )
+    except Exception:
+        # Sem job ninguém apagaria a cópia salva
+        os.remove(caminho)
+        raise
+
+    if getattr(settings, 'IMPORTACAO_EXECUTOR', 'thread') == 'thread':
+        # Só dispara depois do commit, para a thread enxergar o job
+        transaction.on_commit(lambda: _obter_executor().submit(executar_job, job.id))
+    return job
+
+
+def executar_job(job_id):
+    """
+    Roda um job pendente. Retorna False se outro executor já o pegou.
+    O "claim" é um UPDATE condicional, então funciona com várias threads/processos.
+    """
+    try:
+        pegou = JobImportacao.objects.filter(pk=job_id, status=JobImportacao.PENDENTE).update(
+            status=JobImportacao.PROCESSANDO,
+            iniciado_em=timezone.now()
+        )
+        if not pegou:
+            return False
+
+        job = JobImportacao.objects.get(pk=job_id)
+        try:
+            with open(job.caminho, 'rb') as arquivo:
+                # O reenvio idêntico já foi verificado no upload (UploadExcelView)
+                resultado = importar_planilha(
+                    arquivo, job.arquivo_nome, usuario=job.usuario, forcar=True,
+                    ao_progredir=lambda linhas: _gravar_progresso(job_id, linhas)
+                )
+        except Exception as e:
+            JobImportacao.objects.filter(pk=job_id).update(
+                status=JobImportacao.ERRO,
+                erro=str(e),
+                finalizado_em=timezone.now()
+            )
+        else:
+            JobImportacao.objects.filter(pk=job_id).update(
+                status=JobImportacao.CONCLUIDO,
+                linhas_processadas=resultado['linhas'],
+                datas_substituidas=resultado['datas_alteradas'],
+                finalizado_em=timezone.now()
+            )
+        finally:
+            if os.path.exists(job.caminho):
+                os.remove(job.caminho)
+        return True
+    finally:
+        # Threads do pool não passam pelo ciclo de request: fecha as conexões aqui
+        if getattr(settings, 'IMPORTACAO_EXECUTOR', 'thread') == 'thread':
+            connections.close_all()
+
+
+def _gravar_progresso(job_id, linhas):
+    # Sem a conexão 'progresso' (SQLite) o UPDATE ficaria preso na transação
+    # da importação e só apareceria no final, então nem tenta.
+    if ALIAS_PROGRESSO == 'default':
+        return
+    JobImportacao.objects.using(ALIAS_PROGRESSO).filter(pk=job_id).update(linhas_processadas=linhas)
+
+
+def reabrir_jobs_travados(segundos=None):
+    """
+    Devolve para PENDENTE os jobs em PROCESSANDO há mais de `segundos`
+    (padrão IMPORTACAO_TIMEOUT_JOB). Retorna quantos foram reabertos.
+    """
+    segundos = segundos if segundos is not None else getattr(settings, 'IMPORTACAO_TIMEOUT_JOB', 3600)
+    limite = timezone.now() - timedelta(seconds=segundos)
+    return JobImportacao.objects.filter(status=JobImportacao.PROCESSANDO, iniciado_em__lt=limite).update(
+        status=JobImportacao.PENDENTE, iniciado_em=None, linhas_processadas=0
+    )
+
+
+def proximo_job_pendente():
+    return JobImportacao.objects.filter(status=JobImportacao.PENDENTE).order_by('criado_em').values_list('id', flat=True).first()
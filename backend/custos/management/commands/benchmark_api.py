@@ -0,0 +1,301 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import quote
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.signals import request_started
+from django.db import connection, connections, reset_queries
+from django.db.models import Count, Max
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from custos.busca import busca_indexada, buscar
+from custos.cache import cache_resumos, incrementar_versao
+from custos.mapas import limpar_mapas
+from custos.models import AgregadoDiario, LoteImportacao, Transacao
+from custos.particoes import PADRAO, TABELA, particoes
+from custos.sinteticos import escrever_planilha, interpretar_escala
+from custos.views import filtrar_transacoes
+
+# Chave no relatório = modelo da URL, para comparar escalas e rodadas entre si
+ENDPOINTS = [
+    '/api/resumo-mensal/?ano={ano}',
+    '/api/resumo-diario/?ano={ano}&mes={mes}',
+    '/api/detalhes-setor/?ano={ano}&setor={setor}',
+    '/api/resumo-fornecedores/?ano={ano}',
+    '/api/resumo-fornecedores-mensal/?ano={ano}&mes={mes}',
+    '/api/detalhes-fornecedor/?ano={ano}&fornecedor={fornecedor}',
+    '/api/transacoes-fornecedor/?ano={ano}&mes={mes}&fornecedor={fornecedor}',
+    '/api/resumo-geral/?periodo=ano&ano={ano}',
+    '/api/resumo-geral/?periodo=tudo',
+    '/api/dashboard-resumo/',
+    '/api/painel/?ano={ano}&widgets=metas,por_mes,por_setor_mes,totais',
+    '/api/orcamento/?ano={ano}',
+    '/api/fornecedores-unicos/',
+    '/api/busca/?q={nf}',
+    '/api/busca/?q={fornecedor}&inicio={inicio}&fim={fim}',
+    '/api/transacoes/?inicio={inicio}&fim={fim}&limite=100',
+    '/api/exportar-transacoes/?formato=csv&inicio={inicio}&fim={fim}',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o upload (UploadExcelView) e todos os endpoints de resumo em cada escala de dados '
+        'sintéticos, num banco de teste descartável, e grava um relatório JSON '
+        '(no PostgreSQL particionado, também as partições lidas por consulta)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', nargs='+', default=['10k', '100k'], help='Linhas por escala (10k, 1M, 10M...)')
+        parser.add_argument('--repeticoes', type=int, default=5, help='Requisições por endpoint (usa a mediana)')
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--saida', type=str, default=None, help='Relatório JSON (padrão: benchmark_<data>.json)')
+
+    def handle(self, *args, **options):
+        escalas = [interpretar_escala(e) for e in options['escalas']]
+        saida = Path(options['saida'] or f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+
+        relatorio = {
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'commit': self._commit(),
+            'banco': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'configuracoes': {
+                nome: getattr(settings, nome, None)
+                for nome in ('IMPORTACAO_CARREGADOR', 'IMPORTACAO_TAMANHO_BLOCO', 'MOTOR_COLUNAR', 'RESUMOS_PARQUET')
+            },
+            'repeticoes': options['repeticoes'],
+            'semente': options['semente'],
+            'escalas': [],
+        }
+
+        # Banco de teste descartável: nada do banco configurado é lido ou apagado.
+        # Também ficam de fora o cache compartilhado e as pastas de snapshot/Parquet,
+        # que poderiam misturar os dados sintéticos com os de verdade.
+        setup_test_environment()
+        config_bancos = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        compartilhado = cache_resumos.alias_compartilhado
+        cache_resumos.alias_compartilhado = None
+        # O log de queries é zerado a cada requisição; sem isso a contagem se perde
+        request_started.disconnect(reset_queries)
+        try:
+            with tempfile.TemporaryDirectory() as pasta, override_settings(
+                MOTOR_COLUNAR_DIR=str(Path(pasta) / 'colunar'),
+                PARQUET_DIR=str(Path(pasta) / 'parquet'),
+                IMPORTACAO_DIRETORIO=str(Path(pasta) / 'importacoes'),
+            ):
+                cliente = APIClient()
+                cliente.force_authenticate(User.objects.create_user(username='benchmark'))
+                for linhas in escalas:
+                    self.stdout.write(self.style.SUCCESS(f'--- {linhas} linhas ---'))
+                    relatorio['escalas'].append(self._medir_escala(cliente, Path(pasta), linhas, options))
+        finally:
+            request_started.connect(reset_queries)
+            cache_resumos.alias_compartilhado = compartilhado
+            cache_resumos.limpar()
+            limpar_mapas()
+            teardown_databases(config_bancos, verbosity=0)
+            teardown_test_environment()
+
+        saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'Relatório gravado em {saida}'))
+
+    def _medir_escala(self, cliente, pasta, linhas, options):
+        Transacao.objects.all().delete()
+        AgregadoDiario.objects.all().delete()
+        LoteImportacao.objects.all().delete()
+        incrementar_versao()
+
+        inicio = time.perf_counter()
+        arquivo = escrever_planilha(pasta / f'sintetico_{linhas}.csv', linhas, semente=options['semente'])
+        geracao = time.perf_counter() - inicio
+
+        upload = self._upload(cliente, arquivo, linhas)
+        # Mesmo arquivo de novo: pulado pelo checksum, sem ler a planilha
+        duplicado = self._upload(cliente, arquivo, linhas)
+        # Forçando a importação: nada muda, mede só a comparação pelos hashes
+        reenvio = self._upload(cliente, arquivo, linhas, forcar=True)
+
+        parametros = self._parametros()
+        valores = {nome: quote(str(valor)) for nome, valor in parametros.items()}
+        endpoints = {
+            modelo: self._medir_endpoint(cliente, modelo.format(**valores), options['repeticoes'])
+            for modelo in ENDPOINTS
+        }
+        busca_sem_indice = self._medir_busca_sem_indice(parametros, options['repeticoes'])
+        return {
+            'linhas': linhas,
+            'geracao_segundos': round(geracao, 3),
+            'upload': upload,
+            'duplicado': duplicado,
+            'reenvio': reenvio,
+            'parametros': parametros,
+            'endpoints': endpoints,
+            'busca_sem_indice': busca_sem_indice,
+        }
+
+    def _upload(self, cliente, arquivo, linhas, forcar=False):
+        reset_queries()
+        with open(arquivo, 'rb') as conteudo, CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            resposta = cliente.post('/api/upload/?forcar=1' if forcar else '/api/upload/', {'file': conteudo}, format='multipart')
+            duracao = time.perf_counter() - inicio
+
+        resultado = {
+            'status': resposta.status_code,
+            'segundos': round(duracao, 3),
+            'linhas_por_segundo': round(linhas / duracao),
+            **{chave: resposta.data.get(chave) for chave in ('inseridas', 'removidas', 'inalteradas', 'datas_alteradas')},
+        }
+        self.stdout.write(
+            f"upload {resultado['status']}  {duracao:8.2f}s  {resultado['linhas_por_segundo']:>10,} linhas/s  "
+            f"(inseridas {resultado['inseridas']}, inalteradas {resultado['inalteradas']})"
+            + self._anotar_particoes(resultado, consultas.captured_queries)
+        )
+        return resultado
+
+    def _parametros(self):
+        """Valores reais dos dados gerados: último ano/mês, setor e fornecedor mais frequentes."""
+        ultima = AgregadoDiario.objects.aggregate(ultima=Max('data'))['ultima']
+        setor = AgregadoDiario.objects.values('responsavel__nome').annotate(
+            n=Count('id')
+        ).order_by('-n').values_list('responsavel__nome', flat=True).first()
+        fornecedor = AgregadoDiario.objects.exclude(fornecedor_ref__isnull=True).values(
+            'fornecedor_ref__nome'
+        ).annotate(n=Count('id')).order_by('-n').values_list('fornecedor_ref__nome', flat=True).first()
+        return {
+            'ano': ultima.year,
+            'mes': ultima.month,
+            'setor': setor,
+            'fornecedor': fornecedor,
+            # TXT de uma linha do último dia (no sintético, único por linha)
+            'nf': Transacao.objects.filter(data=ultima).values_list('txt_detalhe', flat=True).first(),
+            'inicio': (ultima - timedelta(days=6)).isoformat(),
+            'fim': ultima.isoformat(),
+        }
+
+    def _medir_endpoint(self, cliente, url, repeticoes):
+        """Frio: caches e mapas limpos antes de cada requisição. Quente: repetida em seguida."""
+        frios, quentes = [], []
+        for _ in range(repeticoes):
+            cache_resumos.limpar()
+            limpar_mapas()
+            # O log de queries é um deque limitado, que o upload já encheu
+            reset_queries()
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                resposta = cliente.get(url)
+                tamanho = len(self._conteudo(resposta))
+                frios.append(time.perf_counter() - inicio)
+            queries = len(consultas)  # fatia do log atual: contar antes da próxima requisição
+
+            inicio = time.perf_counter()
+            self._conteudo(cliente.get(url))
+            quentes.append(time.perf_counter() - inicio)
+
+        resultado = {
+            'status': resposta.status_code,
+            'queries': queries,
+            'bytes': tamanho,
+            'frio_ms': self._estatisticas(frios),
+            'quente_ms': self._estatisticas(quentes),
+        }
+        self.stdout.write(
+            f"{url[:70]:<70} {resultado['status']}  frio {resultado['frio_ms']['mediana']:9.1f}ms  "
+            f"quente {resultado['quente_ms']['mediana']:8.1f}ms  {resultado['queries']:>3} queries"
+            + self._anotar_particoes(resultado, consultas.captured_queries)
+        )
+        return resultado
+
+    def _medir_busca_sem_indice(self, parametros, repeticoes):
+        """
+        As buscas de ENDPOINTS pelo caminho sem índice (icontains, ILIKE '%...%'),
+        para comparar com o GIN. Só no PostgreSQL; direto no ORM, sem cache.
+        """
+        if not busca_indexada():
+            return None
+        resultado = {}
+        for texto, filtros in ((parametros['nf'], {}), (parametros['fornecedor'], parametros)):
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                buscar(filtrar_transacoes(Transacao.objects.all(), filtros), texto, ordem='data', indexada=False)
+                tempos.append(time.perf_counter() - inicio)
+            resultado[texto] = self._estatisticas(tempos)
+            self.stdout.write(f"{'busca sem índice: ' + texto:<70}      frio {resultado[texto]['mediana']:9.1f}ms")
+        return resultado
+
+    def _anotar_particoes(self, resultado, capturadas):
+        """
+        Postgres particionado (custos/particoes.py): partições de transações no plano
+        (EXPLAIN, sem executar) de cada consulta que lê a tabela. Retorna o resumo impresso.
+        """
+        anuais = particoes()
+        if anuais is None:
+            return ''
+        todas = {*anuais.values(), PADRAO}
+
+        lidas = []
+        with connection.cursor() as cursor:
+            for consulta in capturadas:
+                sql = consulta['sql']
+                # COPY e INSERT ... VALUES não leem a tabela; o INSERT ... SELECT do rollup lê
+                if not sql.startswith(('SELECT', 'DELETE', 'UPDATE', f'INSERT INTO "{AgregadoDiario._meta.db_table}"')):
+                    continue
+                if f'"{TABELA}"' not in sql:
+                    continue
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                plano = cursor.fetchone()[0]
+                if isinstance(plano, str):
+                    plano = json.loads(plano)
+                lidas.append(len(self._relacoes(plano[0]['Plan']) & todas))
+
+        resultado['particoes'] = {'total': len(todas), 'lidas_por_consulta': lidas}
+        return f"  partições {max(lidas)}/{len(todas)}" if lidas else ''
+
+    @classmethod
+    def _relacoes(cls, no):
+        relacoes = {no['Relation Name']} if 'Relation Name' in no else set()
+        for filho in no.get('Plans', []):
+            relacoes |= cls._relacoes(filho)
+        return relacoes
+
+    @staticmethod
+    def _conteudo(resposta):
+        # Exportação é streaming: o tempo inclui gerar o arquivo inteiro
+        if resposta.streaming:
+            return b''.join(resposta.streaming_content)
+        return resposta.content
+
+    @staticmethod
+    def _estatisticas(segundos):
+        ms = [s * 1000 for s in segundos]
+        return {
+            'mediana': round(statistics.median(ms), 2),
+            'min': round(min(ms), 2),
+            'max': round(max(ms), 2),
+        }
+
+    @staticmethod
+    def _commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
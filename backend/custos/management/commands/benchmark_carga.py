@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from decimal import Decimal
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from custos.carga import CARREGADORES, CarregadorCopy, copy_disponivel, obter_carregador
+from custos.models import ResponsavelCusto
+
+class Command(BaseCommand):
+    help = 'Compara linhas/segundo de cada backend de carga de transações (nada é gravado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--linhas', type=int, default=100000, help='Quantidade de linhas sintéticas por rodada')
+        parser.add_argument('--rodadas', type=int, default=3, help='Rodadas por carregador (usa a melhor)')
+        parser.add_argument('--carregadores', nargs='+', choices=sorted(CARREGADORES), help='Carregadores a testar (padrão: todos disponíveis)')
+
+    def handle(self, *args, **options):
+        nomes = options['carregadores'] or sorted(CARREGADORES)
+        if CarregadorCopy.nome in nomes and not copy_disponivel():
+            self.stdout.write(self.style.WARNING('COPY indisponível neste banco, testando só o INSERT em lote.'))
+            nomes = [n for n in nomes if n != CarregadorCopy.nome]
+
+        # Tudo (inclusive os responsáveis sintéticos) é desfeito no final
+        with transaction.atomic():
+            linhas = self._gerar_linhas(options['linhas'])
+            self.stdout.write(f'{len(linhas)} linhas sintéticas, {options["rodadas"]} rodada(s) por carregador')
+
+            for nome in nomes:
+                carregador = obter_carregador(nome)
+                tempos = []
+                for _ in range(options['rodadas']):
+                    # Cada rodada roda num savepoint desfeito no final
+                    with transaction.atomic():
+                        inicio = time.perf_counter()
+                        carregador.carregar(linhas)
+                        tempos.append(time.perf_counter() - inicio)
+                        transaction.set_rollback(True)
+
+                melhor = min(tempos)
+                self.stdout.write(self.style.SUCCESS(
+                    f'{nome:<12} {melhor:8.2f}s  {len(linhas) / melhor:12,.0f} linhas/s'
+                ))
+
+            transaction.set_rollback(True)
+
+    def _gerar_linhas(self, quantidade):
+        """Tuplas no formato de custos.carga.CAMPOS_CARGA."""
+        responsaveis = [
+            ResponsavelCusto.objects.get_or_create(nome=f'Benchmark {i}')[0].id
+            for i in range(20)
+        ]
+
+        rnd = random.Random(42)
+        inicio = date(2025, 1, 1)
+        return [
+            (
+                rnd.choice(responsaveis),
+                inicio + timedelta(days=rnd.randrange(365)),
+                f'Conta {rnd.randrange(80)}',
+                f'Detalhe da operação {i}',
+                Decimal(rnd.randrange(-50000, 500000)) / 100,
+                f'Fornecedor {rnd.randrange(3000)}' if rnd.random() > 0.1 else None,
+                None,  # fornecedor_ref e conta_ref: a carga não depende das dimensões
+                None,
+                None,  # lote: linhas de benchmark não vêm de uma importação
+                rnd.getrandbits(63),
+            )
+            for i in range(quantidade)
+        ]
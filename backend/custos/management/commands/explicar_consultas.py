@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum, Count
+from django.db.models.functions import ExtractMonth
+from custos.models import Transacao, AgregadoDiario
+from custos.periodos import filtro_periodo
+
+class Command(BaseCommand):
+    help = 'Mostra o plano de execução (EXPLAIN) das consultas mais usadas pelas views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ano', type=int, help='Ano usado nos filtros (padrão: ano da transação mais recente)')
+        parser.add_argument('--mes', type=int, default=1, help='Mês usado nos filtros de mês')
+        parser.add_argument('--analyze', action='store_true', help='Executa as consultas (EXPLAIN ANALYZE, só PostgreSQL)')
+
+    def handle(self, *args, **options):
+        ultima = Transacao.objects.order_by('-data').values_list('data', flat=True).first()
+        if not ultima:
+            self.stdout.write(self.style.ERROR('Nenhuma transação no banco.'))
+            return
+
+        ano = options['ano'] or ultima.year
+        mes = options['mes']
+
+        # Valores reais mais frequentes para os filtros por setor/fornecedor
+        setor = Transacao.objects.filter(**filtro_periodo(ano)).values('responsavel__nome').annotate(
+            n=Count('id')
+        ).order_by('-n').values_list('responsavel__nome', flat=True).first()
+        fornecedor = Transacao.objects.filter(**filtro_periodo(ano), fornecedor_ref__isnull=False).values('fornecedor_ref').annotate(
+            n=Count('id')
+        ).order_by('-n').values_list('fornecedor_ref', flat=True).first()
+
+        consultas = [
+            ('Transações do fornecedor no mês (TransacoesFornecedorView)',
+             Transacao.objects.filter(fornecedor_ref=fornecedor, **filtro_periodo(ano, mes)).order_by('data')),
+            ('Transações do setor no mês (TransacaoViewSet / DetalhesModal)',
+             Transacao.objects.filter(responsavel__nome=setor, **filtro_periodo(ano, mes))),
+            ('Contas do setor no ano (DetalhesSetorView, direto na tabela)',
+             Transacao.objects.filter(responsavel__nome=setor, **filtro_periodo(ano)).values(
+                 'descricao_conta').annotate(total=Sum('valor'), count=Count('id')).order_by('-total')),
+            ('Transações de um período (TransacaoViewSet / DashboardResumoView)',
+             Transacao.objects.filter(**filtro_periodo(ano, mes))),
+            ('Total por setor e mês no rollup (ResumoMensalView)',
+             AgregadoDiario.objects.filter(**filtro_periodo(ano)).annotate(mes=ExtractMonth('data')).values(
+                 'mes', 'responsavel__nome').annotate(total=Sum('valor')).order_by('mes', '-total')),
+            ('Fornecedores do ano no rollup (ResumoFornecedoresView)',
+             AgregadoDiario.objects.filter(fornecedor_ref__isnull=False, **filtro_periodo(ano)).values(
+                 'fornecedor_ref').annotate(total=Sum('valor')).order_by('-total')),
+        ]
+
+        opcoes = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                self.stdout.write(self.style.ERROR('--analyze só é suportado no PostgreSQL.'))
+                return
+            opcoes = {'analyze': True, 'buffers': True}
+
+        self.stdout.write(f'Banco: {connection.vendor} | ano={ano} mes={mes} setor={setor!r} fornecedor={fornecedor!r}')
+        for titulo, queryset in consultas:
+            self.stdout.write('')
+            self.stdout.write(self.style.SUCCESS(f'== {titulo}'))
+            self.stdout.write(queryset.explain(**opcoes))
@@ -0,0 +1,35 @@
+from datetime import date
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from custos.sinteticos import escrever_planilha, interpretar_escala
+
+
+class Command(BaseCommand):
+    help = 'Gera uma planilha sintética (.csv ou .xlsx) no layout do upload, de 10k a 10M de linhas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('saida', type=str, help='Arquivo de saída (.csv ou .xlsx)')
+        parser.add_argument('--linhas', type=str, default='100k', help='Quantidade de linhas (aceita 10k, 1M...)')
+        parser.add_argument('--inicio', type=date.fromisoformat, default=date(2024, 1, 1), help='Primeira data (AAAA-MM-DD)')
+        parser.add_argument('--dias', type=int, default=730, help='Dias cobertos a partir do início')
+        parser.add_argument('--setores', type=int, default=40)
+        parser.add_argument('--fornecedores', type=int, default=2500)
+        parser.add_argument('--contas', type=int, default=120)
+        parser.add_argument('--semente', type=int, default=42)
+
+    def handle(self, *args, **options):
+        linhas = interpretar_escala(options['linhas'])
+        inicio = time.perf_counter()
+        try:
+            caminho = escrever_planilha(
+                options['saida'], linhas,
+                inicio=options['inicio'], dias=options['dias'], setores=options['setores'],
+                fornecedores=options['fornecedores'], contas=options['contas'], semente=options['semente'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Sucesso! {linhas} linhas em {caminho} ({time.perf_counter() - inicio:.2f}s).'
+        ))
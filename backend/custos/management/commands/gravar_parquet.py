@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from custos import parquet
+import time
+
+
+class Command(BaseCommand):
+    help = 'Grava os arquivos Parquet das transações, um por ano (todos, ou só os anos informados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('anos', nargs='*', type=int, help='Anos a regravar (padrão: todos, com o marcador COMPLETO)')
+
+    def handle(self, *args, **options):
+        if parquet.pa is None:
+            raise CommandError('pyarrow não está instalado (pip install pyarrow).')
+
+        inicio = time.perf_counter()
+        if options['anos']:
+            gravados = {ano: parquet.gravar_ano(ano) for ano in options['anos']}
+        else:
+            gravados = parquet.gravar_todos()
+
+        for ano, (caminho, linhas) in sorted(gravados.items()):
+            self.stdout.write(f'{ano}: {linhas:>9} linhas  {caminho.stat().st_size / 1024 / 1024:8.2f} MB  {caminho.name}')
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(f'Sucesso! {len(gravados)} arquivo(s) em {duracao:.2f}s.'))
@@ -1,67 +1,151 @@
-import pandas as pd
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from custos.models import ResponsavelCusto, Transacao
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 import os
+import pickle
+import tempfile
+import time
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from custos.importacao import (
+    ErroImportacao, ImportacaoIncremental, calcular_checksum, ler_blocos, limpar_bloco, lote_identico
+)
+
+EXTENSOES = ('.xlsx', '.xlsm', '.csv')
+
+# Fornecedor é opcional aqui (planilhas antigas não têm a coluna)
+COLUNAS_NECESSARIAS = ['MA', 'TRANSDATE', 'AMOUNTMST', 'Descrição Conta']
+
+
+def ler_arquivo(caminho, tamanho_bloco, destino):
+    """
+    Roda num processo do pool: lê e limpa o arquivo bloco a bloco, sem tocar no
+    banco, e grava cada bloco limpo (pickle) no arquivo temporário destino.
+    Só um bloco fica em memória por vez. Retorna (destino, segundos de leitura).
+    """
+    inicio = time.perf_counter()
+    with open(caminho, 'rb') as arquivo, open(destino, 'wb') as saida:
+        for df in ler_blocos(arquivo, caminho, tamanho_bloco):
+            pickle.dump(limpar_bloco(df, COLUNAS_NECESSARIAS), saida, protocol=pickle.HIGHEST_PROTOCOL)
+    return destino, time.perf_counter() - inicio
+
+
+def blocos_gravados(destino):
+    """Relê, um por vez, os blocos que ler_arquivo gravou em destino."""
+    with open(destino, 'rb') as entrada:
+        while True:
+            try:
+                yield pickle.load(entrada)
+            except EOFError:
+                return
+
 
 class Command(BaseCommand):
-    help = 'Importa dados da planilha de custos para o banco de dados'
+    help = 'Importa uma ou mais planilhas de custos (arquivos ou pastas), lendo em paralelo'
 
     def add_arguments(self, parser):
-        parser.add_argument('caminho_arquivo', type=str, help='Caminho completo para o arquivo Excel')
+        parser.add_argument('caminhos', nargs='+', type=str, help='Arquivos .xlsx/.csv ou pastas com eles')
+        parser.add_argument('--processos', type=int, default=os.cpu_count() or 1, help='Processos para ler os arquivos')
+        parser.add_argument('--tamanho-bloco', type=int, default=None, help='Linhas por bloco (padrão: IMPORTACAO_TAMANHO_BLOCO)')
+        parser.add_argument('--forcar', action='store_true', help='Importa mesmo arquivos idênticos a lotes já importados')
 
     def handle(self, *args, **options):
-        caminho = options['caminho_arquivo']
+        arquivos = self._listar_arquivos(options['caminhos'])
+        if not arquivos:
+            raise CommandError('Nenhum arquivo .xlsx/.csv encontrado.')
 
-        if not os.path.exists(caminho):
-            self.stdout.write(self.style.ERROR(f'Arquivo não encontrado: {caminho}'))
-            return
+        # Arquivos idênticos a um lote ativo nem chegam ao pool de leitura
+        checksums = {}
+        for caminho in arquivos:
+            with open(caminho, 'rb') as arquivo:
+                checksums[caminho] = calcular_checksum(arquivo)
+        if not options['forcar']:
+            arquivos = [caminho for caminho in arquivos if not self._identico(caminho, checksums[caminho])]
+            if not arquivos:
+                self.stdout.write(self.style.WARNING('Nada a importar: todos os arquivos já foram importados.'))
+                return
 
-        self.stdout.write(self.style.SUCCESS(f'Lendo arquivo: {caminho}...'))
+        processos = max(1, min(options['processos'], len(arquivos)))
+        self.stdout.write(self.style.SUCCESS(f'{len(arquivos)} arquivo(s), lendo com {processos} processo(s)...'))
 
-        try:
-            # Lê o Excel (Assume que os dados estão na primeira aba)
-            df = pd.read_excel(caminho)
-            
-            # Limpeza básica nos nomes das colunas (remove espaços extras tipo "MA ")
-            df.columns = df.columns.str.strip()
-
-            # Verifica se as colunas essenciais existem
-            colunas_necessarias = ['MA', 'TRANSDATE', 'AMOUNTMST', 'Descrição Conta']
-            for col in colunas_necessarias:
-                if col not in df.columns:
-                    self.stdout.write(self.style.ERROR(f'Coluna obrigatória não encontrada no Excel: "{col}"'))
-                    self.stdout.write(f'Colunas encontradas: {list(df.columns)}')
-                    return
-
-            total_importado = 0
-            
-            # Bloco atômico: ou salva tudo ou não salva nada (segurança)
-            with transaction.atomic():
-                for index, row in df.iterrows():
-                    # 1. Identifica ou Cria o Responsável (Coluna L - MA)
-                    nome_responsavel = str(row['MA']).strip()
-                    
-                    # Pula linhas onde o MA é vazio ou NaN
-                    if not nome_responsavel or nome_responsavel.lower() == 'nan':
-                        continue
-
-                    responsavel, created = ResponsavelCusto.objects.get_or_create(
-                        nome=nome_responsavel
-                    )
-
-                    # 2. Cria a Transação
-                    Transacao.objects.create(
-                        responsavel=responsavel,
-                        data=row['TRANSDATE'],
-                        valor=row['AMOUNTMST'],
-                        descricao_conta=str(row['Descrição Conta']),
-                        txt_detalhe=str(row['TXT']) if 'TXT' in df.columns else '',
-                        arquivo_origem=os.path.basename(caminho)
-                    )
-                    total_importado += 1
-
-            self.stdout.write(self.style.SUCCESS(f'Sucesso! {total_importado} linhas importadas.'))
+        inicio_total = time.perf_counter()
+        # A leitura (pandas/openpyxl) roda no pool; a gravação fica neste processo,
+        # numa transação só, pelo mesmo caminho do upload (ImportacaoIncremental).
+        # Todos os arquivos formam um único conjunto: datas repetidas entre arquivos somam.
+        # Os blocos limpos passam pelo disco (um temporário por arquivo), não pela
+        # memória: cada lado tem no máximo um bloco carregado por vez.
+        with tempfile.TemporaryDirectory(prefix='importar_custos_') as temporario, \
+                ProcessPoolExecutor(max_workers=processos, initializer=django.setup) as pool:
+            # Janela de até processos * 2 arquivos lidos e ainda não gravados no banco
+            pendentes = enumerate(arquivos)
+            fila = deque()
+
+            def enfileirar():
+                indice, caminho = next(pendentes, (None, None))
+                if caminho is not None:
+                    destino = os.path.join(temporario, f'{indice}.pickle')
+                    fila.append((caminho, pool.submit(ler_arquivo, str(caminho), options['tamanho_bloco'], destino)))
+
+            for _ in range(processos * 2):
+                enfileirar()
+
+            try:
+                with transaction.atomic():
+                    importacao = ImportacaoIncremental()
+                    while fila:
+                        caminho, futuro = fila.popleft()
+                        enfileirar()
+                        self._importar_arquivo(importacao, caminho, futuro, checksums[caminho])
+                    resultado = importacao.finalizar()
+            except ErroImportacao as e:
+                for _, futuro in fila:
+                    futuro.cancel()
+                raise CommandError(f'Erro ao importar (nada foi gravado): {e}')
+
+        duracao = time.perf_counter() - inicio_total
+        self.stdout.write(self.style.SUCCESS(
+            f"Sucesso! {resultado['linhas']} linhas em {duracao:.2f}s "
+            f"({resultado['linhas'] / duracao:,.0f} linhas/s): {resultado['inseridas']} inseridas, "
+            f"{resultado['removidas']} removidas e {resultado['inalteradas']} inalteradas."
+        ))
 
+    def _identico(self, caminho, checksum):
+        lote = lote_identico(checksum)
+        if lote:
+            self.stdout.write(self.style.WARNING(
+                f'{caminho.name}: idêntico ao lote {lote.id} ({lote.arquivo_nome}), pulado (use --forcar)'
+            ))
+        return lote is not None
+
+    def _importar_arquivo(self, importacao, caminho, futuro, checksum):
+        try:
+            destino, leitura = futuro.result()
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'Erro ao importar: {str(e)}'))
\ No newline at end of file
+            raise ErroImportacao(f'{caminho.name}: {e}')
+
+        inicio = time.perf_counter()
+        lote = importacao.abrir_lote(caminho.name, checksum)
+        linhas = sum(importacao.processar_bloco(df, lote) for df in blocos_gravados(destino))
+        gravacao = time.perf_counter() - inicio
+        os.remove(destino)
+
+        self.stdout.write(
+            f'{caminho.name:<40} {linhas:>9} linhas  leitura {leitura:7.2f}s  '
+            f'gravação {gravacao:7.2f}s  {linhas / max(leitura + gravacao, 1e-9):>10,.0f} linhas/s'
+        )
+
+    def _listar_arquivos(self, caminhos):
+        arquivos = []
+        for caminho in map(Path, caminhos):
+            if caminho.is_dir():
+                arquivos.extend(sorted(
+                    p for p in caminho.iterdir()
+                    if p.suffix.lower() in EXTENSOES and not p.name.startswith('~$')
+                ))
+            elif caminho.exists():
+                arquivos.append(caminho)
+            else:
+                raise CommandError(f'Arquivo não encontrado: {caminho}')
+        return arquivos
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from custos.jobs import executar_job, proximo_job_pendente, reabrir_jobs_travados
+from custos.models import JobImportacao
+
+class Command(BaseCommand):
+    help = 'Worker das importações assíncronas (IMPORTACAO_EXECUTOR=comando): processa os jobs pendentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true', help='Processa os pendentes e sai, em vez de ficar em loop')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre verificações quando a fila está vazia')
+        parser.add_argument('--timeout', type=int, default=None, help='Segundos em processamento para um job ser reaberto (padrão: IMPORTACAO_TIMEOUT_JOB)')
+
+    def handle(self, *args, **options):
+        while True:
+            # Jobs de um executor que morreu no meio voltam para a fila
+            reabertos = reabrir_jobs_travados(options['timeout'])
+            if reabertos:
+                self.stdout.write(self.style.WARNING(f'{reabertos} job(s) travado(s) em processamento reaberto(s)'))
+
+            job_id = proximo_job_pendente()
+            if job_id is None:
+                if options['uma_vez']:
+                    break
+                time.sleep(options['intervalo'])
+                continue
+
+            inicio = time.perf_counter()
+            if not executar_job(job_id):
+                continue  # outro worker pegou primeiro
+            duracao = time.perf_counter() - inicio
+
+            job = JobImportacao.objects.get(pk=job_id)
+            if job.status == JobImportacao.CONCLUIDO:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Job {job.id} ({job.arquivo_nome}): {job.linhas_processadas} linhas em {duracao:.2f}s'
+                ))
+            else:
+                self.stdout.write(self.style.ERROR(f'Job {job.id} ({job.arquivo_nome}) falhou: {job.erro}'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from custos.agregados import atualizar_agregados
+from custos.cache import incrementar_versao
+from custos import colunar
+from django.db import transaction
+import time
+
+class Command(BaseCommand):
+    help = 'Reconstrói do zero a tabela de agregados diários a partir das transações'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconstruindo agregados diários...')
+
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            total = atualizar_agregados()
+            incrementar_versao()
+        if colunar.ativo():
+            colunar.reconstruir_snapshot()
+        duracao = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(f'Sucesso! {total} agregados gravados em {duracao:.2f}s.'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from custos.colunar import reconstruir_snapshot
+import time
+
+
+class Command(BaseCommand):
+    help = 'Gera do zero o snapshot NumPy do motor colunar (MOTOR_COLUNAR) a partir do rollup diário'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        snapshot = reconstruir_snapshot()
+        duracao = time.perf_counter() - inicio
+
+        tamanho = sum(coluna.nbytes for coluna in snapshot.colunas.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot {snapshot.geracao}: {snapshot.linhas} linhas, '
+            f'{tamanho / 1024 / 1024:.1f} MB, versão {snapshot.versao}, em {duracao:.2f}s.'
+        ))
@@ -0,0 +1,122 @@
+# backend/custos/mapas.py
+"""
+Registro de mapas de exibição mantidos em memória por processo
+(nomes de exibição dos responsáveis, índice de fornecedores...).
+
+Cada mapa tem um contador de geração no banco (VersaoDados, chave própria):
+    - os sinais post_save/post_delete dos models de origem incrementam o contador
+      e descartam a cópia local;
+    - os outros workers comparam o contador (uma query simples pela chave) e
+      só recarregam o mapa quando ele mudou.
+
+Com settings.MAPAS_EXIBICAO_TTL > 0, a comparação é pulada por até TTL segundos.
+Para isso não contaminar o cache de resumos, os mapas também são revalidados
+sempre que a versão 'dados' observada pelo resposta_em_cache muda (toda escrita
+em responsáveis/configurações também incrementa 'dados').
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from .cache import incrementar_versao, obter_versao, ouvintes_versao_dados
+from .models import ResponsavelCusto
+
+
+class MapaEmCache:
+
+    def __init__(self, chave_versao, construir):
+        self.chave_versao = chave_versao
+        self.construir = construir
+        self._lock = threading.Lock()
+        self._valor = None
+        self._versao = None
+        self._verificado_em = 0.0
+
+    def obter(self):
+        ttl = getattr(settings, 'MAPAS_EXIBICAO_TTL', 0)
+        if self._valor is not None and ttl and time.monotonic() - self._verificado_em < ttl:
+            return self._valor
+
+        versao = obter_versao(self.chave_versao)
+        with self._lock:
+            if self._valor is None or self._versao != versao:
+                self._valor = self.construir()
+                self._versao = versao
+            self._verificado_em = time.monotonic()
+            return self._valor
+
+    def expirar(self):
+        """Força a conferência do contador no próximo acesso (mantém o valor)."""
+        self._verificado_em = 0.0
+
+    def limpar(self):
+        with self._lock:
+            self._valor = self._versao = None
+            self._verificado_em = 0.0
+
+
+_registro = {}
+
+
+def registrar_mapa(nome, construir, modelos=(), chave_versao=None):
+    """
+    Registra um mapa. construir() monta o valor a partir do banco;
+    qualquer save/delete nos modelos informados o invalida.
+    """
+    mapa = MapaEmCache(chave_versao or nome, construir)
+    _registro[nome] = mapa
+
+    def invalidar(sender, **kwargs):
+        mapa.limpar()
+        incrementar_versao(mapa.chave_versao)
+
+    for modelo in modelos:
+        uid = f'mapa:{nome}:{modelo._meta.label}'
+        post_save.connect(invalidar, sender=modelo, weak=False, dispatch_uid=uid)
+        post_delete.connect(invalidar, sender=modelo, weak=False, dispatch_uid=uid)
+    return mapa
+
+
+def obter_mapa(nome):
+    return _registro[nome].obter()
+
+
+def limpar_mapa(nome):
+    """Descarta a cópia local de um mapa (o próximo acesso recarrega)."""
+    _registro[nome].limpar()
+
+
+_ultima_versao_dados = None
+
+
+def limpar_mapas():
+    """Descarta todos os mapas deste processo (o próximo acesso recarrega)."""
+    global _ultima_versao_dados
+    _ultima_versao_dados = None
+    for mapa in _registro.values():
+        mapa.limpar()
+
+
+def _versao_dados_observada(versao):
+    global _ultima_versao_dados
+    if versao != _ultima_versao_dados:
+        _ultima_versao_dados = versao
+        for mapa in _registro.values():
+            mapa.expirar()
+
+
+ouvintes_versao_dados.append(_versao_dados_observada)
+
+
+# --- Mapas registrados ---
+def _construir_mapa_responsaveis():
+    """{nome: nome_exibicao ou nome} dos centros de responsabilidade (MA)."""
+    return {
+        nome: nome_exibicao or nome
+        for nome, nome_exibicao in ResponsavelCusto.objects.values_list('nome', 'nome_exibicao')
+    }
+
+
+registrar_mapa('responsaveis', _construir_mapa_responsaveis, [ResponsavelCusto])
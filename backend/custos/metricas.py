@@ -0,0 +1,158 @@
+# backend/custos/metricas.py
+"""
+Instrumentação por requisição (MetricasMiddleware) e métricas por endpoint.
+
+Cada requisição mede:
+    - queries e tempo de banco: execute_wrapper em todas as conexões;
+    - serialização: o render() das respostas do DRF (JSON);
+    - python: o resto (views, ORM montando objetos, loops de Decimal -> float...).
+
+Os tempos vão no cabeçalho Server-Timing, que aparece na aba Network do navegador:
+
+    Server-Timing: db;dur=12.4;desc="5 queries", python;dur=30.1, serializacao;dur=2.2, total;dur=44.7
+
+e numa janela móvel por endpoint (nome da rota + método), servida por
+/api/metrics/ no formato texto do Prometheus (summary com quantis 0.5/0.9/0.99).
+As janelas são por processo: cada worker do gunicorn responde com as suas.
+Respostas em streaming (exportação) só contam o que roda antes do primeiro byte.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+
+QUANTIS = (0.5, 0.9, 0.99)
+
+# Nome da métrica -> (campo da Medicao, descrição)
+METRICAS = {
+    'custos_requisicao_segundos': ('total', 'Duração total das requisições'),
+    'custos_requisicao_db_segundos': ('db', 'Tempo em queries por requisição'),
+    'custos_requisicao_python_segundos': ('python', 'Tempo de Python (fora banco e serialização) por requisição'),
+    'custos_requisicao_serializacao_segundos': ('serializacao', 'Tempo de renderização da resposta por requisição'),
+    'custos_requisicao_queries': ('queries', 'Queries por requisição'),
+}
+
+
+class Medicao:
+    """Contadores de uma requisição."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serializacao = 0.0
+        self.total = 0.0
+
+    @property
+    def python(self):
+        return max(self.total - self.db - self.serializacao, 0.0)
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: envolve cada query executada durante a requisição
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db += time.perf_counter() - inicio
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'python;dur={self.python * 1000:.1f}',
+            f'serializacao;dur={self.serializacao * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ])
+
+
+class RegistroMetricas:
+    """Janelas móveis (últimas N requisições) e totais acumulados por (endpoint, método)."""
+
+    def __init__(self, tamanho_janela):
+        self.tamanho_janela = tamanho_janela
+        self._lock = threading.Lock()
+        self._janelas = {}
+        self._somas = {}
+        self._contagens = {}
+
+    def registrar(self, endpoint, metodo, medicao):
+        chave = (endpoint, metodo)
+        with self._lock:
+            if chave not in self._janelas:
+                self._janelas[chave] = {campo: deque(maxlen=self.tamanho_janela) for campo, _ in METRICAS.values()}
+                self._somas[chave] = dict.fromkeys(self._janelas[chave], 0.0)
+                self._contagens[chave] = 0
+            self._contagens[chave] += 1
+            for campo, janela in self._janelas[chave].items():
+                valor = getattr(medicao, campo)
+                janela.append(valor)
+                self._somas[chave][campo] += valor
+
+    def limpar(self):
+        with self._lock:
+            self._janelas.clear()
+            self._somas.clear()
+            self._contagens.clear()
+
+    def texto_prometheus(self):
+        """Todas as métricas no formato de exposição em texto do Prometheus."""
+        with self._lock:
+            instantaneo = {
+                chave: ({campo: list(janela) for campo, janela in janelas.items()},
+                        dict(self._somas[chave]), self._contagens[chave])
+                for chave, janelas in self._janelas.items()
+            }
+
+        linhas = []
+        for nome, (campo, descricao) in METRICAS.items():
+            linhas.append(f'# HELP {nome} {descricao} (janela das últimas {self.tamanho_janela})')
+            linhas.append(f'# TYPE {nome} summary')
+            for (endpoint, metodo), (janelas, somas, contagem) in sorted(instantaneo.items()):
+                rotulos = f'endpoint="{_escapar(endpoint)}",metodo="{metodo}"'
+                for quantil, valor in zip(QUANTIS, np.quantile(janelas[campo], QUANTIS)):
+                    linhas.append(f'{nome}{{{rotulos},quantile="{quantil}"}} {valor:.6g}')
+                linhas.append(f'{nome}_sum{{{rotulos}}} {somas[campo]:.6g}')
+                linhas.append(f'{nome}_count{{{rotulos}}} {contagem}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registro = RegistroMetricas(getattr(settings, 'METRICAS_JANELA', 1000))
+
+
+class MetricasMiddleware:
+    """Primeiro da lista em settings.MIDDLEWARE, para o total incluir os demais."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicao = Medicao()
+        request.medicao = medicao
+        with ExitStack() as pilha:
+            for alias in connections:
+                pilha.enter_context(connections[alias].execute_wrapper(medicao))
+            response = self.get_response(request)
+        medicao.total = time.perf_counter() - medicao.inicio
+
+        response['Server-Timing'] = medicao.server_timing()
+        rota = getattr(request, 'resolver_match', None)
+        registro.registrar(rota.view_name if rota else 'sem_rota', request.method, medicao)
+        return response
+
+    def process_template_response(self, request, response):
+        # Chamado logo antes do render() (somos o último process_template_response)
+        inicio = time.perf_counter()
+
+        def fim_render(resposta):
+            request.medicao.serializacao += time.perf_counter() - inicio
+
+        response.add_post_render_callback(fim_render)
+        return response
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def popular_agregados(apps, schema_editor):
+    """Gera o rollup inicial a partir das transações já existentes."""
+    Transacao = apps.get_model('custos', 'Transacao')
+    AgregadoDiario = apps.get_model('custos', 'AgregadoDiario')
+
+    grupos = Transacao.objects.order_by().values(
+        'data', 'responsavel_id', 'fornecedor', 'descricao_conta'
+    ).annotate(total=Sum('valor'), quantidade=Count('id'))
+
+    lote = []
+    for g in grupos.iterator(chunk_size=5000):
+        lote.append(AgregadoDiario(
+            data=g['data'],
+            responsavel_id=g['responsavel_id'],
+            fornecedor=g['fornecedor'],
+            descricao_conta=g['descricao_conta'],
+            valor=g['total'],
+            quantidade=g['quantidade'],
+        ))
+        if len(lote) >= 5000:
+            AgregadoDiario.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        AgregadoDiario.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0004_responsavelcusto_nome_exibicao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregadoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('fornecedor', models.CharField(blank=True, max_length=255, null=True)),
+                ('descricao_conta', models.CharField(max_length=255)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=18)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('responsavel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='agregados', to='custos.responsavelcusto')),
+            ],
+            options={
+                'verbose_name': 'Agregado Diário',
+                'verbose_name_plural': 'Agregados Diários',
+                'indexes': [models.Index(fields=['data', 'responsavel'], name='agregado_data_resp_idx')],
+            },
+        ),
+        migrations.RunPython(popular_agregados, migrations.RunPython.noop),
+    ]
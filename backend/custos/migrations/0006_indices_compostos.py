@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0005_agregadodiario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agregadodiario',
+            index=models.Index(fields=['fornecedor', 'data'], name='agregado_forn_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['data', 'responsavel'], name='transacao_data_resp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['fornecedor', 'data'], name='transacao_forn_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['responsavel', 'data', 'descricao_conta'], name='transacao_resp_data_conta_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+def criar_versao_inicial(apps, schema_editor):
+    VersaoDados = apps.get_model('custos', 'VersaoDados')
+    VersaoDados.objects.get_or_create(chave='dados')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0006_indices_compostos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoDados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=50, unique=True)),
+                ('versao', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versão dos Dados',
+                'verbose_name_plural': 'Versões dos Dados',
+            },
+        ),
+        migrations.RunPython(criar_versao_inicial, migrations.RunPython.noop),
+    ]
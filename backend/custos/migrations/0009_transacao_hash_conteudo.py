@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-17 20:34
+
+from django.db import migrations, models
+
+from custos.models import hash_conteudo
+
+
+def calcular_hashes(apps, schema_editor):
+    """Preenche o hash das transações já existentes (o upload incremental também cobre as que faltarem)."""
+    Transacao = apps.get_model('custos', 'Transacao')
+
+    lote = []
+    for t in Transacao.objects.order_by().only(
+        'id', 'responsavel_id', 'data', 'descricao_conta', 'txt_detalhe', 'valor', 'fornecedor'
+    ).iterator(chunk_size=5000):
+        t.hash_conteudo = hash_conteudo(
+            t.responsavel_id, t.data, t.descricao_conta, t.txt_detalhe, t.valor, t.fornecedor
+        )
+        lote.append(t)
+        if len(lote) >= 5000:
+            Transacao.objects.bulk_update(lote, ['hash_conteudo'])
+            lote = []
+    if lote:
+        Transacao.objects.bulk_update(lote, ['hash_conteudo'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0008_jobimportacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transacao',
+            name='hash_conteudo',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(calcular_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0009_transacao_hash_conteudo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['data', 'id'], name='transacao_data_id_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Particionamento por ano de custos_transacao (só PostgreSQL, ver custos/particoes.py)
+
+from datetime import date
+
+from django.db import migrations
+
+TABELA = 'custos_transacao'
+ANTIGA = 'custos_transacao_antiga'
+
+
+def _recriar(cursor, particionar):
+    """
+    Recria custos_transacao com o mesmo esquema, particionada por ano ou comum:
+    renomeia a atual, cria a nova (LIKE), copia as linhas e refaz chave primária,
+    índices e FKs com os nomes originais (o estado do Django não muda).
+    Numa tabela particionada a chave primária precisa incluir a data: (id, data).
+    """
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [TABELA]
+    )
+    nome_pk = cursor.fetchone()[0]
+    cursor.execute(
+        'SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary',
+        [TABELA]
+    )
+    indices = [linha[0] for linha in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABELA]
+    )
+    fks = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE {TABELA} RENAME TO {ANTIGA}')
+    cursor.execute(
+        f'CREATE TABLE {TABELA} (LIKE {ANTIGA} INCLUDING DEFAULTS INCLUDING IDENTITY '
+        f'INCLUDING CONSTRAINTS INCLUDING STORAGE)' + (' PARTITION BY RANGE (data)' if particionar else '')
+    )
+    if particionar:
+        cursor.execute(f'SELECT DISTINCT EXTRACT(YEAR FROM data)::int FROM {ANTIGA}')
+        anos = {linha[0] for linha in cursor.fetchall()} | {date.today().year}
+        for ano in sorted(anos):
+            cursor.execute(
+                f"CREATE TABLE {TABELA}_{ano} PARTITION OF {TABELA} "
+                f"FOR VALUES FROM ('{ano}-01-01') TO ('{ano + 1}-01-01')"
+            )
+        cursor.execute(f'CREATE TABLE {TABELA}_padrao PARTITION OF {TABELA} DEFAULT')
+
+    cursor.execute(f'INSERT INTO {TABELA} SELECT * FROM {ANTIGA}')
+    # A identidade da tabela nova começa do 1
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABELA}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {TABELA}"
+    )
+    cursor.execute(f'DROP TABLE {ANTIGA}')
+
+    colunas_pk = 'id, data' if particionar else 'id'
+    cursor.execute(f'ALTER TABLE {TABELA} ADD CONSTRAINT {nome_pk} PRIMARY KEY ({colunas_pk})')
+    for definicao in indices:
+        cursor.execute(definicao)
+    for nome, definicao in fks:
+        cursor.execute(f'ALTER TABLE {TABELA} ADD CONSTRAINT {nome} {definicao}')
+
+
+def particionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return  # SQLite (desenvolvimento): tabela comum
+    with schema_editor.connection.cursor() as cursor:
+        _recriar(cursor, particionar=True)
+
+
+def desparticionar(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        _recriar(cursor, particionar=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0010_indice_paginacao_transacoes'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0011_particionar_transacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContaContabil',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Conta Contábil',
+                'verbose_name_plural': 'Contas Contábeis',
+            },
+        ),
+        migrations.CreateModel(
+            name='Fornecedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='conta_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transacoes', to='custos.contacontabil'),
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='fornecedor_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transacoes', to='custos.fornecedor'),
+        ),
+        migrations.AddField(
+            model_name='agregadodiario',
+            name='conta_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='agregados', to='custos.contacontabil'),
+        ),
+        migrations.AddField(
+            model_name='agregadodiario',
+            name='fornecedor_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='agregados', to='custos.fornecedor'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:10
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# (dimensão, chave, texto de origem) em Transacao e AgregadoDiario
+REFERENCIAS = (
+    ('Fornecedor', 'fornecedor_ref', 'fornecedor'),
+    ('ContaContabil', 'conta_ref', 'descricao_conta'),
+)
+
+
+def popular_dimensoes(apps, schema_editor):
+    """
+    Cria uma linha de dimensão por nome distinto e preenche as chaves das
+    transações e do rollup. Texto vazio/nulo fica com a chave nula.
+    Migração separada do esquema: no PostgreSQL, UPDATE em coluna com FK
+    adiada e ALTER TABLE na mesma transação dão erro.
+    """
+    tabelas = [apps.get_model('custos', 'Transacao'), apps.get_model('custos', 'AgregadoDiario')]
+
+    for dimensao, chave, campo in REFERENCIAS:
+        Dimensao = apps.get_model('custos', dimensao)
+        nomes = set()
+        for modelo in tabelas:
+            nomes.update(
+                modelo.objects.exclude(**{f'{campo}__isnull': True}).exclude(**{campo: ''})
+                .order_by().values_list(campo, flat=True).distinct()
+            )
+        Dimensao.objects.bulk_create([Dimensao(nome=nome) for nome in sorted(nomes)], batch_size=5000)
+
+        for modelo in tabelas:
+            modelo.objects.exclude(**{f'{campo}__isnull': True}).exclude(**{campo: ''}).update(
+                **{chave: Subquery(Dimensao.objects.filter(nome=OuterRef(campo)).values('id')[:1])}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0012_dimensoes_fornecedor_conta'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_dimensoes, migrations.RunPython.noop),
+    ]
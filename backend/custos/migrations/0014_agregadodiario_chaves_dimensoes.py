@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0013_popular_dimensoes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='agregadodiario',
+            name='agregado_forn_data_idx',
+        ),
+        migrations.RemoveField(
+            model_name='agregadodiario',
+            name='descricao_conta',
+        ),
+        migrations.RemoveField(
+            model_name='agregadodiario',
+            name='fornecedor',
+        ),
+        migrations.AddIndex(
+            model_name='agregadodiario',
+            index=models.Index(fields=['fornecedor_ref', 'data'], name='agregado_forn_data_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0014_agregadodiario_chaves_dimensoes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Nulo até sair na 0017, para a volta recriar a coluna sem valor padrão
+        migrations.AlterField(
+            model_name='transacao',
+            name='arquivo_origem',
+            field=models.CharField(help_text='De qual Excel veio esse dado', max_length=255, null=True),
+        ),
+        migrations.CreateModel(
+            name='LoteImportacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo_nome', models.CharField(max_length=255, verbose_name='Nome do Arquivo')),
+                ('checksum', models.CharField(blank=True, db_index=True, help_text='SHA-256 do arquivo', max_length=64)),
+                ('linhas', models.PositiveIntegerField(default=0)),
+                ('inseridas', models.PositiveIntegerField(default=0)),
+                ('iniciado_em', models.DateTimeField(auto_now_add=True)),
+                ('finalizado_em', models.DateTimeField(blank=True, null=True)),
+                ('desfeito_em', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lote de Importação',
+                'verbose_name_plural': 'Lotes de Importação',
+                'ordering': ['-iniciado_em'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='lote',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transacoes', to='custos.loteimportacao'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:16
+
+from django.db import migrations
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+
+
+def popular_lotes(apps, schema_editor):
+    """
+    Um lote por arquivo_origem distinto, com as transações dele apontando para o lote.
+    Sem checksum (o arquivo não existe mais): esses lotes nunca contam como reenvio idêntico.
+    Migração separada do esquema: no PostgreSQL, UPDATE em coluna com FK
+    adiada e ALTER TABLE na mesma transação dão erro.
+    """
+    Transacao = apps.get_model('custos', 'Transacao')
+    LoteImportacao = apps.get_model('custos', 'LoteImportacao')
+
+    arquivos = (
+        Transacao.objects.order_by().values('arquivo_origem')
+        .annotate(linhas=Count('id'), inicio=Min('data_importacao'), fim=Max('data_importacao'))
+        .order_by('inicio')
+    )
+    for arquivo in arquivos:
+        lote = LoteImportacao.objects.create(
+            arquivo_nome=arquivo['arquivo_origem'], linhas=arquivo['linhas'], inseridas=arquivo['linhas'],
+            finalizado_em=arquivo['fim']
+        )
+        # iniciado_em é auto_now_add: o create ignora o valor informado
+        LoteImportacao.objects.filter(pk=lote.pk).update(iniciado_em=arquivo['inicio'])
+        Transacao.objects.filter(arquivo_origem=arquivo['arquivo_origem']).update(lote=lote)
+
+
+def restaurar_arquivo_origem(apps, schema_editor):
+    Transacao = apps.get_model('custos', 'Transacao')
+    LoteImportacao = apps.get_model('custos', 'LoteImportacao')
+
+    Transacao.objects.filter(lote__isnull=False).update(
+        arquivo_origem=Subquery(LoteImportacao.objects.filter(pk=OuterRef('lote')).values('arquivo_nome')[:1])
+    )
+    Transacao.objects.filter(lote__isnull=True).update(arquivo_origem='')
+    Transacao.objects.update(lote=None)
+    LoteImportacao.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0015_lote_importacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_lotes, restaurar_arquivo_origem),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0016_popular_lotes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='transacao',
+            name='arquivo_origem',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Índice GIN da busca textual (só PostgreSQL, ver custos/busca.py)
+
+from django.db import migrations
+
+NOME = 'transacao_busca_gin'
+
+
+def _indice():
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+
+    # Mesma expressão de custos.busca.VETOR: só assim o planner usa o índice
+    return GinIndex(
+        SearchVector('descricao_conta', 'txt_detalhe', 'fornecedor', config='portuguese'), name=NOME
+    )
+
+
+def criar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return  # SQLite (desenvolvimento): a busca usa icontains
+    # Na tabela particionada o índice é criado em cada partição (e nas anexadas depois)
+    schema_editor.add_index(apps.get_model('custos', 'Transacao'), _indice())
+
+
+def remover_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('custos', 'Transacao'), _indice())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0017_remove_transacao_arquivo_origem'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0018_indice_busca_transacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loteimportacao',
+            name='substituido_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
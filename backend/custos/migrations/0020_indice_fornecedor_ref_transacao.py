@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custos', '0019_lote_substituido_em'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transacao',
+            name='transacao_forn_data_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['fornecedor_ref', 'data'], name='transacao_fornref_data_idx'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+from decimal import Decimal
+from hashlib import blake2b
+
 from django.db import models
 
 class ResponsavelCusto(models.Model):
@@ -17,6 +20,60 @@ class ResponsavelCusto(models.Model):
     def __str__(self):
         return self.nome_exibicao or self.nome
 
+class Fornecedor(models.Model):
+    """
+    Dimensão dos fornecedores: cada nome distinto da coluna Fornecedor, uma vez só.
+    Transações e rollup guardam o id (inteiro) em vez de repetir o texto.
+    """
+    nome = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.nome
+
+
+class ContaContabil(models.Model):
+    """Dimensão das descrições de conta (coluna Descrição Conta), como Fornecedor."""
+    nome = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        verbose_name = "Conta Contábil"
+        verbose_name_plural = "Contas Contábeis"
+
+    def __str__(self):
+        return self.nome
+
+
+class LoteImportacao(models.Model):
+    """
+    Um arquivo importado (upload, job assíncrono ou comando importar_custos).
+    As transações que ele trouxe (novas ou iguais às que já existiam) apontam
+    para o lote, então desfazer a importação é um DELETE só pelo índice de
+    Transacao.lote (ver custos/importacao.py, desfazer_lote). O checksum (SHA-256 do arquivo)
+    identifica reenvios idênticos, que são pulados sem ler a planilha,
+    enquanto o lote não foi substituído: um lote posterior que mudou alguma
+    data dele marca substituido_em, e aí reenviar o arquivo volta a importar.
+    """
+    arquivo_nome = models.CharField(max_length=255, verbose_name="Nome do Arquivo")
+    # Vazio nos lotes criados pela migração a partir do antigo arquivo_origem
+    checksum = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 do arquivo")
+    linhas = models.PositiveIntegerField(default=0)
+    inseridas = models.PositiveIntegerField(default=0)
+
+    usuario = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+    iniciado_em = models.DateTimeField(auto_now_add=True)
+    finalizado_em = models.DateTimeField(null=True, blank=True)
+    desfeito_em = models.DateTimeField(null=True, blank=True)
+    substituido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-iniciado_em']
+        verbose_name = "Lote de Importação"
+        verbose_name_plural = "Lotes de Importação"
+
+    def __str__(self):
+        return f"{self.arquivo_nome} ({self.iniciado_em:%d/%m/%Y %H:%M})"
+
+
 class Transacao(models.Model):
     """
     Representa cada linha da planilha Excel.
@@ -37,16 +94,80 @@ class Transacao(models.Model):
     # Coluna Fornecedor - Nome do fornecedor
     fornecedor = models.CharField(max_length=255, blank=True, null=True, verbose_name="Fornecedor")
     
-    # Metadados para rastreabilidade
-    arquivo_origem = models.CharField(max_length=255, help_text="De qual Excel veio esse dado")
+    # Chaves das dimensões (ver custos/dimensoes.py); nulas quando o texto é vazio.
+    # Filtros por fornecedor e o rollup usam as chaves; os textos continuam na
+    # linha para a API de edição, a exportação, a busca textual e o hash. Ou
+    # seja, a linha fica mais larga: só AgregadoDiario é codificado por ids.
+    fornecedor_ref = models.ForeignKey(Fornecedor, on_delete=models.PROTECT, null=True, blank=True, related_name='transacoes')
+    conta_ref = models.ForeignKey(ContaContabil, on_delete=models.PROTECT, null=True, blank=True, related_name='transacoes')
+
+    # Metadados para rastreabilidade: de qual importação veio a linha (nulo nas
+    # criadas pela API/admin)
+    lote = models.ForeignKey(LoteImportacao, on_delete=models.PROTECT, null=True, blank=True, related_name='transacoes')
     data_importacao = models.DateTimeField(auto_now_add=True)
 
+    # Hash de 64 bits do conteúdo da linha (ver hash_conteudo), usado no
+    # upload incremental para saber o que mudou. Linhas antigas podem estar sem.
+    hash_conteudo = models.BigIntegerField(null=True, blank=True)
+
     class Meta:
         ordering = ['-data'] # Mostra os mais recentes primeiro
+        # Índices compostos seguindo os filtros reais das views
+        # (sempre intervalo de datas, ver custos/periodos.py)
+        indexes = [
+            models.Index(fields=['data', 'responsavel'], name='transacao_data_resp_idx'),
+            models.Index(fields=['fornecedor_ref', 'data'], name='transacao_fornref_data_idx'),
+            models.Index(fields=['responsavel', 'data', 'descricao_conta'], name='transacao_resp_data_conta_idx'),
+            # Ordem da paginação por cursor de /api/transacoes/ (ver custos/paginacao.py)
+            models.Index(fields=['data', 'id'], name='transacao_data_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.data} - R$ {self.valor} ({self.responsavel.nome})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Textos como estavam no banco: o save() só resolve a chave do que mudou
+        instancia._textos_salvos = {
+            campo: instancia.__dict__[campo] for campo in ('fornecedor', 'descricao_conta') if campo in instancia.__dict__
+        }
+        return instancia
+
+    def save(self, *args, **kwargs):
+        from .dimensoes import resolver_nome
+
+        # Edições pelo admin/API mantêm o hash e as chaves coerentes com o conteúdo
+        salvos = getattr(self, '_textos_salvos', {})
+        for modelo, chave, campo in ((Fornecedor, 'fornecedor_ref_id', 'fornecedor'), (ContaContabil, 'conta_ref_id', 'descricao_conta')):
+            texto = getattr(self, campo)
+            if campo not in salvos or salvos[campo] != texto or (texto and getattr(self, chave) is None):
+                setattr(self, chave, resolver_nome(modelo, texto))
+        self.hash_conteudo = hash_conteudo(
+            self.responsavel_id, self.data, self.descricao_conta,
+            self.txt_detalhe, self.valor, self.fornecedor
+        )
+        super().save(*args, **kwargs)
+        self._textos_salvos = {'fornecedor': self.fornecedor, 'descricao_conta': self.descricao_conta}
+
+
+def hash_conteudo(responsavel_id, data, descricao_conta, txt_detalhe, valor, fornecedor):
+    """
+    Hash de 64 bits (com sinal, cabe num BigIntegerField) do conteúdo de uma transação.
+    O lote de importação fica de fora: a mesma linha reenviada em outro arquivo é "inalterada".
+    None e '' geram hashes diferentes.
+    """
+    partes = (
+        str(responsavel_id),
+        data.isoformat(),
+        '\x00' if descricao_conta is None else descricao_conta,
+        '\x00' if txt_detalhe is None else txt_detalhe,
+        str(int(Decimal(valor).scaleb(2))),
+        '\x00' if fornecedor is None else fornecedor,
+    )
+    digest = blake2b('\x1f'.join(partes).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
 
 class FornecedorConfig(models.Model):
     """
@@ -67,4 +188,88 @@ class FornecedorConfig(models.Model):
         verbose_name_plural = "Configurações de Fornecedores"
     
     def __str__(self):
-        return f"{self.nome_original} → {self.nome_exibicao or 'Original'}"
\ No newline at end of file
+        return f"{self.nome_original} → {self.nome_exibicao or 'Original'}"
+
+class AgregadoDiario(models.Model):
+    """
+    Tabela de rollup: soma e contagem das transações por
+    (dia, responsável, fornecedor, conta contábil).
+    Os resumos leem daqui em vez de varrer a tabela de transações.
+    Mantida por custos.agregados.atualizar_agregados().
+    """
+    data = models.DateField()
+    responsavel = models.ForeignKey(ResponsavelCusto, on_delete=models.CASCADE, related_name='agregados')
+    # Agrupado pelos ids das dimensões; os nomes entram só no resultado final
+    fornecedor_ref = models.ForeignKey(Fornecedor, on_delete=models.PROTECT, null=True, blank=True, related_name='agregados')
+    conta_ref = models.ForeignKey(ContaContabil, on_delete=models.PROTECT, null=True, blank=True, related_name='agregados')
+
+    # Mesmo nome do campo em Transacao para que Sum('valor') funcione nas duas tabelas
+    valor = models.DecimalField(max_digits=18, decimal_places=2)
+    quantidade = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Agregado Diário"
+        verbose_name_plural = "Agregados Diários"
+        indexes = [
+            models.Index(fields=['data', 'responsavel'], name='agregado_data_resp_idx'),
+            models.Index(fields=['fornecedor_ref', 'data'], name='agregado_forn_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - {self.responsavel_id} - R$ {self.valor} ({self.quantidade})"
+
+
+class VersaoDados(models.Model):
+    """
+    Contador de versão dos dados (uma linha por chave).
+    Incrementado a cada upload/edição; usado para invalidar os caches
+    de resposta de todos os workers de uma vez.
+    """
+    chave = models.CharField(max_length=50, unique=True)
+    versao = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versão dos Dados"
+        verbose_name_plural = "Versões dos Dados"
+
+    def __str__(self):
+        return f"{self.chave} v{self.versao}"
+
+
+class JobImportacao(models.Model):
+    """
+    Importação assíncrona de planilha (upload com ?assincrono=1).
+    O arquivo fica salvo em disco até o job terminar; o progresso é
+    atualizado a cada bloco processado.
+    """
+    PENDENTE = 'pendente'
+    PROCESSANDO = 'processando'
+    CONCLUIDO = 'concluido'
+    ERRO = 'erro'
+    STATUS_CHOICES = [
+        (PENDENTE, 'Pendente'),
+        (PROCESSANDO, 'Processando'),
+        (CONCLUIDO, 'Concluído'),
+        (ERRO, 'Erro'),
+    ]
+
+    arquivo_nome = models.CharField(max_length=255, verbose_name="Nome do Arquivo")
+    caminho = models.CharField(max_length=500, help_text="Cópia temporária do arquivo enviado")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDENTE, db_index=True)
+
+    linhas_processadas = models.PositiveIntegerField(default=0)
+    datas_substituidas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True, default='')
+
+    usuario = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    finalizado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+        verbose_name = "Job de Importação"
+        verbose_name_plural = "Jobs de Importação"
+
+    def __str__(self):
+        return f"{self.arquivo_nome} ({self.status})"
@@ -0,0 +1,134 @@
+# backend/custos/orcamento.py
+"""
+Orçado x realizado por setor e mês (ResponsavelCusto.orcamento_mensal).
+
+Uma única consulta: os setores com LEFT JOIN no rollup diário do ano
+(FilteredRelation, o intervalo de datas vai no ON) agrupados por setor e mês,
+com a meta mensal vinda da mesma linha do setor. Setores sem gasto no ano
+aparecem com uma linha só, de mês nulo. O resto (meses sem gasto, variação,
+acumulados) é feito em memória sobre no máximo setores x 12 linhas.
+
+Convenções:
+    - variacao = realizado - orcado (positiva = acima do orçamento);
+    - consumo_percentual = realizado acumulado / orçamento do ano inteiro,
+      em % (None sem orçamento): o quanto do ano já foi "queimado".
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import FilteredRelation, Q, Sum
+from django.db.models.functions import ExtractMonth
+
+from .models import ResponsavelCusto
+from .periodos import intervalo_periodo
+
+ZERO = Decimal('0')
+
+
+class ErroOrcamento(Exception):
+    """Parâmetros inválidos (ex. ate_mes fora de 1..12). Vira HTTP 400."""
+
+
+def ultimo_mes_padrao(ano, hoje=None):
+    """Ano corrente: até o mês atual (meses futuros não têm realizado). Outros anos: até dezembro."""
+    hoje = hoje or date.today()
+    return hoje.month if ano == hoje.year else 12
+
+
+def calcular_orcamento(ano, ate_mes=None):
+    """
+    {'ano', 'ate_mes', 'por_setor', 'por_mes', 'totais'} com orçado, realizado,
+    variação e acumulados dos meses 1..ate_mes. Setores sem orçamento e sem
+    gasto no período ficam de fora.
+    """
+    ate_mes = ate_mes if ate_mes is not None else ultimo_mes_padrao(ano)
+    if not 1 <= ate_mes <= 12:
+        raise ErroOrcamento("O parâmetro 'ate_mes' deve estar entre 1 e 12")
+
+    inicio, fim = intervalo_periodo(ano)
+    linhas = ResponsavelCusto.objects.annotate(
+        periodo=FilteredRelation('agregados', condition=Q(agregados__data__gte=inicio, agregados__data__lt=fim))
+    ).annotate(
+        mes=ExtractMonth('periodo__data')
+    ).values_list(
+        'nome', 'nome_exibicao', 'orcamento_mensal', 'mes'
+    ).annotate(
+        realizado=Sum('periodo__valor')
+    ).order_by('nome', 'mes')
+
+    # {nome: [nome_exibicao, orcamento_mensal, {mes: realizado}]}
+    setores = {}
+    for nome, nome_exibicao, orcamento, mes, realizado in linhas:
+        setor = setores.setdefault(nome, [nome_exibicao, orcamento or ZERO, {}])
+        if mes is not None and mes <= ate_mes:
+            setor[2][mes] = realizado or ZERO
+
+    meses = range(1, ate_mes + 1)
+    por_setor = []
+    orcamento_mensal = ZERO
+    orcado_mes = dict.fromkeys(meses, ZERO)
+    realizado_mes = dict.fromkeys(meses, ZERO)
+    for nome, (nome_exibicao, orcamento, realizados) in setores.items():
+        if not orcamento and not realizados:
+            continue
+        por_setor.append({
+            "setor": nome_exibicao or nome,
+            "setor_original": nome,
+            "orcamento_mensal": _valor(orcamento),
+            **_resumo(orcamento * ate_mes, sum(realizados.values(), ZERO), orcamento * 12),
+            "meses": _meses(meses, lambda mes: orcamento, realizados.get, orcamento * 12),
+        })
+        orcamento_mensal += orcamento
+        for mes in meses:
+            orcado_mes[mes] += orcamento
+            realizado_mes[mes] += realizados.get(mes, ZERO)
+
+    por_setor.sort(key=lambda item: item["variacao"], reverse=True)
+    return {
+        "ano": ano,
+        "ate_mes": ate_mes,
+        "por_setor": por_setor,
+        "por_mes": _meses(meses, orcado_mes.get, realizado_mes.get, orcamento_mensal * 12),
+        "totais": {
+            "orcamento_mensal": _valor(orcamento_mensal),
+            **_resumo(sum(orcado_mes.values(), ZERO), sum(realizado_mes.values(), ZERO), orcamento_mensal * 12),
+        },
+    }
+
+
+def _meses(meses, orcado, realizado, orcamento_ano):
+    """Linha por mês com variação e os acumulados desde janeiro."""
+    resultado = []
+    orcado_acumulado = realizado_acumulado = ZERO
+    for mes in meses:
+        orcado_mes, realizado_mes = orcado(mes) or ZERO, realizado(mes) or ZERO
+        orcado_acumulado += orcado_mes
+        realizado_acumulado += realizado_mes
+        resultado.append({
+            "mes": mes,
+            "orcado": _valor(orcado_mes),
+            "realizado": _valor(realizado_mes),
+            "variacao": _valor(realizado_mes - orcado_mes),
+            "orcado_acumulado": _valor(orcado_acumulado),
+            "realizado_acumulado": _valor(realizado_acumulado),
+            "consumo_percentual": _percentual(realizado_acumulado, orcamento_ano),
+        })
+    return resultado
+
+
+def _resumo(orcado, realizado, orcamento_ano):
+    return {
+        "orcado": _valor(orcado),
+        "realizado": _valor(realizado),
+        "variacao": _valor(realizado - orcado),
+        "orcamento_ano": _valor(orcamento_ano),
+        "consumo_percentual": _percentual(realizado, orcamento_ano),
+    }
+
+
+def _percentual(parte, todo):
+    return round(float(parte / todo * 100), 1) if todo else None
+
+
+def _valor(total):
+    return float(total)
@@ -0,0 +1,84 @@
+# backend/custos/paginacao.py
+"""
+Paginação por cursor (keyset) das transações.
+
+A ordem é (data, id) decrescente, a mesma do Meta.ordering de Transacao
+("mais recentes primeiro") com o id como desempate. O cursor guarda a última
+(data, id) entregue e a próxima página é buscada com
+
+    WHERE data < d OR (data = d AND id < i)  ORDER BY data DESC, id DESC  LIMIT n
+
+então a página 1000 custa o mesmo que a primeira (não há OFFSET).
+
+É opcional: sem ?limite= nem ?cursor= a resposta continua sendo a lista
+completa, como o frontend espera hoje.
+"""
+import base64
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacaoCursorTransacoes(BasePagination):
+    parametro_cursor = 'cursor'
+    parametro_limite = 'limite'
+    limite_padrao = 100
+    limite_maximo = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.parametro_cursor not in params and self.parametro_limite not in params:
+            return None
+
+        self.request = request
+        self.limite = self._obter_limite(params.get(self.parametro_limite))
+
+        queryset = queryset.order_by('-data', '-id')
+        cursor = params.get(self.parametro_cursor)
+        if cursor:
+            data, id_ = self._decodificar(cursor)
+            queryset = queryset.filter(Q(data__lt=data) | Q(data=data, id__lt=id_))
+
+        # Busca um a mais só para saber se existe próxima página
+        pagina = list(queryset[:self.limite + 1])
+        self.tem_proxima = len(pagina) > self.limite
+        pagina = pagina[:self.limite]
+        self.ultimo = (pagina[-1].data, pagina[-1].id) if pagina else None
+        return pagina
+
+    def get_paginated_response(self, data):
+        return Response({
+            'proximo': self._link_proxima(),
+            'resultados': data,
+        })
+
+    def _link_proxima(self):
+        if not self.tem_proxima:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.parametro_limite, self.limite)
+        return replace_query_param(url, self.parametro_cursor, self._codificar(*self.ultimo))
+
+    def _obter_limite(self, valor):
+        try:
+            limite = int(valor)
+        except (TypeError, ValueError):
+            return self.limite_padrao
+        return max(1, min(limite, self.limite_maximo))
+
+    @staticmethod
+    def _codificar(data, id_):
+        return base64.urlsafe_b64encode(f'{data.isoformat()}|{id_}'.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decodificar(cursor):
+        try:
+            texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            data, id_ = texto.split('|')
+            return date.fromisoformat(data), int(id_)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound('Cursor inválido.')
@@ -0,0 +1,147 @@
+# backend/custos/painel.py
+"""
+Painel composto: vários widgets de resumo calculados a partir de UM único
+GROUP BY no rollup diário (AgregadoDiario).
+
+A consulta agrupa no grão mais fino que os widgets pedidos precisam
+(data x setor, mais fornecedor só se algum widget usar) e o resto é
+feito em memória com pandas, em vez de uma agregação SQL por widget.
+
+Os formatos de saída são os mesmos de /api/resumo-mensal/ e /api/resumo-diario/,
+para o frontend poder trocar várias chamadas por uma.
+"""
+import pandas as pd
+from django.db.models import Sum
+
+from .dimensoes import obter_dimensao
+from .models import AgregadoDiario, Fornecedor, ResponsavelCusto
+from .periodos import filtro_periodo
+
+# Widget -> precisa do fornecedor no grão da consulta?
+WIDGETS = {
+    'por_mes': False,
+    'por_setor_mes': False,
+    'por_dia': False,
+    'por_setor': False,
+    'top_fornecedores': True,
+    'totais': False,
+    'metas': False,
+}
+
+# Widgets que só fazem sentido com um mês selecionado
+WIDGETS_MENSAIS = {'por_dia'}
+
+
+class ErroPainel(Exception):
+    """Widget desconhecido ou combinação inválida de parâmetros. Vira HTTP 400."""
+
+
+def calcular_painel(ano, widgets, mes=None, limite=10, config_fornecedores=None, nomes_responsaveis=None):
+    """
+    Retorna {widget: dados} para cada widget pedido.
+    config_fornecedores: IndiceFornecedores (só para 'top_fornecedores')
+    nomes_responsaveis: {nome: nome_exibicao} (só para 'por_setor')
+    """
+    desconhecidos = set(widgets) - set(WIDGETS)
+    if desconhecidos:
+        raise ErroPainel(f"Widgets desconhecidos: {', '.join(sorted(desconhecidos))}")
+    if not mes and WIDGETS_MENSAIS & set(widgets):
+        raise ErroPainel(f"O parâmetro 'mes' é obrigatório para: {', '.join(sorted(WIDGETS_MENSAIS & set(widgets)))}")
+
+    df = _consultar(ano, mes, com_fornecedor=any(WIDGETS[w] for w in widgets))
+
+    resultado = {}
+    for widget in widgets:
+        if widget == 'por_mes':
+            por_mes = df.groupby('mes', sort=True)['total'].sum()
+            resultado[widget] = [{"mes": int(m), "total": _valor(t)} for m, t in por_mes.items()]
+
+        elif widget == 'por_setor_mes':
+            por_setor_mes = df.groupby(['mes', 'setor'])['total'].sum().reset_index()
+            por_setor_mes = por_setor_mes.sort_values(['mes', 'total'], ascending=[True, False])
+            resultado[widget] = [
+                {"mes": int(m), "setor": s, "total": _valor(t)}
+                for m, s, t in por_setor_mes.itertuples(index=False)
+            ]
+
+        elif widget == 'por_dia':
+            por_dia = df.groupby('dia', sort=True)['total'].sum()
+            resultado[widget] = [{"dia": int(d), "total": _valor(t)} for d, t in por_dia.items()]
+
+        elif widget == 'por_setor':
+            por_setor = df.groupby('setor')['total'].sum().sort_values(ascending=False, kind='stable').head(limite)
+            nomes = nomes_responsaveis or {}
+            resultado[widget] = [
+                {"setor": nomes.get(s, s), "setor_original": s, "total": _valor(t)}
+                for s, t in por_setor.items()
+            ]
+
+        elif widget == 'top_fornecedores':
+            resultado[widget] = _top_fornecedores(df, limite, config_fornecedores)
+
+        elif widget == 'totais':
+            resultado[widget] = _totais(df, ano, mes)
+
+        elif widget == 'metas':
+            # Mesmo mapa que o Analise.jsx monta a partir de /api/responsaveis/
+            resultado[widget] = {
+                nome_exibicao or nome: float(orcamento or 0)
+                for nome, nome_exibicao, orcamento in ResponsavelCusto.objects.values_list(
+                    'nome', 'nome_exibicao', 'orcamento_mensal'
+                )
+            }
+
+    return resultado
+
+
+def _consultar(ano, mes, com_fornecedor):
+    """O único GROUP BY do painel: (data, setor[, id do fornecedor]) -> soma."""
+    campos = ['data', 'responsavel__nome'] + (['fornecedor_ref'] if com_fornecedor else [])
+    linhas = AgregadoDiario.objects.filter(**filtro_periodo(ano, mes)).values_list(*campos).annotate(
+        total=Sum('valor')
+    ).order_by()
+
+    colunas = ['data', 'setor'] + (['fornecedor'] if com_fornecedor else []) + ['total']
+    df = pd.DataFrame.from_records(list(linhas), columns=colunas)
+    df['total'] = df['total'].astype(float)
+    datas = pd.to_datetime(df['data'])
+    df['mes'] = datas.dt.month
+    df['dia'] = datas.dt.day
+    return df
+
+
+def _top_fornecedores(df, limite, config_fornecedores):
+    fornecedores = df[df['fornecedor'].notna()].astype({'fornecedor': 'int64'})
+    por_original = fornecedores.groupby('fornecedor', as_index=False)['total'].sum()
+    # Agrupado pelo id; os nomes entram depois, um por fornecedor
+    dimensao = obter_dimensao(Fornecedor, por_original['fornecedor'].tolist())
+    por_original['fornecedor'] = por_original['fornecedor'].map(dimensao.nomes)
+
+    # Aplica nomes de exibição (mescla) e remove ocultos antes do ranking
+    if config_fornecedores is not None:
+        por_original['fornecedor'] = por_original['fornecedor'].map(config_fornecedores.exibicao)
+        por_original = por_original.dropna(subset=['fornecedor'])
+    por_exibicao = por_original.groupby('fornecedor')['total'].sum()
+    por_exibicao = por_exibicao.sort_values(ascending=False, kind='stable').head(limite)
+    return [{"fornecedor": f, "total": _valor(t)} for f, t in por_exibicao.items()]
+
+
+def _totais(df, ano, mes):
+    total = _valor(df['total'].sum()) if not df.empty else 0.0
+    if mes:
+        return {
+            "mes": int(mes),
+            "ano": ano,
+            "total_mes": total,
+            "dias_com_dados": sorted(int(d) for d in df['dia'].unique()),
+        }
+    return {
+        "ano": ano,
+        "total_ano": total,
+        "meses_com_dados": sorted(int(m) for m in df['mes'].unique()),
+    }
+
+
+def _valor(total):
+    # Somas em float: arredondar nos centavos devolve o mesmo valor da soma exata do banco
+    return round(float(total), 2)
@@ -0,0 +1,231 @@
+# backend/custos/parquet.py
+"""
+Arquivos Parquet das transações, um por ano (pyarrow, no requirements.txt).
+
+PARQUET_DIR/transacoes_<ano>_v<geração>.parquet, ordenado por data, com colunas
+tipadas (date32, decimal) e os textos repetidos em dicionário. Servem para:
+    - análises avulsas e backfills (pandas.read_parquet, DuckDB...) sem varrer o banco;
+    - o caminho opcional das views de resumo (settings.RESUMOS_PARQUET=True):
+      o período pedido é lido com o filtro de data empurrado para o Parquet
+      (só os row groups do intervalo) e calculado pelas mesmas consultas do
+      motor colunar (colunar.Colunas).
+
+Cada ano tem um contador de geração no banco (VersaoDados, chave 'ano:<ano>')
+incrementado por atualizar_agregados() para os anos das datas alteradas: todo
+caminho que muda transações já passa por lá. Depois do commit o arquivo do ano
+é regravado com a nova geração no nome. Um ano só é lido do Parquet se o arquivo
+for da geração atual, então anos históricos (que não mudam) nunca voltam ao banco
+e o ano alterado volta para o SQL só até o arquivo novo ficar pronto.
+
+A primeira carga é "python manage.py gravar_parquet", que também grava o
+marcador COMPLETO: sem ele (anos antigos ainda sem arquivo) o leitor não é usado.
+"""
+import os
+import re
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from .cache import incrementar_versao, obter_versao
+from .colunar import Colunas
+from .mapas import obter_mapa, registrar_mapa
+from .models import ResponsavelCusto, Transacao, VersaoDados
+from .periodos import filtro_periodo
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # instalação sem o requirements.txt (RESUMOS_PARQUET=True é recusado nos settings)
+    pa = None
+
+PREFIXO_VERSAO = 'ano:'
+ARQUIVO = re.compile(r'^transacoes_(\d{4})_v(\d+)\.parquet$')
+MARCADOR_COMPLETO = 'COMPLETO'
+CAMPOS = ('id', 'data', 'responsavel_id', 'fornecedor', 'descricao_conta', 'txt_detalhe', 'valor', 'lote_id')
+# Linhas por row group (o filtro por data pula row groups inteiros pelas estatísticas)
+TAMANHO_LOTE = 50_000
+
+
+def ativo():
+    return pa is not None and getattr(settings, 'RESUMOS_PARQUET', False)
+
+
+def _raiz():
+    return Path(settings.PARQUET_DIR)
+
+
+def chave_ano(ano):
+    return f'{PREFIXO_VERSAO}{ano}'
+
+
+def esquema():
+    texto = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('id', pa.int64()),
+        ('data', pa.date32()),
+        ('responsavel_id', pa.int64()),
+        ('fornecedor', texto),
+        ('descricao_conta', texto),
+        ('txt_detalhe', pa.string()),
+        ('valor', pa.decimal128(15, 2)),
+        ('lote_id', pa.int64()),
+    ])
+
+
+def _construir_mapa_responsaveis_por_id():
+    """{id: nome} dos responsáveis (os arquivos guardam só o id, que não muda)."""
+    return dict(ResponsavelCusto.objects.values_list('id', 'nome'))
+
+
+registrar_mapa('responsaveis_por_id', _construir_mapa_responsaveis_por_id, [ResponsavelCusto],
+               chave_versao='responsaveis')
+
+
+# --- Gravação ---
+def arquivos():
+    """{ano: (geração, caminho)} com o arquivo mais novo de cada ano."""
+    encontrados = {}
+    if not _raiz().is_dir():
+        return encontrados
+    for caminho in _raiz().iterdir():
+        casou = ARQUIVO.match(caminho.name)
+        if casou:
+            ano, geracao = int(casou[1]), int(casou[2])
+            if geracao >= encontrados.get(ano, (-1, None))[0]:
+                encontrados[ano] = (geracao, caminho)
+    return encontrados
+
+
+def gravar_ano(ano):
+    """Regrava o arquivo do ano na geração atual. Retorna (caminho, linhas)."""
+    raiz = _raiz()
+    raiz.mkdir(parents=True, exist_ok=True)
+
+    # A geração é lida ANTES das linhas: no pior caso o arquivo tem dados mais
+    # novos que a geração do nome, e o leitor não o usa até o próximo.
+    geracao = obter_versao(chave_ano(ano))
+    destino = raiz / f'transacoes_{ano}_v{geracao}.parquet'
+    temporario = raiz / f'.{destino.name}.{uuid.uuid4().hex[:8]}'
+
+    linhas = Transacao.objects.filter(**filtro_periodo(ano)).order_by('data', 'id').values_list(
+        *CAMPOS
+    ).iterator(chunk_size=TAMANHO_LOTE)
+    total = 0
+    with pq.ParquetWriter(temporario, esquema(), compression='zstd') as escritor:
+        while lote := list(islice(linhas, TAMANHO_LOTE)):
+            escritor.write_table(pa.Table.from_pydict(dict(zip(CAMPOS, zip(*lote))), schema=esquema()))
+            total += len(lote)
+    os.replace(temporario, destino)
+
+    # Só apaga gerações anteriores: uma gravação concorrente mais nova fica
+    for caminho in raiz.iterdir():
+        casou = ARQUIVO.match(caminho.name)
+        if casou and int(casou[1]) == ano and int(casou[2]) < geracao:
+            caminho.unlink(missing_ok=True)
+    return destino, total
+
+
+def gravar_todos():
+    """Primeira carga: um arquivo por ano com transações e o marcador COMPLETO."""
+    anos = [d.year for d in Transacao.objects.dates('data', 'year')]
+    # Todo ano com dados precisa de contador: ano sem contador = ano sem transações
+    for ano in anos:
+        VersaoDados.objects.get_or_create(chave=chave_ano(ano))
+    gravados = {ano: gravar_ano(ano) for ano in anos}
+    (_raiz() / MARCADOR_COMPLETO).touch()
+    return gravados
+
+
+def registrar_alteracao(datas):
+    """
+    Chamado por atualizar_agregados() na transação que alterou essas datas:
+    incrementa a geração dos anos delas e, depois do commit, regrava os arquivos.
+    Os contadores sobem mesmo com o Parquet desligado neste processo, para um
+    worker que o tenha ligado nunca ler arquivo velho.
+    """
+    anos = sorted({data.year for data in datas})
+    for ano in anos:
+        incrementar_versao(chave_ano(ano))
+    if ativo():
+        transaction.on_commit(lambda: [gravar_ano(ano) for ano in anos], robust=True)
+
+
+# --- Leitura ---
+def obter_colunas(inicio=None, fim=None):
+    """
+    Transações de [inicio, fim) lidas dos arquivos, como colunar.Colunas,
+    ou None se algum ano do período não tiver arquivo da geração atual.
+    """
+    if not ativo() or not (_raiz() / MARCADOR_COMPLETO).exists():
+        return None
+
+    versoes = VersaoDados.objects.filter(chave__startswith=PREFIXO_VERSAO)
+    if inicio and fim:
+        anos = range(inicio.year, (fim - timedelta(days=1)).year + 1)
+        versoes = versoes.filter(chave__in=[chave_ano(ano) for ano in anos])
+
+    disponiveis = arquivos()
+    caminhos = []
+    for chave, versao in sorted(versoes.values_list('chave', 'versao')):
+        ano = int(chave.removeprefix(PREFIXO_VERSAO))
+        geracao, caminho = disponiveis.get(ano, (None, None))
+        if geracao != versao:
+            return None
+        caminhos.append(str(caminho))
+
+    filtro = None
+    if inicio:
+        filtro = ds.field('data') >= inicio
+    if fim:
+        filtro = ds.field('data') < fim if filtro is None else filtro & (ds.field('data') < fim)
+    try:
+        tabela = ds.dataset(caminhos, schema=esquema(), format='parquet').to_table(
+            columns=['data', 'responsavel_id', 'fornecedor', 'descricao_conta', 'valor'], filter=filtro
+        )
+    except (OSError, pa.ArrowInvalid):
+        return None  # arquivo trocado no meio da leitura: fica no SQL desta vez
+    return _para_colunas(tabela)
+
+
+def _para_colunas(tabela):
+    # Transações de responsáveis já apagados (o CASCADE não passa pelo Parquet)
+    nomes = obter_mapa('responsaveis_por_id')
+    tabela = tabela.filter(pc.is_in(tabela['responsavel_id'], pa.array(list(nomes), pa.int64())))
+    tabela = tabela.sort_by('data').unify_dictionaries().combine_chunks()
+
+    ids, responsaveis = np.unique(tabela['responsavel_id'].to_numpy(), return_inverse=True)
+    fornecedores, dicionario_fornecedor = _codigos(tabela['fornecedor'])
+    contas, dicionario_conta = _codigos(tabela['descricao_conta'])
+    datas = tabela['data']
+
+    colunas = {
+        'data': datas.cast(pa.int32()).to_numpy(),
+        'mes': pc.month(datas).to_numpy(),
+        'dia': pc.day(datas).to_numpy(),
+        'responsavel': responsaveis.astype(np.int32),
+        'fornecedor': fornecedores,
+        'conta': contas,
+        'centavos': pc.multiply(tabela['valor'], pa.scalar(Decimal(100), pa.decimal128(3, 0))).cast(pa.int64()).to_numpy(),
+        'quantidade': np.ones(len(tabela), dtype=np.int64),
+    }
+    return Colunas(colunas, {
+        'responsavel': [nomes[int(id_)] for id_ in ids],
+        'fornecedor': dicionario_fornecedor,
+        'conta': dicionario_conta,
+    })
+
+
+def _codigos(coluna):
+    """(códigos, dicionário) de uma coluna dictionary; nulo vira o último código (None)."""
+    pedaco = coluna.chunk(0) if coluna.num_chunks else pa.array([], coluna.type)
+    dicionario = pedaco.dictionary.to_pylist() + [None]
+    codigos = pc.fill_null(pedaco.indices, len(dicionario) - 1)
+    return codigos.to_numpy().astype(np.int32), dicionario
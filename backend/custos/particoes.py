@@ -0,0 +1,86 @@
+# backend/custos/particoes.py
+"""
+Partições anuais da tabela de transações (só PostgreSQL).
+
+A migração 0011 transforma custos_transacao numa tabela particionada por
+intervalo de data (PARTITION BY RANGE (data)): uma partição por ano
+(custos_transacao_<ano>) e a partição padrão (custos_transacao_padrao) para
+datas de anos ainda sem partição. Como as consultas filtram por intervalo de
+datas (custos/periodos.py) ou por lista de datas (upload, rollup), o planner
+só lê as partições desses anos (partition pruning).
+
+O upload cria a partição do ano antes de inserir (garantir_particoes). Linhas
+que tenham caído na partição padrão (edição pela API/admin num ano novo) são
+movidas para a partição nova quando ela é criada.
+
+No SQLite (desenvolvimento) a tabela continua comum e nada daqui roda.
+Para ver o pruning por endpoint: python manage.py benchmark_api.
+"""
+import re
+
+from django.db import connection
+
+from .models import Transacao
+
+TABELA = Transacao._meta.db_table
+PADRAO = f'{TABELA}_padrao'
+PARTICAO = re.compile(rf'^{TABELA}_(\d{{4}})$')
+
+
+def nome_particao(ano):
+    return f'{TABELA}_{ano}'
+
+
+def particoes():
+    """{ano: nome} das partições anuais, ou None se a tabela não for particionada."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname FROM pg_class p
+            LEFT JOIN pg_inherits i ON i.inhparent = p.oid
+            LEFT JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE p.oid = to_regclass(%s) AND p.relkind = 'p'
+            """,
+            [TABELA]
+        )
+        linhas = cursor.fetchall()
+    if not linhas:
+        return None
+    return {int(casou[1]): nome for nome, in linhas if nome and (casou := PARTICAO.match(nome))}
+
+
+def criar_particao(ano):
+    """
+    Cria a partição do ano trazendo as linhas desse ano que estiverem na padrão
+    (com linhas no intervalo, o Postgres recusa um PARTITION OF direto).
+    """
+    tabela, particao, padrao = (connection.ops.quote_name(nome) for nome in (TABELA, nome_particao(ano), PADRAO))
+    limites = [f'{ano}-01-01', f'{ano + 1}-01-01']
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {particao} (LIKE {tabela} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH movidas AS (DELETE FROM {padrao} WHERE data >= %s AND data < %s RETURNING *) '
+            f'INSERT INTO {particao} SELECT * FROM movidas',
+            limites
+        )
+        cursor.execute(f'ALTER TABLE {tabela} ATTACH PARTITION {particao} FOR VALUES FROM (%s) TO (%s)', limites)
+
+
+def garantir_particoes(anos):
+    """
+    Cria as partições que faltarem para esses anos (deve rodar dentro da transação
+    que vai inserir as linhas). Retorna os anos criados.
+    """
+    existentes = particoes()
+    if existentes is None or not set(anos) - set(existentes):
+        return []
+
+    # Dois uploads do mesmo ano novo ao mesmo tempo: o segundo espera e relê
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [TABELA])
+    faltando = sorted(set(anos) - set(particoes()))
+    for ano in faltando:
+        criar_particao(ano)
+    return faltando
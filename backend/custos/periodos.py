@@ -0,0 +1,34 @@
+# backend/custos/periodos.py
+"""
+Conversão de períodos (ano / mês) em intervalos de datas.
+
+Filtrar com data__year / data__month vira EXTRACT() no Postgres, que não usa
+índice. Com um intervalo [inicio, fim) o banco consegue usar os índices
+compostos que começam por data (ou por responsavel/fornecedor + data).
+"""
+from datetime import date
+
+
+def intervalo_periodo(ano, mes=None):
+    """
+    Retorna (inicio, fim) do período, com fim EXCLUSIVO.
+    intervalo_periodo(2025)    -> (2025-01-01, 2026-01-01)
+    intervalo_periodo(2025, 2) -> (2025-02-01, 2025-03-01)
+    """
+    ano = int(ano)
+    if not mes:
+        return date(ano, 1, 1), date(ano + 1, 1, 1)
+
+    mes = int(mes)
+    inicio = date(ano, mes, 1)
+    fim = date(ano + 1, 1, 1) if mes == 12 else date(ano, mes + 1, 1)
+    return inicio, fim
+
+
+def filtro_periodo(ano, mes=None, campo='data'):
+    """
+    Kwargs prontos para queryset.filter(), ex:
+    Transacao.objects.filter(**filtro_periodo(2025, 1))
+    """
+    inicio, fim = intervalo_periodo(ano, mes)
+    return {f'{campo}__gte': inicio, f'{campo}__lt': fim}
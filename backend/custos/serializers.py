@@ -1,5 +1,6 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import ResponsavelCusto, Transacao, FornecedorConfig
+from .models import ResponsavelCusto, Transacao, FornecedorConfig, JobImportacao, LoteImportacao
 
 class ResponsavelSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,13 +10,62 @@ class ResponsavelSerializer(serializers.ModelSerializer):
 class TransacaoSerializer(serializers.ModelSerializer):
     # Traz o nome do responsável em vez de apenas o ID (útil pro frontend)
     responsavel_nome = serializers.CharField(source='responsavel.nome', read_only=True)
+    # Nome do arquivo vem do lote de importação (nulo nas linhas criadas pela API)
+    arquivo_origem = serializers.CharField(source='lote.arquivo_nome', read_only=True, allow_null=True)
 
     class Meta:
         model = Transacao
-        fields = '__all__'
+        # hash_conteudo é interno do upload incremental (e um int64 perde precisão no JS);
+        # as chaves das dimensões são derivadas dos textos no save() (custos/dimensoes.py)
+        exclude = ['hash_conteudo', 'fornecedor_ref', 'conta_ref']
+        read_only_fields = ['lote']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Campos pedidos via ?fields= (ver TransacaoViewSet); None = todos
+        campos = self.context.get('campos')
+        if campos is not None:
+            for nome in set(self.fields) - set(campos):
+                self.fields.pop(nome)
 
 
 class FornecedorConfigSerializer(serializers.ModelSerializer):
     class Meta:
         model = FornecedorConfig
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class JobImportacaoSerializer(serializers.ModelSerializer):
+    # Tempo decorrido e vazão (linhas/s), calculados até agora se o job ainda roda
+    duracao_segundos = serializers.SerializerMethodField()
+    linhas_por_segundo = serializers.SerializerMethodField()
+
+    class Meta:
+        model = JobImportacao
+        exclude = ['caminho']
+
+    def get_duracao_segundos(self, obj):
+        if not obj.iniciado_em:
+            return None
+        fim = obj.finalizado_em or timezone.now()
+        return round((fim - obj.iniciado_em).total_seconds(), 3)
+
+    def get_linhas_por_segundo(self, obj):
+        duracao = self.get_duracao_segundos(obj)
+        if not duracao:
+            return None
+        return round(obj.linhas_processadas / duracao, 1)
+
+
+class LoteImportacaoSerializer(serializers.ModelSerializer):
+    usuario_nome = serializers.CharField(source='usuario.username', read_only=True, allow_null=True)
+    duracao_segundos = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LoteImportacao
+        fields = '__all__'
+
+    def get_duracao_segundos(self, obj):
+        if not obj.finalizado_em:
+            return None
+        return round((obj.finalizado_em - obj.iniciado_em).total_seconds(), 3)
@@ -0,0 +1,87 @@
+# backend/custos/sinteticos.py
+"""
+Planilhas sintéticas no layout do upload
+(MA, TRANSDATE, AMOUNTMST, Descrição Conta, Fornecedor, TXT), para medir desempenho.
+
+As cardinalidades padrão imitam as da base real: ~40 setores, ~2.500 fornecedores
+e ~120 contas, todos com frequência de cauda longa (poucos concentram a maior parte
+das linhas), ~8% das linhas sem fornecedor e ~3% de estornos (valores negativos).
+
+As linhas saem em blocos gerados com NumPy: 10M de linhas não ficam na memória.
+Mesma semente (e tamanho de bloco), mesmo arquivo.
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+CABECALHO = ['MA', 'TRANSDATE', 'AMOUNTMST', 'Descrição Conta', 'Fornecedor', 'TXT']
+SUFIXOS = {'k': 1_000, 'm': 1_000_000}
+LIMITE_XLSX = 1_048_575  # linhas de dados numa planilha do Excel
+
+
+def interpretar_escala(texto):
+    """'10k' -> 10000, '2.5M' -> 2500000, '5000' -> 5000."""
+    texto = str(texto).strip().lower()
+    multiplicador = SUFIXOS.get(texto[-1:], 1)
+    if texto[-1:] in SUFIXOS:
+        texto = texto[:-1]
+    return int(float(texto) * multiplicador)
+
+
+def _pesos(quantidade, expoente):
+    """Pesos de Zipf (1/k^s) normalizados: o primeiro é o mais frequente."""
+    pesos = 1.0 / np.arange(1, quantidade + 1) ** expoente
+    return pesos / pesos.sum()
+
+
+def gerar_blocos(linhas, inicio=date(2024, 1, 1), dias=730, setores=40, fornecedores=2500,
+                 contas=120, semente=42, tamanho_bloco=100_000):
+    """Gera DataFrames com as colunas de CABECALHO, somando `linhas` no total."""
+    rng = np.random.default_rng(semente)
+
+    nomes_setores = np.array([f'{i}. Setor {i}' for i in range(1, setores + 1)], dtype=object)
+    nomes_fornecedores = np.array([f'Fornecedor {i:05d}' for i in range(1, fornecedores + 1)], dtype=object)
+    nomes_contas = np.array([f'Conta {i:03d}' for i in range(1, contas + 1)], dtype=object)
+    pesos_setores = _pesos(setores, 0.8)
+    pesos_fornecedores = _pesos(fornecedores, 1.1)
+    pesos_contas = _pesos(contas, 1.0)
+    primeiro_dia = np.datetime64(inicio, 'D')
+
+    gerados = 0
+    while gerados < linhas:
+        n = min(tamanho_bloco, linhas - gerados)
+
+        valores = np.round(rng.lognormal(mean=5.5, sigma=1.4, size=n), 2)
+        valores[rng.random(n) < 0.03] *= -1
+
+        fornecedor = rng.choice(nomes_fornecedores, size=n, p=pesos_fornecedores)
+        fornecedor[rng.random(n) < 0.08] = ''
+
+        yield pd.DataFrame({
+            'MA': rng.choice(nomes_setores, size=n, p=pesos_setores),
+            'TRANSDATE': pd.to_datetime(primeiro_dia + rng.integers(0, dias, size=n)).strftime('%Y-%m-%d'),
+            'AMOUNTMST': valores,
+            'Descrição Conta': rng.choice(nomes_contas, size=n, p=pesos_contas),
+            'Fornecedor': fornecedor,
+            'TXT': pd.Series(np.arange(gerados, gerados + n)).map('NF {:08d}'.format),
+        }, columns=CABECALHO)
+        gerados += n
+
+
+def escrever_planilha(caminho, linhas, **opcoes):
+    """Grava a planilha sintética em .csv (qualquer tamanho) ou .xlsx. Retorna o caminho."""
+    caminho = str(caminho)
+    blocos = gerar_blocos(linhas, **opcoes)
+
+    if caminho.lower().endswith('.xlsx'):
+        if linhas > LIMITE_XLSX:
+            raise ValueError(f'O Excel aceita no máximo {LIMITE_XLSX} linhas; use .csv.')
+        pd.concat(blocos, ignore_index=True).to_excel(caminho, index=False, engine='openpyxl')
+        return caminho
+
+    with open(caminho, 'w', encoding='utf-8', newline='') as arquivo:
+        arquivo.write(','.join(CABECALHO) + '\n')
+        for bloco in blocos:
+            bloco.to_csv(arquivo, header=False, index=False)
+    return caminho
@@ -1,3 +1,892 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from . import colunar, parquet
+from .agregados import atualizar_agregados
+from .cache import cache_resumos, incrementar_versao, obter_versao
+from .fornecedores import obter_indice_fornecedores
+from .mapas import limpar_mapas, obter_mapa
+from .metricas import registro as registro_metricas
+from .particoes import PADRAO, nome_particao, particoes
+from .periodos import filtro_periodo, intervalo_periodo
+from .importacao import importar_planilha, ler_blocos
+from .jobs import executar_job
+from .sinteticos import escrever_planilha, interpretar_escala
+from .models import (
+    AgregadoDiario, ContaContabil, Fornecedor, FornecedorConfig, JobImportacao, LoteImportacao, ResponsavelCusto,
+    Transacao
+)
+
+
+class DadosResumosMixin:
+    """7 setores x 15 fornecedores x 3 meses de 2025, com o rollup pronto e dois fornecedores configurados."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='teste', password='teste')
+        setores = [
+            ResponsavelCusto.objects.create(nome=f'{i}. Setor {i}')
+            for i in range(1, 8)
+        ]
+        transacoes = []
+        for f in range(15):
+            for i, setor in enumerate(setores):
+                for mes in (1, 2, 3):
+                    transacoes.append(Transacao(
+                        responsavel=setor,
+                        data=date(2025, mes, 10),
+                        descricao_conta='Serviços',
+                        valor=Decimal(100 * (f + 1) + i),
+                        fornecedor=f'Fornecedor {f}',
+                    ))
+        Transacao.objects.bulk_create(transacoes)
+        atualizar_agregados()
+
+        FornecedorConfig.objects.create(nome_original='Fornecedor 14', exibir=False)
+        FornecedorConfig.objects.create(nome_original='Fornecedor 13', nome_exibicao='Fornecedor Renomeado')
+
+    def setUp(self):
+        cache_resumos.limpar()
+        limpar_mapas()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+
+class ResumoFornecedoresViewTests(DadosResumosMixin, TestCase):
+    """O resumo por fornecedor deve rodar num número fixo de queries."""
+
+    def test_numero_de_queries_constante(self):
+        # versão dos dados, versão e índice dos fornecedores, versão e nomes da dimensão
+        # de fornecedores, ranking, setores, evolução, total, versão e mapa de nomes
+        # de exibição dos setores
+        with self.assertNumQueries(11):
+            resposta = self.client.get('/api/resumo-fornecedores/', {'ano': 2025})
+        self.assertEqual(resposta.status_code, 200)
+
+        # Mapas de exibição já em memória (dentro do TTL): versão dos dados e as agregações
+        cache_resumos.limpar()
+        with self.assertNumQueries(5):
+            self.client.get('/api/resumo-fornecedores/', {'ano': 2025})
+
+    def test_cache_invalidado_por_config(self):
+        self.client.get('/api/resumo-fornecedores/', {'ano': 2025})
+
+        # Segunda chamada: só a consulta da versão dos dados
+        with self.assertNumQueries(1):
+            self.client.get('/api/resumo-fornecedores/', {'ano': 2025})
+        self.assertEqual(cache_resumos.acertos_memoria, 1)
+
+        self.client.post('/api/fornecedor-config-bulk/', {
+            'configs': [{'nome_original': 'Fornecedor 12', 'nome_exibicao': 'Novo Nome', 'exibir': True}]
+        }, format='json')
+
+        dados = self.client.get('/api/resumo-fornecedores/', {'ano': 2025}).json()
+        self.assertIn('Novo Nome', dados['evolucao_mensal'])
+        self.assertEqual(cache_resumos.erros, 2)
+
+    def test_drill_down_de_nome_mesclado(self):
+        FornecedorConfig.objects.filter(nome_original='Fornecedor 13').delete()
+        FornecedorConfig.objects.create(nome_original='Fornecedor 13', nome_exibicao='Fornecedor 12')
+
+        transacoes = self.client.get('/api/transacoes-fornecedor/', {'ano': 2025, 'mes': 1, 'fornecedor': 'Fornecedor 12'}).json()
+        self.assertEqual(len(transacoes), 14)
+
+        # Índice em cache e dentro do TTL: nenhuma query
+        with self.assertNumQueries(0):
+            self.assertEqual(obter_indice_fornecedores().originais('Fornecedor 12'), ['Fornecedor 12', 'Fornecedor 13'])
+
+    def test_conteudo(self):
+        dados = self.client.get('/api/resumo-fornecedores/', {'ano': 2025}).json()
+
+        nomes = [f['fornecedor'] for f in dados['por_fornecedor']]
+        self.assertNotIn('Fornecedor 14', nomes)
+        self.assertEqual(nomes[0], 'Fornecedor Renomeado')
+        self.assertEqual(len(dados['por_setor']), 10)
+        self.assertEqual(len(dados['evolucao_mensal']), 5)
+
+        setores = dados['por_setor']['Fornecedor Renomeado']
+        self.assertEqual([s['setor'] for s in setores], [f'{i}. Setor {i}' for i in (7, 6, 5, 4, 3)])
+        self.assertEqual(setores[0]['total'], 3 * 1406.0)
+        self.assertEqual(dados['evolucao_mensal']['Fornecedor 12'], {'1': 9121.0, '2': 9121.0, '3': 9121.0})
+
+
+class EtagResumosTests(DadosResumosMixin, TestCase):
+    """GET condicional (ETag / 304) nos resumos."""
+
+    def test_etag(self):
+        etag = self.client.get('/api/resumo-fornecedores/', {'ano': 2025})['ETag']
+
+        # Revalidação: 304 só com a consulta da versão, sem usar o cache de respostas
+        cache_resumos.limpar()
+        with self.assertNumQueries(1):
+            resposta = self.client.get('/api/resumo-fornecedores/', {'ano': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+        self.assertEqual(resposta['ETag'], etag)
+
+        # Outros parâmetros ou dados alterados: ETag diferente
+        self.assertNotEqual(self.client.get('/api/resumo-fornecedores/', {'ano': 2024})['ETag'], etag)
+        self.client.patch(f'/api/fornecedor-config/{FornecedorConfig.objects.first().id}/', {'exibir': True}, format='json')
+        resposta = self.client.get('/api/resumo-fornecedores/', {'ano': 2025}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+
+class PainelViewTests(DadosResumosMixin, TestCase):
+    """Painel: vários widgets de um GROUP BY só, iguais aos endpoints separados."""
+
+    def test_painel_igual_aos_endpoints_separados(self):
+        with self.assertNumQueries(3):  # versão dos dados, o GROUP BY e as metas
+            painel = self.client.get('/api/painel/', {'ano': 2025, 'widgets': 'metas,por_mes,por_setor_mes,totais'}).json()
+        mensal = self.client.get('/api/resumo-mensal/', {'ano': 2025}).json()
+        self.assertEqual(painel['por_mes'], mensal['por_mes'])
+        self.assertEqual(painel['totais'], mensal['totais'])
+        self.assertEqual(len(painel['metas']), 7)
+
+        painel = self.client.get('/api/painel/', {'ano': 2025, 'mes': 2, 'widgets': 'por_dia,por_setor,totais,top_fornecedores', 'limite': 3}).json()
+        diario = self.client.get('/api/resumo-diario/', {'ano': 2025, 'mes': 2}).json()
+        self.assertEqual(painel['por_dia'], diario['por_dia'])
+        self.assertEqual(painel['por_setor'][:3], diario['por_setor'][:3])
+        self.assertEqual(painel['totais'], diario['totais'])
+        self.assertEqual([f['fornecedor'] for f in painel['top_fornecedores']], ['Fornecedor Renomeado', 'Fornecedor 12', 'Fornecedor 11'])
+
+    def test_limite_invalido(self):
+        for limite in (0, -1):
+            resposta = self.client.get('/api/painel/', {'ano': 2025, 'widgets': 'top_fornecedores', 'limite': limite})
+            self.assertEqual(resposta.status_code, 400)
+
+
+class OrcamentoViewTests(DadosResumosMixin, TestCase):
+    """Orçado x realizado por setor e mês."""
+
+    def test_orcamento_por_setor_e_mes(self):
+        ResponsavelCusto.objects.filter(nome='2. Setor 2').update(orcamento_mensal=Decimal('12000'))
+        with self.assertNumQueries(2):  # versão dos dados e o GROUP BY com a meta
+            orcamento = self.client.get('/api/orcamento/', {'ano': 2025, 'ate_mes': 4}).json()
+
+        setor = next(s for s in orcamento['por_setor'] if s['setor_original'] == '2. Setor 2')
+        self.assertEqual((setor['orcado'], setor['realizado'], setor['variacao']), (48000.0, 36045.0, -11955.0))
+        self.assertEqual(
+            [(m['variacao'], m['realizado_acumulado'], m['consumo_percentual']) for m in setor['meses']],
+            [(15.0, 12015.0, 8.3), (15.0, 24030.0, 16.7), (15.0, 36045.0, 25.0), (-12000.0, 36045.0, 25.0)]
+        )
+        self.assertEqual(len(orcamento['por_setor']), 7)
+        self.assertIsNone(orcamento['por_setor'][0]['consumo_percentual'])  # sem meta
+        self.assertEqual(orcamento['totais']['realizado'], self.client.get('/api/resumo-mensal/', {'ano': 2025}).json()['totais']['total_ano'])
+        self.assertEqual(orcamento['por_mes'][3]['realizado_acumulado'], orcamento['totais']['realizado'])
+        for ate_mes in (0, 13):
+            self.assertEqual(self.client.get('/api/orcamento/', {'ate_mes': ate_mes}).status_code, 400)
+
+
+class PeriodosTests(SimpleTestCase):
+    """Intervalos [inicio, fim) usados nos filtros de data."""
+
+    def test_intervalos(self):
+        self.assertEqual(intervalo_periodo(2025), (date(2025, 1, 1), date(2026, 1, 1)))
+        self.assertEqual(intervalo_periodo('2025', '2'), (date(2025, 2, 1), date(2025, 3, 1)))
+        # Dezembro termina no 1º de janeiro do ano seguinte
+        self.assertEqual(intervalo_periodo(2025, 12), (date(2025, 12, 1), date(2026, 1, 1)))
+        self.assertEqual(filtro_periodo(2024, 12), {'data__gte': date(2024, 12, 1), 'data__lt': date(2025, 1, 1)})
+
+
+class AgregadoDiarioTests(TestCase):
+    """O rollup diário acompanha as edições feitas pela API em /api/transacoes/."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='teste', password='teste'))
+        self.setor = ResponsavelCusto.objects.create(nome='1. Setor')
+        Transacao.objects.create(
+            responsavel=self.setor, data=date(2025, 1, 2), descricao_conta='Serviços', valor=Decimal('7'), fornecedor='ACME'
+        )
+        atualizar_agregados()
+
+    def _rollup(self):
+        return sorted(AgregadoDiario.objects.values_list('data', 'fornecedor_ref__nome', 'conta_ref__nome', 'valor', 'quantidade'))
+
+    def test_criar_alterar_e_apagar(self):
+        resposta = self.client.post('/api/transacoes/', {
+            'responsavel': self.setor.id, 'data': '2025-01-02', 'descricao_conta': 'Serviços',
+            'valor': '10.00', 'fornecedor': 'ACME',
+        }, format='json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(self._rollup(), [(date(2025, 1, 2), 'ACME', 'Serviços', Decimal('17'), 2)])
+
+        # Mudar data e fornecedor refaz as duas datas
+        id_ = resposta.json()['id']
+        self.client.patch(f'/api/transacoes/{id_}/', {'data': '2025-01-05', 'fornecedor': 'Outro', 'valor': '15.00'}, format='json')
+        self.assertEqual(self._rollup(), [
+            (date(2025, 1, 2), 'ACME', 'Serviços', Decimal('7'), 1),
+            (date(2025, 1, 5), 'Outro', 'Serviços', Decimal('15'), 1),
+        ])
+
+        self.assertEqual(self.client.delete(f'/api/transacoes/{id_}/').status_code, 204)
+        self.assertEqual(self._rollup(), [(date(2025, 1, 2), 'ACME', 'Serviços', Decimal('7'), 1)])
+
+
+@override_settings(IMPORTACAO_EXECUTOR='comando')
+class ImportacaoAssincronaTests(TestCase):
+    """Upload com ?assincrono=1 responde 202 e o job é consultável em /api/importacoes/."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='teste', password='teste'))
+
+    def test_job_concluido(self):
+        with self.settings(IMPORTACAO_DIRETORIO=self._diretorio()):
+            csv = 'MA,AMOUNTMST,TRANSDATE,Descrição Conta,Fornecedor\n1. Setor,10.5,2025-01-02,Serviços,ACME\n1. Setor,4.5,2025-01-03,Serviços,\n'
+            arquivo = SimpleUploadedFile('custos.csv', csv.encode('utf-8'))
+            resposta = self.client.post('/api/upload/?assincrono=1', {'file': arquivo}, format='multipart')
+            self.assertEqual(resposta.status_code, 202)
+            job_id = resposta.json()['job_id']
+            self.assertEqual(self.client.get(f'/api/importacoes/{job_id}/').json()['status'], JobImportacao.PENDENTE)
+
+            self.assertTrue(executar_job(job_id))
+            self.assertFalse(executar_job(job_id))
+
+        dados = self.client.get(f'/api/importacoes/{job_id}/').json()
+        self.assertEqual(dados['status'], JobImportacao.CONCLUIDO)
+        self.assertEqual(dados['linhas_processadas'], 2)
+        self.assertEqual(dados['datas_substituidas'], 2)
+        self.assertEqual(Transacao.objects.count(), 2)
+
+    def test_job_com_erro(self):
+        with self.settings(IMPORTACAO_DIRETORIO=self._diretorio()):
+            arquivo = SimpleUploadedFile('custos.csv', b'MA,AMOUNTMST\n1. Setor,10\n')
+            job_id = self.client.post('/api/upload/?assincrono=1', {'file': arquivo}, format='multipart').json()['job_id']
+            executar_job(job_id)
+
+        job = JobImportacao.objects.get(pk=job_id)
+        self.assertEqual(job.status, JobImportacao.ERRO)
+        self.assertIn('TRANSDATE', job.erro)
+
+    def test_job_travado_volta_para_a_fila(self):
+        with self.settings(IMPORTACAO_DIRETORIO=self._diretorio()):
+            csv = 'MA,AMOUNTMST,TRANSDATE,Descrição Conta,Fornecedor\n1. Setor,10,2025-01-02,Serviços,ACME\n'
+            arquivo = SimpleUploadedFile('custos.csv', csv.encode('utf-8'))
+            job_id = self.client.post('/api/upload/?assincrono=1', {'file': arquivo}, format='multipart').json()['job_id']
+            # Executor morreu depois de reivindicar o job
+            JobImportacao.objects.filter(pk=job_id).update(
+                status=JobImportacao.PROCESSANDO, iniciado_em=timezone.now() - timedelta(hours=2)
+            )
+
+            saida = io.StringIO()
+            call_command('processar_importacoes', uma_vez=True, timeout=3600, stdout=saida)
+
+        self.assertIn('reaberto', saida.getvalue())
+        self.assertEqual(JobImportacao.objects.get(pk=job_id).status, JobImportacao.CONCLUIDO)
+        self.assertEqual(Transacao.objects.count(), 1)
+
+    def test_falha_ao_criar_job_apaga_arquivo(self):
+        diretorio = self._diretorio()
+        with self.settings(IMPORTACAO_DIRETORIO=diretorio), \
+                mock.patch.object(JobImportacao.objects, 'create', side_effect=RuntimeError('banco fora')):
+            arquivo = SimpleUploadedFile('custos.csv', b'MA,AMOUNTMST,TRANSDATE\n1. Setor,10,2025-01-02\n')
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/upload/?assincrono=1', {'file': arquivo}, format='multipart')
+
+        self.assertEqual(os.listdir(diretorio), [])
+
+    def _diretorio(self):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, ignore_errors=True)
+        return diretorio
+
+
+class ImportacaoIncrementalTests(TestCase):
+    """Reenviar um arquivo grava só a diferença, pelo hash de conteúdo."""
+
+    CABECALHO = 'MA,AMOUNTMST,TRANSDATE,Descrição Conta,TXT,Fornecedor\n'
+
+    def _importar(self, linhas):
+        return importar_planilha(io.BytesIO((self.CABECALHO + linhas).encode('utf-8')), 'custos.csv')
+
+    def test_reenvio_grava_so_a_diferenca(self):
+        self._importar(
+            '1. Setor,10,2025-01-02,Serviços,a,ACME\n'
+            '1. Setor,10,2025-01-02,Serviços,a,ACME\n'
+            '1. Setor,20,2025-01-02,Serviços,b,\n'
+            '2. Setor,30,2025-01-03,Peças,c,ACME\n'
+        )
+        # Linha antiga sem hash (bulk_create não passa pelo save)
+        setor = ResponsavelCusto.objects.get(nome='2. Setor')
+        Transacao.objects.bulk_create([Transacao(
+            responsavel=setor, data=date(2025, 1, 3), descricao_conta='Peças',
+            valor=Decimal('5')
+        )])
+        ids_antes = set(Transacao.objects.values_list('id', flat=True))
+
+        resultado = self._importar(
+            '1. Setor,10,2025-01-02,Serviços,a,ACME\n'
+            '1. Setor,25,2025-01-02,Serviços,b,\n'
+            '2. Setor,30,2025-01-03,Peças,c,ACME\n'
+            '2. Setor,40,2025-01-04,Peças,d,ACME\n'
+        )
+
+        self.assertEqual(
+            {k: resultado[k] for k in ('inseridas', 'removidas', 'inalteradas', 'datas_alteradas')},
+            {'inseridas': 2, 'removidas': 3, 'inalteradas': 2, 'datas_alteradas': 3}
+        )
+        self.assertEqual(len(ids_antes & set(Transacao.objects.values_list('id', flat=True))), 2)
+        self.assertEqual(
+            sorted(Transacao.objects.values_list('valor', flat=True)),
+            [Decimal('10'), Decimal('25'), Decimal('30'), Decimal('40')]
+        )
+
+        resultado = self._importar('1. Setor,10,2025-01-02,Serviços,a,ACME\n1. Setor,25,2025-01-02,Serviços,b,\n')
+        self.assertEqual((resultado['inseridas'], resultado['removidas']), (0, 0))
+
+
+class LeituraEmBlocosTests(TestCase):
+    """Upload em blocos pequenos: uma data que atravessa blocos é substituída uma vez só."""
+
+    LINHAS = [
+        ('1. Setor', 10, date(2025, 1, 2), 'Serviços', 'a', 'ACME'),
+        ('1. Setor', 20, date(2025, 1, 2), 'Serviços', 'b', 'ACME'),
+        ('1. Setor', 30, date(2025, 1, 2), 'Serviços', 'c', 'ACME'),  # mesma data, 2º bloco
+        ('1. Setor', 40, date(2025, 1, 3), 'Peças'),  # linha curta: sem TXT e Fornecedor
+        ('1. Setor', 50, date(2025, 1, 3), 'Peças', 'e', 'ACME'),
+    ]
+    CABECALHO = ('MA', 'AMOUNTMST', 'TRANSDATE', 'Descrição Conta', 'TXT', 'Fornecedor')
+
+    def _csv(self):
+        linhas = [','.join(self.CABECALHO)] + [','.join(map(str, linha)) for linha in self.LINHAS]
+        return io.BytesIO('\n'.join(linhas).encode('utf-8'))
+
+    def _xlsx(self):
+        workbook = Workbook()
+        for linha in (self.CABECALHO, *self.LINHAS):
+            workbook.active.append(linha)
+        salvo = io.BytesIO()
+        workbook.save(salvo)
+
+        # Sem a tag <dimension> (como em planilhas de outros geradores) o modo
+        # read_only entrega a linha curta com 4 células, e não completada até 6
+        arquivo = io.BytesIO()
+        with zipfile.ZipFile(salvo) as origem, zipfile.ZipFile(arquivo, 'w') as destino:
+            for item in origem.infolist():
+                conteudo = origem.read(item.filename)
+                if item.filename.startswith('xl/worksheets/'):
+                    conteudo = re.sub(rb'<dimension[^>]*/>', b'', conteudo)
+                destino.writestr(item, conteudo)
+        arquivo.seek(0)
+        return arquivo
+
+    def _conferir(self, arquivo, nome_arquivo):
+        self.assertEqual([len(df) for df in ler_blocos(arquivo, nome_arquivo, tamanho_bloco=2)], [2, 2, 1])
+        arquivo.seek(0)
+
+        # Linha antiga da data que atravessa os blocos: sai, e as do 1º bloco ficam
+        setor = ResponsavelCusto.objects.create(nome='1. Setor')
+        Transacao.objects.create(responsavel=setor, data=date(2025, 1, 2), descricao_conta='Antiga', valor=Decimal('99'))
+
+        resultado = importar_planilha(arquivo, nome_arquivo, tamanho_bloco=2)
+        self.assertEqual((resultado['linhas'], resultado['inseridas'], resultado['removidas']), (5, 5, 1))
+        self.assertEqual(
+            sorted(Transacao.objects.values_list('data', 'valor')),
+            [(date(2025, 1, 2), Decimal(v)) for v in ('10', '20', '30')] + [(date(2025, 1, 3), Decimal(v)) for v in ('40', '50')]
+        )
+        self.assertEqual(
+            Transacao.objects.values_list('txt_detalhe', 'fornecedor').get(valor=40), ('', None)
+        )
+
+    def test_csv_em_blocos(self):
+        self._conferir(self._csv(), 'custos.csv')
+
+    def test_xlsx_em_blocos(self):
+        self._conferir(self._xlsx(), 'custos.xlsx')
+
+    def test_txt_numerico_nao_depende_do_bloco(self):
+        # 2º bloco com um TXT vazio: inferido sozinho, viraria float ("789.0")
+        csv = (
+            'MA,AMOUNTMST,TRANSDATE,Descrição Conta,TXT,Fornecedor\n'
+            '1. Setor,1,2025-01-02,Serviços,123,ACME\n'
+            '1. Setor,2,2025-01-02,Serviços,456,ACME\n'
+            '1. Setor,3,2025-01-03,Serviços,789,NA\n'
+            '1. Setor,4,2025-01-03,Serviços,,\n'
+        )
+        importar_planilha(io.BytesIO(csv.encode('utf-8')), 'custos.csv', tamanho_bloco=2)
+        self.assertEqual(
+            list(Transacao.objects.order_by('valor').values_list('txt_detalhe', 'fornecedor')),
+            [('123', 'ACME'), ('456', 'ACME'), ('789', 'NA'), ('', None)]
+        )
+
+        # O mesmo arquivo num bloco só gera os mesmos hashes: nada muda
+        resultado = importar_planilha(io.BytesIO(csv.encode('utf-8')), 'custos.csv')
+        self.assertEqual((resultado['inseridas'], resultado['removidas']), (0, 0))
+
+
+class ComandoImportarCustosTests(TestCase):
+    """importar_custos: vários arquivos numa transação, um lote por arquivo, idênticos pulados."""
+
+    def test_pasta_com_data_em_dois_arquivos(self):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, ignore_errors=True)
+        cabecalho = 'MA,AMOUNTMST,TRANSDATE,Descrição Conta,TXT,Fornecedor\n'
+        with open(f'{diretorio}/a.csv', 'w', encoding='utf-8') as arquivo:
+            arquivo.write(cabecalho + '1. Setor,10,2025-01-02,Serviços,a,ACME\n1. Setor,20,2025-01-03,Serviços,b,\n')
+        with open(f'{diretorio}/b.csv', 'w', encoding='utf-8') as arquivo:
+            arquivo.write(cabecalho + '2. Setor,5,2025-01-02,Peças,c,ACME\n')
+
+        call_command('importar_custos', diretorio, processos=1, stdout=io.StringIO())
+
+        # A data repetida entre os arquivos soma (o segundo não substitui o primeiro)
+        self.assertEqual(Transacao.objects.count(), 3)
+        self.assertEqual(
+            dict(Transacao.objects.values_list('lote__arquivo_nome').annotate(n=Count('id'))), {'a.csv': 2, 'b.csv': 1}
+        )
+        totais = dict(AgregadoDiario.objects.values_list('data').annotate(total=Sum('valor')))
+        self.assertEqual(totais, {date(2025, 1, 2): Decimal('15'), date(2025, 1, 3): Decimal('20')})
+
+        saida = io.StringIO()
+        call_command('importar_custos', diretorio, processos=1, stdout=saida)
+        self.assertIn('Nada a importar', saida.getvalue())
+        self.assertEqual((Transacao.objects.count(), LoteImportacao.objects.count()), (3, 2))
+
+
+class LotesImportacaoTests(TestCase):
+    """Cada upload vira um lote: reenvio idêntico é pulado e o lote pode ser desfeito."""
+
+    CSV = (
+        'MA,AMOUNTMST,TRANSDATE,Descrição Conta,TXT,Fornecedor\n'
+        '1. Setor,10,2025-01-02,Serviços,a,ACME\n'
+        '1. Setor,20,2025-01-03,Serviços,b,\n'
+    )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='teste', password='teste'))
+
+    def _upload(self, conteudo, url='/api/upload/'):
+        arquivo = SimpleUploadedFile('custos.csv', conteudo.encode('utf-8'))
+        return self.client.post(url, {'file': arquivo}, format='multipart')
+
+    def test_reenvio_identico_e_desfazer(self):
+        resposta = self._upload(self.CSV)
+        self.assertEqual(resposta.status_code, 201)
+        lote = LoteImportacao.objects.get(pk=resposta.json()['lote'])
+        self.assertEqual((lote.linhas, lote.inseridas, lote.usuario.username), (2, 2, 'teste'))
+        self.assertEqual(Transacao.objects.filter(lote=lote).count(), 2)
+        self.assertEqual(
+            self.client.get('/api/transacoes/?fields=valor,arquivo_origem').json()[0]['arquivo_origem'], 'custos.csv'
+        )
+
+        # Mesmo arquivo: pulado pelo checksum, sem lote novo
+        resposta = self._upload(self.CSV)
+        self.assertEqual((resposta.status_code, resposta.json()['lote']), (200, lote.id))
+        self.assertTrue(resposta.json()['duplicado'])
+        self.assertEqual(LoteImportacao.objects.count(), 1)
+
+        # Outro arquivo com uma linha a mais nas mesmas datas: só ela é inserida,
+        # mas as inalteradas passam para o lote novo
+        segundo = self._upload(self.CSV + '1. Setor,5,2025-01-03,Peças,c,ACME\n').json()['lote']
+        self.assertEqual(LoteImportacao.objects.get(pk=segundo).inseridas, 1)
+        self.assertEqual(Transacao.objects.filter(lote=segundo).count(), 3)
+        self.assertEqual([l['id'] for l in self.client.get('/api/lotes/').json()], [segundo, lote.id])
+
+        # O primeiro não tem mais linhas vigentes; o segundo leva as três
+        resposta = self.client.post(f'/api/lotes/{lote.id}/desfazer/')
+        self.assertEqual((resposta.status_code, resposta.json()['apagadas']), (200, 0))
+        resposta = self.client.post(f'/api/lotes/{segundo}/desfazer/')
+        self.assertEqual((resposta.status_code, resposta.json()['apagadas']), (200, 3))
+        self.assertFalse(AgregadoDiario.objects.exists())
+        self.assertEqual(self.client.post(f'/api/lotes/{lote.id}/desfazer/').status_code, 400)
+
+        # Lote desfeito não conta como reenvio idêntico
+        self.assertEqual(self._upload(self.CSV).status_code, 201)
+
+    def test_reenvio_de_lote_substituido(self):
+        primeiro = self._upload(self.CSV).json()['lote']
+        corrigido = self.CSV.replace('1. Setor,20,', '1. Setor,99,')
+        self.assertEqual(self._upload(corrigido).status_code, 201)
+        self.assertIsNotNone(LoteImportacao.objects.get(pk=primeiro).substituido_em)
+
+        # O primeiro arquivo não é mais o retrato das datas dele: reenviar importa de novo
+        resposta = self._upload(self.CSV)
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(sorted(Transacao.objects.values_list('valor', flat=True)), [Decimal('10'), Decimal('20')])
+        # ...e o reenvio do corrigido também
+        self.assertEqual(self._upload(corrigido).status_code, 201)
+
+    def test_desfazer_lote_anterior_preserva_o_posterior(self):
+        primeiro = self._upload(self.CSV).json()['lote']
+        self._upload(self.CSV.replace('1. Setor,20,', '1. Setor,99,'))
+
+        # As linhas que o corrigido confirmou (10) ou trocou (99) não são do primeiro
+        self.assertEqual(self.client.post(f'/api/lotes/{primeiro}/desfazer/').json()['apagadas'], 0)
+        self.assertEqual(sorted(Transacao.objects.values_list('valor', flat=True)), [Decimal('10'), Decimal('99')])
+        self.assertEqual(
+            sorted(AgregadoDiario.objects.values_list('valor', flat=True)), [Decimal('10'), Decimal('99')]
+        )
+
+
+class BuscaTests(TestCase):
+    """Busca por prefixo de palavras em conta, TXT e fornecedor, com os filtros de /api/transacoes/."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='teste', password='teste'))
+        setor, outro = ResponsavelCusto.objects.create(nome='1. Setor'), ResponsavelCusto.objects.create(nome='2. Setor')
+        for responsavel, data, conta, txt, fornecedor in (
+            (setor, date(2025, 1, 2), 'Manutenção de máquinas', 'Troca do cilindro da prensa 3', 'ACME Hidráulica'),
+            (setor, date(2025, 2, 5), 'Manutenção predial', 'Pintura do galpão', None),
+            (outro, date(2025, 1, 9), 'Serviços', 'Revisão da prensa 1', 'Prensas Brasil'),
+            (outro, date(2025, 3, 1), 'Peças', None, 'ACME Hidráulica'),
+        ):
+            Transacao.objects.create(
+                responsavel=responsavel, data=data, descricao_conta=conta, txt_detalhe=txt,
+                valor=Decimal('10'), fornecedor=fornecedor
+            )
+
+    def _txts(self, **params):
+        resposta = self.client.get('/api/busca/', params).json()
+        self.assertEqual(resposta['indexada'], connection.vendor == 'postgresql')
+        return [linha['txt_detalhe'] for linha in resposta['resultados']]
+
+    def test_busca_com_filtros(self):
+        self.assertEqual(self._txts(q='manut prensa'), ['Troca do cilindro da prensa 3'])
+        self.assertCountEqual(self._txts(q='prensa'), ['Troca do cilindro da prensa 3', 'Revisão da prensa 1'])
+        self.assertEqual(self._txts(q='acme', ordem='data'), [None, 'Troca do cilindro da prensa 3'])
+        self.assertEqual(self._txts(q='acme', inicio='2025-01-01', fim='2025-01-31'), ['Troca do cilindro da prensa 3'])
+        self.assertEqual(self._txts(q='prensa', responsavel__nome='2. Setor'), ['Revisão da prensa 1'])
+        self.assertEqual(self.client.get('/api/busca/', {'q': ' %& '}).status_code, 400)
+        # limite fora da faixa é ajustado (1..500), como na paginação de /api/transacoes/
+        self.assertEqual(len(self._txts(q='acme', limite=-5)), 1)
+
+
+class DimensoesTests(TestCase):
+    """Fornecedor e conta viram ids das dimensões na carga, nas edições e no rollup."""
+
+    def test_chaves_resolvidas_e_rollup_por_id(self):
+        importar_planilha(io.BytesIO(
+            'MA,AMOUNTMST,TRANSDATE,Descrição Conta,TXT,Fornecedor\n'
+            '1. Setor,10,2025-01-02,Serviços,a,ACME\n'
+            '1. Setor,20,2025-01-02,Serviços,b,\n'.encode('utf-8')
+        ), 'custos.csv')
+        acme = Fornecedor.objects.get(nome='ACME')
+        servicos = ContaContabil.objects.get(nome='Serviços')
+        self.assertEqual(
+            set(Transacao.objects.values_list('fornecedor_ref', 'conta_ref')),
+            {(acme.id, servicos.id), (None, servicos.id)}
+        )
+
+        # Sem as chaves (bulk_create não passa pelo save): o rollup completa antes de agrupar
+        Transacao.objects.bulk_create([Transacao(
+            responsavel=ResponsavelCusto.objects.get(), data=date(2025, 1, 2), descricao_conta='Peças',
+            valor=Decimal('5'), fornecedor='ACME'
+        )])
+        atualizar_agregados([date(2025, 1, 2)])
+        self.assertEqual(
+            set(AgregadoDiario.objects.values_list('fornecedor_ref__nome', 'conta_ref__nome', 'valor')),
+            {('ACME', 'Serviços', Decimal('10')), (None, 'Serviços', Decimal('20')), ('ACME', 'Peças', Decimal('5'))}
+        )
+
+    def test_save_so_resolve_texto_alterado(self):
+        setor = ResponsavelCusto.objects.create(nome='1. Setor')
+        Transacao.objects.create(responsavel=setor, data=date(2025, 1, 2), descricao_conta='Serviços', valor=Decimal('5'), fornecedor='ACME')
+
+        transacao = Transacao.objects.get()
+        transacao.valor = Decimal('6')
+        with self.assertNumQueries(1):  # só o UPDATE, sem consultar as dimensões
+            transacao.save()
+
+        transacao.fornecedor = 'Beta'
+        transacao.save()
+        self.assertEqual(
+            Transacao.objects.values_list('fornecedor_ref__nome', 'conta_ref__nome').get(), ('Beta', 'Serviços')
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'particionamento só no PostgreSQL')
+class ParticoesTests(TestCase):
+    """O upload cria a partição do ano, trazendo o que estava na partição padrão."""
+
+    def _particoes_das_linhas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM custos_transacao ORDER BY id')
+            return [linha[0] for linha in cursor.fetchall()]
+
+    def test_upload_cria_particao_do_ano(self):
+        self.assertNotIn(2031, particoes())
+        setor = ResponsavelCusto.objects.create(nome='1. Setor')
+        Transacao.objects.create(
+            responsavel=setor, data=date(2031, 5, 1), descricao_conta='Serviços',
+            valor=Decimal('5')
+        )
+        self.assertEqual(self._particoes_das_linhas(), [PADRAO])
+
+        importar_planilha(io.BytesIO(
+            'MA,AMOUNTMST,TRANSDATE,Descrição Conta,TXT,Fornecedor\n'
+            '1. Setor,10,2031-06-02,Serviços,a,ACME\n'.encode('utf-8')
+        ), 'custos.csv')
+
+        self.assertIn(2031, particoes())
+        self.assertEqual(self._particoes_das_linhas(), [nome_particao(2031)] * 2)
+        self.assertEqual(Transacao.objects.filter(data__year=2031).count(), 2)
+
+
+class TransacaoPaginacaoTests(TestCase):
+    """Paginação por cursor (opcional) e ?fields= em /api/transacoes/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='teste', password='teste')
+        setor = ResponsavelCusto.objects.create(nome='1. Setor')
+        Transacao.objects.bulk_create([
+            Transacao(responsavel=setor, data=date(2025, 1, 1 + i % 5), descricao_conta='Serviços',
+                      valor=Decimal(i))
+            for i in range(23)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_sem_parametros_retorna_lista(self):
+        self.assertEqual(len(self.client.get('/api/transacoes/').json()), 23)
+
+    def test_percorre_todas_as_paginas(self):
+        vistos, url, paginas = [], '/api/transacoes/?limite=5&fields=id,data', 0
+        while url:
+            with self.assertNumQueries(1):
+                dados = self.client.get(url).json()
+            vistos += [(t['data'], t['id']) for t in dados['resultados']]
+            url, paginas = dados['proximo'], paginas + 1
+
+        self.assertEqual(paginas, 5)
+        self.assertEqual(len(set(vistos)), 23)
+        self.assertEqual(vistos, sorted(vistos, reverse=True))
+
+    def test_fields(self):
+        dados = self.client.get('/api/transacoes/', {'fields': 'valor,responsavel_nome', 'limite': 1}).json()
+        self.assertEqual(set(dados['resultados'][0]), {'valor', 'responsavel_nome'})
+        self.assertEqual(self.client.get('/api/transacoes/', {'fields': 'senha'}).status_code, 400)
+
+
+class ExportarTransacoesTests(TestCase):
+    """Exportação em streaming com os filtros de /api/transacoes/ e /api/transacoes-fornecedor/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='teste', password='teste')
+        setor = ResponsavelCusto.objects.create(nome='1. Setor')
+        Transacao.objects.bulk_create([
+            Transacao(responsavel=setor, data=date(2025, 1 + i % 2, 10), descricao_conta='Serviços, gerais',
+                      valor=Decimal('10.05') * i, fornecedor='ACME' if i % 3 else None)
+            for i in range(12)
+        ])
+        atualizar_agregados()  # completa as chaves das dimensões (bulk_create não passa pelo save)
+        FornecedorConfig.objects.create(nome_original='ACME', nome_exibicao='Acme Ltda')
+
+    def setUp(self):
+        limpar_mapas()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _baixar(self, params):
+        resposta = self.client.get('/api/exportar-transacoes/', params)
+        self.assertEqual(resposta.status_code, 200)
+        return b''.join(resposta.streaming_content).decode('utf-8-sig')
+
+    def test_csv(self):
+        linhas = list(csv.reader(io.StringIO(self._baixar({'ano': 2025, 'mes': 1}))))
+        self.assertEqual(linhas[0][:2], ['id', 'data'])
+        self.assertEqual(len(linhas), 7)
+        self.assertEqual(linhas[1][3], 'Serviços, gerais')
+
+    def test_ndjson_por_fornecedor_exibido(self):
+        registros = [json.loads(l) for l in self._baixar({'formato': 'ndjson', 'fornecedor': 'Acme Ltda'}).splitlines()]
+        self.assertEqual(len(registros), 8)
+        self.assertEqual({r['fornecedor'] for r in registros}, {'ACME'})
+        self.assertEqual(registros[-1]['valor'], '110.55')
+
+
+class MapasExibicaoTests(TestCase):
+    """Mapas de exibição em memória, invalidados pelos contadores de geração no banco."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user(username='teste', password='teste')
+        cls.setor = ResponsavelCusto.objects.create(nome='1. Setor')
+
+    def setUp(self):
+        limpar_mapas()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    @override_settings(MAPAS_EXIBICAO_TTL=0)
+    def test_sem_ttl_confere_o_contador(self):
+        obter_mapa('responsaveis')
+        with self.assertNumQueries(1):
+            obter_mapa('responsaveis')
+
+    def test_sinal_invalida_no_mesmo_processo(self):
+        self.assertEqual(obter_mapa('responsaveis'), {'1. Setor': '1. Setor'})
+        self.setor.nome_exibicao = 'Fábrica'
+        self.setor.save()
+        self.assertEqual(obter_mapa('responsaveis'), {'1. Setor': 'Fábrica'})
+
+    def test_alteracao_em_outro_worker(self):
+        self.client.get('/api/resumo-mensal/', {'ano': 2025})
+        obter_mapa('responsaveis')
+
+        # Outro processo renomeou: só os contadores mudam, nenhum sinal chega aqui
+        ResponsavelCusto.objects.filter(pk=self.setor.pk).update(nome_exibicao='Fábrica')
+        incrementar_versao('responsaveis')
+        incrementar_versao()
+        self.assertEqual(obter_mapa('responsaveis')['1. Setor'], '1. Setor')  # ainda no TTL
+
+        # A próxima requisição de resumo vê a nova versão dos dados e revalida os mapas
+        cache_resumos.limpar()
+        self.client.get('/api/resumo-mensal/', {'ano': 2025})
+        self.assertEqual(obter_mapa('responsaveis')['1. Setor'], 'Fábrica')
+
+
+class ComparacaoComSqlMixin:
+    """Importa pelo pipeline real e compara os resumos de um caminho alternativo com os do SQL."""
+
+    CABECALHO = ImportacaoIncrementalTests.CABECALHO
+    URLS = [
+        '/api/resumo-mensal/?ano=2025',
+        '/api/resumo-diario/?ano=2025&mes=1',
+        '/api/detalhes-setor/?ano=2025&setor=1. Setor',
+        '/api/resumo-geral/?periodo=ano&ano=2025',
+    ]
+
+    def setUp(self):
+        # Ids das dimensões se repetem entre testes (rollback): mapas do zero
+        limpar_mapas()
+        self.diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.diretorio, ignore_errors=True)
+        usuario = User.objects.create_user(username='teste', password='teste')
+        self.client = APIClient()
+        self.client.force_authenticate(usuario)
+
+    def _importar(self, linhas):
+        with self.captureOnCommitCallbacks(execute=True):
+            importar_planilha(io.BytesIO((self.CABECALHO + linhas).encode('utf-8')), 'custos.csv')
+
+    def _respostas(self, **configuracoes):
+        cache_resumos.limpar()
+        with override_settings(**configuracoes):
+            return [json.loads(self.client.get(url).content) for url in self.URLS]
+
+
+class MotorColunarTests(ComparacaoComSqlMixin, TestCase):
+    """Snapshot NumPy do rollup: mesmas respostas que o SQL e atualização incremental."""
+
+    def test_igual_ao_sql_e_incremental(self):
+        with override_settings(MOTOR_COLUNAR=True, MOTOR_COLUNAR_DIR=self.diretorio):
+            # Sem snapshot ainda: a primeira importação gera um completo
+            self._importar(
+                '1. Setor,10.10,2025-01-02,Serviços,a,ACME\n'
+                '1. Setor,-2.05,2025-01-02,Serviços,b,\n'
+                '2. Setor,30,2025-01-03,Peças,c,ACME\n'
+                '1. Setor,7,2025-02-10,Peças,d,Beta\n'
+            )
+            # Reenvio só muda 2025-01-03: só essa data é relida
+            self._importar(
+                '1. Setor,10.10,2025-01-02,Serviços,a,ACME\n'
+                '1. Setor,-2.05,2025-01-02,Serviços,b,\n'
+                '2. Setor,45.50,2025-01-03,Peças,c,Gama\n'
+                '1. Setor,7,2025-02-10,Peças,d,Beta\n'
+            )
+            snapshot = colunar.snapshot_atual()
+            self.assertEqual(snapshot.versao, obter_versao())
+            # Incremental: o dicionário antigo é mantido e o fornecedor novo vai para o fim
+            self.assertEqual(snapshot.dicionarios['fornecedor'][2:], ['Beta', 'Gama'])
+
+        com_motor = self._respostas(MOTOR_COLUNAR=True, MOTOR_COLUNAR_DIR=self.diretorio)
+        self.assertEqual(com_motor, self._respostas(MOTOR_COLUNAR=False))
+        self.assertEqual(com_motor[0]['totais']['total_ano'], 60.55)
+
+
+@skipIf(parquet.pa is None, 'pyarrow não instalado')
+class ParquetAnualTests(ComparacaoComSqlMixin, TestCase):
+    """Arquivos Parquet por ano: mesmas respostas que o SQL; só o ano alterado é regravado."""
+
+    URLS = ComparacaoComSqlMixin.URLS + ['/api/resumo-mensal/?ano=2024', '/api/resumo-geral/?periodo=tudo']
+
+    def test_igual_ao_sql_e_so_o_ano_alterado(self):
+        with override_settings(RESUMOS_PARQUET=True, PARQUET_DIR=self.diretorio):
+            self._importar(
+                '1. Setor,3.30,2024-12-30,Serviços,x,ACME\n'
+                '1. Setor,10.10,2025-01-02,Serviços,a,ACME\n'
+                '2. Setor,30,2025-01-03,Peças,c,\n'
+            )
+            self.assertIsNone(parquet.obter_colunas())  # ainda sem a primeira carga
+            parquet.gravar_todos()
+            arquivo_2024 = parquet.arquivos()[2024]
+
+            self._importar('2. Setor,45.50,2025-01-03,Peças,c,Gama\n')
+            self.assertEqual(parquet.arquivos()[2024], arquivo_2024)
+            self.assertEqual(parquet.arquivos()[2025][0], obter_versao(parquet.chave_ano(2025)))
+            self.assertEqual(len(parquet.obter_colunas().colunas['data']), 3)
+
+        self.assertEqual(
+            self._respostas(RESUMOS_PARQUET=True, PARQUET_DIR=self.diretorio), self._respostas(RESUMOS_PARQUET=False)
+        )
+
+
+class DadosSinteticosTests(TestCase):
+    """Planilhas sintéticas do benchmark passam pelo pipeline de importação real."""
+
+    def test_planilha_importavel_e_deterministica(self):
+        self.assertEqual([interpretar_escala(e) for e in ('10k', '2.5M', '500')], [10_000, 2_500_000, 500])
+
+        pasta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        caminho = escrever_planilha(f'{pasta}/a.csv', 3000, setores=5, tamanho_bloco=1000)
+        with open(caminho, 'rb') as arquivo:
+            resultado = importar_planilha(arquivo, 'a.csv')
+
+        self.assertEqual(resultado['inseridas'], 3000)
+        self.assertEqual(ResponsavelCusto.objects.count(), 5)
+        self.assertTrue(Transacao.objects.filter(valor__lt=0).exists())
+        self.assertTrue(Transacao.objects.filter(fornecedor__isnull=True).exists())
+        with open(caminho, 'rb') as a, open(escrever_planilha(f'{pasta}/b.csv', 3000, setores=5, tamanho_bloco=1000), 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+
+class MetricasTests(TestCase):
+    """Server-Timing por requisição e /api/metrics/ no formato do Prometheus."""
+
+    def setUp(self):
+        registro_metricas.limpar()
+        cache_resumos.limpar()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='teste', password='teste'))
+
+    def test_server_timing_e_prometheus(self):
+        resposta = self.client.get('/api/resumo-mensal/', {'ano': 2025})
+        self.assertRegex(
+            resposta['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="5 queries", python;dur=[\d.]+, serializacao;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+
+        texto = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('# TYPE custos_requisicao_segundos summary', texto)
+        self.assertIn('custos_requisicao_queries{endpoint="resumo-mensal",metodo="GET",quantile="0.5"} 5', texto)
+        self.assertIn('custos_requisicao_segundos_count{endpoint="resumo-mensal",metodo="GET"} 1', texto)
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
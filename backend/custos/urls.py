@@ -4,8 +4,9 @@ from .views import (
     TransacaoViewSet, ResponsavelViewSet, UploadExcelView,
     ResumoMensalView, DetalhesSetorView, ResumoDiarioView,
     ResumoFornecedoresView, ResumoFornecedoresMensalView, DetalhesFornecedorView, TransacoesFornecedorView,
-    ResumoGeralView, DashboardResumoView,
-    FornecedorConfigViewSet, FornecedoresUnicosView, BulkSaveFornecedorConfigView
+    BuscaTransacoesView, ResumoGeralView, DashboardResumoView,
+    FornecedorConfigViewSet, FornecedoresUnicosView, BulkSaveFornecedorConfigView,
+    CacheResumosView, JobImportacaoViewSet, LoteImportacaoViewSet, ExportarTransacoesView, PainelView, OrcamentoView, MetricasView
 )
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -16,6 +17,8 @@ router = DefaultRouter()
 router.register(r'transacoes', TransacaoViewSet)
 router.register(r'responsaveis', ResponsavelViewSet)
 router.register(r'fornecedor-config', FornecedorConfigViewSet)
+router.register(r'importacoes', JobImportacaoViewSet)
+router.register(r'lotes', LoteImportacaoViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -27,10 +30,16 @@ urlpatterns = [
     path('resumo-fornecedores-mensal/', ResumoFornecedoresMensalView.as_view(), name='resumo-fornecedores-mensal'),
     path('detalhes-fornecedor/', DetalhesFornecedorView.as_view(), name='detalhes-fornecedor'),
     path('transacoes-fornecedor/', TransacoesFornecedorView.as_view(), name='transacoes-fornecedor'),
+    path('busca/', BuscaTransacoesView.as_view(), name='busca'),
+    path('exportar-transacoes/', ExportarTransacoesView.as_view(), name='exportar-transacoes'),
     path('resumo-geral/', ResumoGeralView.as_view(), name='resumo-geral'),
     path('dashboard-resumo/', DashboardResumoView.as_view(), name='dashboard-resumo'),
+    path('painel/', PainelView.as_view(), name='painel'),
+    path('orcamento/', OrcamentoView.as_view(), name='orcamento'),
     path('fornecedores-unicos/', FornecedoresUnicosView.as_view(), name='fornecedores-unicos'),
     path('fornecedor-config-bulk/', BulkSaveFornecedorConfigView.as_view(), name='fornecedor-config-bulk'),
+    path('cache-resumos/', CacheResumosView.as_view(), name='cache-resumos'),
+    path('metrics/', MetricasView.as_view(), name='metrics'),
     
     # JWT Auth
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
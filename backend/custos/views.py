@@ -4,16 +4,40 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.db import transaction
-from django.db.models import Sum, Count
-from django.db.models.functions import ExtractMonth, ExtractYear, ExtractDay
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db.models import Exists, OuterRef, Sum, F, Window
+from django.db.models.functions import ExtractMonth, ExtractYear, ExtractDay, RowNumber
 from datetime import datetime
-import pandas as pd
 
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
 import numpy as np # Importante para lidar com NaN de forma rápida
-from .models import ResponsavelCusto, Transacao, FornecedorConfig
-from .serializers import ResponsavelSerializer, TransacaoSerializer, FornecedorConfigSerializer
+from .models import (
+    ResponsavelCusto, Transacao, FornecedorConfig, AgregadoDiario, JobImportacao, Fornecedor, ContaContabil,
+    LoteImportacao
+)
+from .agregados import atualizar_agregados
+from .periodos import filtro_periodo, intervalo_periodo
+from .importacao import importar_planilha, ErroImportacao, calcular_checksum, desfazer_lote, lote_identico
+from .cache import resposta_em_cache, incrementar_versao, cache_resumos, obter_versao, InvalidaCacheMixin
+from .serializers import (
+    ResponsavelSerializer, TransacaoSerializer, FornecedorConfigSerializer, JobImportacaoSerializer,
+    LoteImportacaoSerializer
+)
+from .jobs import enfileirar_importacao
+from .paginacao import PaginacaoCursorTransacoes
+from .exportacao import FORMATOS, GERADORES
+from .fornecedores import obter_indice_fornecedores
+from .dimensoes import com_nomes, obter_dimensao
+from .mapas import obter_mapa
+from .painel import calcular_painel, ErroPainel
+from .orcamento import calcular_orcamento, ErroOrcamento
+from .busca import buscar, busca_indexada, ErroBusca
+from .colunar import obter_motor
+from .metricas import registro as registro_metricas
 
 
 # --- Funções auxiliares para configurações de fornecedores ---
@@ -21,15 +45,9 @@ def get_fornecedor_config_map():
     """
     Retorna um dicionário com as configurações de exibição de fornecedores.
     {nome_original: {'nome_exibicao': str, 'exibir': bool}}
+    Vem do índice em cache (custos/fornecedores.py): não alterar o dicionário.
     """
-    configs = FornecedorConfig.objects.all()
-    return {
-        c.nome_original: {
-            'nome_exibicao': c.nome_exibicao or c.nome_original,
-            'exibir': c.exibir
-        }
-        for c in configs
-    }
+    return obter_indice_fornecedores().config_map
 
 def aplicar_config_fornecedor(nome_original, config_map):
     """
@@ -43,18 +61,47 @@ def aplicar_config_fornecedor(nome_original, config_map):
     return nome_original  # Sem configuração, usa o original
 
 
+def obter_fornecedores_originais(nome_exibicao):
+    """
+    Caminho inverso: do nome mostrado na tela para os nomes originais no banco
+    (mais de um quando vários fornecedores foram mesclados no mesmo nome).
+    """
+    return obter_indice_fornecedores().originais(nome_exibicao)
+
+
+def filtrar_transacoes(queryset, params):
+    """
+    Filtros de /api/transacoes/ (também usados na exportação):
+    ?inicio=YYYY-MM-DD&fim=YYYY-MM-DD e ?responsavel__nome=
+    """
+    data_inicio = params.get('inicio')
+    data_fim = params.get('fim')
+
+    # Se o usuário mandou as datas, aplica o filtro SQL
+    if data_inicio and data_fim:
+        try:
+            # O formato esperado é YYYY-MM-DD
+            queryset = queryset.filter(data__range=[data_inicio, data_fim])
+        except ValueError:
+            pass # Se a data vier errada, ignora e retorna tudo
+
+    # Filtra pelo nome do responsável (usado no modal de detalhes)
+    responsavel_nome = params.get('responsavel__nome')
+    if responsavel_nome:
+        queryset = queryset.filter(responsavel__nome=responsavel_nome)
+
+    return queryset
+
+
 # --- Funções auxiliares para configurações de centros de responsabilidade (MA) ---
 def get_responsavel_display_map():
     """
     Retorna um dicionário que mapeia nome original -> nome de exibição
     para os centros de responsabilidade (MA).
     {nome: nome_exibicao ou nome}
+    Vem do registro em cache (custos/mapas.py): não alterar o dicionário.
     """
-    responsaveis = ResponsavelCusto.objects.all()
-    return {
-        r.nome: r.nome_exibicao or r.nome
-        for r in responsaveis
-    }
+    return obter_mapa('responsaveis')
 
 def aplicar_nome_exibicao_responsavel(nome_original, display_map):
     """
@@ -63,7 +110,7 @@ def aplicar_nome_exibicao_responsavel(nome_original, display_map):
     return display_map.get(nome_original, nome_original)
 
 
-class FornecedorConfigViewSet(viewsets.ModelViewSet):
+class FornecedorConfigViewSet(InvalidaCacheMixin, viewsets.ModelViewSet):
     """CRUD para configurações de exibição de fornecedores"""
     permission_classes = [IsAuthenticated]
     queryset = FornecedorConfig.objects.all()
@@ -75,10 +122,11 @@ class FornecedoresUnicosView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        # Busca fornecedores únicos das transações
-        fornecedores = Transacao.objects.filter(
-            fornecedor__isnull=False
-        ).exclude(fornecedor='').values_list('fornecedor', flat=True).distinct().order_by('fornecedor')
+        # Fornecedores da dimensão com alguma transação (EXISTS pelo índice da FK,
+        # em vez de um DISTINCT sobre a tabela de transações inteira)
+        fornecedores = Fornecedor.objects.filter(
+            Exists(Transacao.objects.filter(fornecedor_ref=OuterRef('pk')))
+        ).order_by('nome').values_list('nome', flat=True)
         
         # Busca configurações existentes
         config_map = {c.nome_original: c for c in FornecedorConfig.objects.all()}
@@ -139,6 +187,9 @@ class BulkSaveFornecedorConfigView(APIView):
                         exibir=exibir
                     )
                     criados += 1
+            
+            # Nomes de exibição mudaram: invalida os resumos em cache
+            incrementar_versao()
         
         return Response({
             "message": f"Configurações salvas: {criados} criadas, {atualizados} atualizadas",
@@ -164,6 +215,7 @@ class ResumoMensalView(APIView):
         }
     """
     
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano')
         
@@ -172,30 +224,36 @@ class ResumoMensalView(APIView):
         else:
             ano = int(ano)
         
-        # Filtro base: ano selecionado (inclui positivos e negativos/estornos)
-        queryset = Transacao.objects.filter(
-            data__year=ano
-        )
-        
-        # 1. Total por mês
-        por_mes = queryset.annotate(
-            mes=ExtractMonth('data')
-        ).values('mes').annotate(
-            total=Sum('valor')
-        ).order_by('mes')
-        
-        # 2. Total por setor e mês
-        por_setor_mes = queryset.annotate(
-            mes=ExtractMonth('data')
-        ).values('mes', 'responsavel__nome').annotate(
-            total=Sum('valor')
-        ).order_by('mes', '-total')
-        
-        # 3. Totais gerais
-        total_ano = queryset.aggregate(total=Sum('valor'))['total'] or 0
-        meses_com_dados = list(queryset.annotate(
-            mes=ExtractMonth('data')
-        ).values_list('mes', flat=True).distinct().order_by('mes'))
+        # Motor colunar (opcional): mesmas linhas, calculadas no snapshot NumPy
+        motor = obter_motor(*intervalo_periodo(ano))
+        if motor is not None:
+            por_mes, por_setor_mes, total_ano, meses_com_dados = motor.resumo_mensal(ano)
+        else:
+            # Filtro base: ano selecionado (inclui positivos e negativos/estornos)
+            # Lê do rollup diário, que já tem as somas por dia/setor/fornecedor/conta
+            queryset = AgregadoDiario.objects.filter(
+                **filtro_periodo(ano)
+            )
+
+            # 1. Total por mês
+            por_mes = queryset.annotate(
+                mes=ExtractMonth('data')
+            ).values('mes').annotate(
+                total=Sum('valor')
+            ).order_by('mes')
+
+            # 2. Total por setor e mês
+            por_setor_mes = queryset.annotate(
+                mes=ExtractMonth('data')
+            ).values('mes', 'responsavel__nome').annotate(
+                total=Sum('valor')
+            ).order_by('mes', '-total')
+
+            # 3. Totais gerais
+            total_ano = queryset.aggregate(total=Sum('valor'))['total'] or 0
+            meses_com_dados = list(queryset.annotate(
+                mes=ExtractMonth('data')
+            ).values_list('mes', flat=True).distinct().order_by('mes'))
         
         return Response({
             "por_mes": list(por_mes),
@@ -226,6 +284,7 @@ class DetalhesSetorView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano')
         setor = request.query_params.get('setor')
@@ -236,21 +295,22 @@ class DetalhesSetorView(APIView):
         
         ano = int(ano)
         
-        # Busca transações do setor no ano (inclui estornos)
-        queryset = Transacao.objects.filter(
-            data__year=ano,
-            responsavel__nome=setor
-        )
-        
-        # Filtra por mês se fornecido
-        if mes:
-            queryset = queryset.filter(data__month=int(mes))
-        
-        # Agrupa por descrição de conta
-        por_descricao = queryset.values('descricao_conta').annotate(
-            total=Sum('valor'),
-            count=Count('id')
-        ).order_by('-total')
+        motor = obter_motor(*intervalo_periodo(ano, mes))
+        if motor is not None:
+            por_descricao = motor.detalhes_setor(ano, setor, mes)
+        else:
+            # Busca agregados do setor no ano (inclui estornos)
+            # Filtra por mês se fornecido (intervalo de datas, usa índice)
+            queryset = AgregadoDiario.objects.filter(
+                responsavel__nome=setor,
+                **filtro_periodo(ano, mes)
+            )
+
+            # Agrupa pela conta (id) e só então traz os nomes
+            por_descricao = com_nomes(queryset.values('conta_ref').annotate(
+                total=Sum('valor'),
+                count=Sum('quantidade')
+            ).order_by('-total'), ContaContabil, 'conta_ref', 'descricao_conta')
         
         return Response([
             {
@@ -279,6 +339,7 @@ class ResumoDiarioView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano')
         mes = request.query_params.get('mes')
@@ -291,32 +352,35 @@ class ResumoDiarioView(APIView):
         
         from django.db.models.functions import ExtractDay
         
-        # Filtro base: mês e ano selecionados (inclui estornos)
-        queryset = Transacao.objects.filter(
-            data__year=ano,
-            data__month=mes
-        )
-        
-        # 1. Total por dia
-        por_dia = queryset.annotate(
-            dia=ExtractDay('data')
-        ).values('dia').annotate(
-            total=Sum('valor')
-        ).order_by('dia')
-        
         # Mapeamento de nomes de exibição para setores
         responsavel_display_map = get_responsavel_display_map()
-        
-        # 2. Total por setor (top 10)
-        por_setor = queryset.values('responsavel__nome').annotate(
-            total=Sum('valor')
-        ).order_by('-total')[:10]
-        
-        # 3. Totais e dias com dados
-        total_mes = queryset.aggregate(total=Sum('valor'))['total'] or 0
-        dias_com_dados = list(queryset.annotate(
-            dia=ExtractDay('data')
-        ).values_list('dia', flat=True).distinct().order_by('dia'))
+
+        motor = obter_motor(*intervalo_periodo(ano, mes))
+        if motor is not None:
+            por_dia, por_setor, total_mes, dias_com_dados = motor.resumo_diario(ano, mes)
+        else:
+            # Filtro base: mês e ano selecionados (inclui estornos)
+            queryset = AgregadoDiario.objects.filter(
+                **filtro_periodo(ano, mes)
+            )
+
+            # 1. Total por dia
+            por_dia = queryset.annotate(
+                dia=ExtractDay('data')
+            ).values('dia').annotate(
+                total=Sum('valor')
+            ).order_by('dia')
+
+            # 2. Total por setor (top 10)
+            por_setor = queryset.values('responsavel__nome').annotate(
+                total=Sum('valor')
+            ).order_by('-total')[:10]
+
+            # 3. Totais e dias com dados
+            total_mes = queryset.aggregate(total=Sum('valor'))['total'] or 0
+            dias_com_dados = list(queryset.annotate(
+                dia=ExtractDay('data')
+            ).values_list('dia', flat=True).distinct().order_by('dia'))
         
         return Response({
             "por_dia": [
@@ -340,6 +404,71 @@ class ResumoDiarioView(APIView):
         })
 
 
+class PainelView(APIView):
+    """
+    Vários widgets de resumo numa só requisição, calculados de um único GROUP BY
+    GET /api/painel/?ano=2025&widgets=metas,por_mes,por_setor_mes,totais
+    GET /api/painel/?ano=2025&mes=3&widgets=por_dia,por_setor,top_fornecedores,totais&limite=10
+
+    Widgets: por_mes, por_setor_mes, por_dia (exige mes), por_setor,
+             top_fornecedores, totais, metas (ver custos/painel.py)
+    """
+    permission_classes = [IsAuthenticated]
+
+    @resposta_em_cache
+    def get(self, request):
+        widgets = [w.strip() for w in request.query_params.get('widgets', '').split(',') if w.strip()]
+        if not widgets:
+            return Response({"error": "Parâmetro 'widgets' é obrigatório"}, status=400)
+
+        try:
+            ano = int(request.query_params.get('ano', datetime.now().year))
+            mes = request.query_params.get('mes')
+            mes = int(mes) if mes else None
+            limite = int(request.query_params.get('limite', 10))
+        except ValueError:
+            return Response({"error": "Parâmetros 'ano', 'mes' e 'limite' devem ser números"}, status=400)
+        if limite < 1:
+            return Response({"error": "O parâmetro 'limite' deve ser maior que zero"}, status=400)
+
+        try:
+            dados = calcular_painel(
+                ano, widgets, mes=mes, limite=limite,
+                config_fornecedores=obter_indice_fornecedores() if 'top_fornecedores' in widgets else None,
+                nomes_responsaveis=get_responsavel_display_map() if 'por_setor' in widgets else None,
+            )
+        except ErroPainel as e:
+            return Response({"error": str(e)}, status=400)
+        return Response(dados)
+
+
+class OrcamentoView(APIView):
+    """
+    Orçado x realizado por setor e mês num único GROUP BY (ver custos/orcamento.py)
+    GET /api/orcamento/?ano=2025            -> até o mês atual (ano corrente) ou dezembro
+    GET /api/orcamento/?ano=2025&ate_mes=6
+
+    Retorna por_setor (com a série mensal de cada setor), por_mes e totais, cada
+    um com orcado, realizado, variacao e os acumulados (consumo_percentual =
+    realizado acumulado / orçamento do ano).
+    """
+    permission_classes = [IsAuthenticated]
+
+    @resposta_em_cache
+    def get(self, request):
+        try:
+            ano = int(request.query_params.get('ano', datetime.now().year))
+            ate_mes = request.query_params.get('ate_mes')
+            ate_mes = int(ate_mes) if ate_mes else None
+        except ValueError:
+            return Response({"error": "Parâmetros 'ano' e 'ate_mes' devem ser números"}, status=400)
+
+        try:
+            return Response(calcular_orcamento(ano, ate_mes))
+        except ErroOrcamento as e:
+            return Response({"error": str(e)}, status=400)
+
+
 class ResumoFornecedoresView(APIView):
     """
     Retorna resumo de gastos por fornecedor
@@ -348,73 +477,87 @@ class ResumoFornecedoresView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano', datetime.now().year)
         
         # Carregar configurações de exibição
         config_map = get_fornecedor_config_map()
         
-        queryset = Transacao.objects.filter(
-            data__year=ano,
-            fornecedor__isnull=False
-        ).exclude(fornecedor='')
+        queryset = AgregadoDiario.objects.filter(
+            fornecedor_ref__isnull=False,
+            **filtro_periodo(ano)
+        )
         
-        # Top fornecedores (agregação pelo nome original)
-        por_fornecedor_raw = queryset.values('fornecedor').annotate(
+        # Top fornecedores (agregação pelo id do nome original)
+        # Os ocultos saem já no SQL, assim o LIMIT 50 é aplicado pelo banco
+        # em vez de trazer o ranking inteiro para o Python
+        ocultos = obter_dimensao(Fornecedor).ids_de(
+            nome for nome, config in config_map.items() if not config['exibir']
+        )
+        por_fornecedor_raw = com_nomes(queryset.exclude(fornecedor_ref__in=ocultos).values('fornecedor_ref').annotate(
             total=Sum('valor'),
-            transacoes=Count('id')
-        ).order_by('-total')
+            transacoes=Sum('quantidade')
+        ).order_by('-total')[:50], Fornecedor, 'fornecedor_ref', 'fornecedor')
         
-        # Aplicar configurações: filtrar ocultos e substituir nomes
-        por_fornecedor = []
-        for f in por_fornecedor_raw:
-            nome_exibicao = aplicar_config_fornecedor(f['fornecedor'], config_map)
-            if nome_exibicao is None:
-                continue  # Fornecedor oculto
-            por_fornecedor.append({
-                'fornecedor': nome_exibicao,
+        # Aplicar configurações: substituir nomes
+        por_fornecedor = [
+            {
+                'fornecedor': aplicar_config_fornecedor(f['fornecedor'], config_map),
                 'fornecedor_original': f['fornecedor'],  # Para drill-down
+                'fornecedor_id': f['fornecedor_ref'],
                 'total': float(f['total']),
                 'transacoes': f['transacoes']
-            })
-        
-        # Limitar a 50 após filtrar
-        por_fornecedor = por_fornecedor[:50]
+            }
+            for f in por_fornecedor_raw
+        ]
         
         # Por setor para cada fornecedor (top 10 fornecedores)
-        top_10_fornecedores = [f['fornecedor_original'] for f in por_fornecedor[:10]]
+        top_10_fornecedores = [(f['fornecedor_id'], f['fornecedor_original']) for f in por_fornecedor[:10]]
         
         # Mapeamento de nomes de exibição para setores
         responsavel_display_map = get_responsavel_display_map()
         
+        # Top 5 setores de cada fornecedor numa única query:
+        # ROW_NUMBER() OVER (PARTITION BY fornecedor ORDER BY SUM(valor) DESC) <= 5
+        setores_por_fornecedor = {id_: [] for id_, _ in top_10_fornecedores}
+        setores = queryset.filter(fornecedor_ref__in=setores_por_fornecedor).values(
+            'fornecedor_ref', 'responsavel__nome'
+        ).annotate(
+            total=Sum('valor')
+        ).annotate(
+            posicao=Window(
+                expression=RowNumber(),
+                partition_by=[F('fornecedor_ref')],
+                order_by=F('total').desc()
+            )
+        ).filter(posicao__lte=5).order_by('fornecedor_ref', 'posicao')
+        for s in setores:
+            setores_por_fornecedor[s['fornecedor_ref']].append({
+                'setor': aplicar_nome_exibicao_responsavel(s['responsavel__nome'], responsavel_display_map), 
+                'total': float(s['total'])
+            })
+        
         por_setor = {}
-        for fornecedor_original in top_10_fornecedores:
-            # Buscar o nome de exibição
+        for id_, fornecedor_original in top_10_fornecedores:
             nome_exibicao = aplicar_config_fornecedor(fornecedor_original, config_map)
-            setores = queryset.filter(fornecedor=fornecedor_original).values(
-                'responsavel__nome'
-            ).annotate(
-                total=Sum('valor')
-            ).order_by('-total')[:5]
-            por_setor[nome_exibicao] = [
-                {
-                    'setor': aplicar_nome_exibicao_responsavel(s['responsavel__nome'], responsavel_display_map), 
-                    'total': float(s['total'])
-                }
-                for s in setores
-            ]
+            por_setor[nome_exibicao] = setores_por_fornecedor[id_]
         
-        # Evolução mensal (top 5 fornecedores)
-        evolucao = {}
+        # Evolução mensal (top 5 fornecedores), também numa única query
         top_5 = top_10_fornecedores[:5]
-        for fornecedor_original in top_5:
+        meses_por_fornecedor = {id_: {} for id_, _ in top_5}
+        meses = queryset.filter(fornecedor_ref__in=meses_por_fornecedor).annotate(
+            mes=ExtractMonth('data')
+        ).values('fornecedor_ref', 'mes').annotate(
+            total=Sum('valor')
+        ).order_by('fornecedor_ref', 'mes')
+        for m in meses:
+            meses_por_fornecedor[m['fornecedor_ref']][m['mes']] = float(m['total'])
+        
+        evolucao = {}
+        for id_, fornecedor_original in top_5:
             nome_exibicao = aplicar_config_fornecedor(fornecedor_original, config_map)
-            meses = queryset.filter(fornecedor=fornecedor_original).annotate(
-                mes=ExtractMonth('data')
-            ).values('mes').annotate(
-                total=Sum('valor')
-            ).order_by('mes')
-            evolucao[nome_exibicao] = {m['mes']: float(m['total']) for m in meses}
+            evolucao[nome_exibicao] = meses_por_fornecedor[id_]
         
         # Total geral (inclui todos, mesmo ocultos - para comparação)
         total_ano = queryset.aggregate(total=Sum('valor'))['total'] or 0
@@ -442,6 +585,7 @@ class ResumoFornecedoresMensalView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano', datetime.now().year)
         mes = request.query_params.get('mes', datetime.now().month)
@@ -451,32 +595,30 @@ class ResumoFornecedoresMensalView(APIView):
         
         config_map = get_fornecedor_config_map()
         
-        queryset = Transacao.objects.filter(
-            data__year=ano,
-            data__month=mes,
-            fornecedor__isnull=False
-        ).exclude(fornecedor='')
+        queryset = AgregadoDiario.objects.filter(
+            fornecedor_ref__isnull=False,
+            **filtro_periodo(ano, mes)
+        )
         
-        # Por fornecedor
-        por_fornecedor_raw = queryset.values('fornecedor').annotate(
+        # Por fornecedor (id), sem os ocultos e já limitado no SQL; nomes só dos 50
+        ocultos = obter_dimensao(Fornecedor).ids_de(
+            nome for nome, config in config_map.items() if not config['exibir']
+        )
+        por_fornecedor_raw = com_nomes(queryset.exclude(fornecedor_ref__in=ocultos).values('fornecedor_ref').annotate(
             total=Sum('valor'),
-            transacoes=Count('id')
-        ).order_by('-total')
+            transacoes=Sum('quantidade')
+        ).order_by('-total')[:50], Fornecedor, 'fornecedor_ref', 'fornecedor')
         
         # Aplicar configurações
-        por_fornecedor = []
-        for f in por_fornecedor_raw:
-            nome_exibicao = aplicar_config_fornecedor(f['fornecedor'], config_map)
-            if nome_exibicao is None:
-                continue
-            por_fornecedor.append({
-                'fornecedor': nome_exibicao,
+        por_fornecedor = [
+            {
+                'fornecedor': aplicar_config_fornecedor(f['fornecedor'], config_map),
                 'fornecedor_original': f['fornecedor'],
                 'total': float(f['total']),
                 'transacoes': f['transacoes']
-            })
-        
-        por_fornecedor = por_fornecedor[:50]
+            }
+            for f in por_fornecedor_raw
+        ]
         
         # Total
         total_mes = queryset.aggregate(total=Sum('valor'))['total'] or 0
@@ -504,6 +646,7 @@ class DetalhesFornecedorView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano')
         mes = request.query_params.get('mes')
@@ -514,32 +657,17 @@ class DetalhesFornecedorView(APIView):
         
         ano = int(ano)
         
-        # Carregar config para mapear nome de exibição -> original
-        config_map = get_fornecedor_config_map()
-        
-        # Tentar encontrar o nome original do fornecedor
-        fornecedor_original = None
-        for nome_orig, config in config_map.items():
-            if config['nome_exibicao'] == fornecedor:
-                fornecedor_original = nome_orig
-                break
-        
-        if not fornecedor_original:
-            fornecedor_original = fornecedor
-        
-        queryset = Transacao.objects.filter(
-            data__year=ano,
-            fornecedor=fornecedor_original
+        # Nome de exibição -> originais (pelo índice em cache)
+        queryset = AgregadoDiario.objects.filter(
+            fornecedor_ref__in=obter_dimensao(Fornecedor).ids_de(obter_fornecedores_originais(fornecedor)),
+            **filtro_periodo(ano, mes)
         )
         
-        if mes:
-            queryset = queryset.filter(data__month=int(mes))
-        
-        # Agrupar por descrição de conta
-        por_descricao = queryset.values('descricao_conta').annotate(
+        # Agrupar pela conta (id) e só então trazer os nomes
+        por_descricao = com_nomes(queryset.values('conta_ref').annotate(
             total=Sum('valor'),
-            count=Count('id')
-        ).order_by('-total')
+            count=Sum('quantidade')
+        ).order_by('-total'), ContaContabil, 'conta_ref', 'descricao_conta')
         
         return Response([
             {
@@ -559,6 +687,7 @@ class TransacoesFornecedorView(APIView):
     """
     permission_classes = [IsAuthenticated]
     
+    @resposta_em_cache
     def get(self, request):
         ano = request.query_params.get('ano')
         mes = request.query_params.get('mes')
@@ -569,24 +698,11 @@ class TransacoesFornecedorView(APIView):
             
         ano = int(ano)
         
-        # Mapping logic
-        config_map = get_fornecedor_config_map()
-        fornecedor_original = None
-        for nome_orig, config in config_map.items():
-            if config['nome_exibicao'] == fornecedor:
-                fornecedor_original = nome_orig
-                break
-        
-        if not fornecedor_original:
-            fornecedor_original = fornecedor
-            
+        # Nome de exibição -> originais (pelo índice em cache) -> ids da dimensão
         queryset = Transacao.objects.filter(
-            data__year=ano,
-            fornecedor=fornecedor_original
+            fornecedor_ref__in=obter_dimensao(Fornecedor).ids_de(obter_fornecedores_originais(fornecedor)),
+            **filtro_periodo(ano, mes)
         ).select_related('responsavel').order_by('data')
-        
-        if mes:
-            queryset = queryset.filter(data__month=int(mes))
             
         data = []
         for t in queryset:
@@ -602,6 +718,77 @@ class TransacoesFornecedorView(APIView):
         return Response(data)
 
 
+class BuscaTransacoesView(APIView):
+    """
+    Busca textual na descrição da conta, no TXT e no fornecedor (ver custos/busca.py)
+    GET /api/busca/?q=manutencao prensa
+        &inicio=YYYY-MM-DD&fim=YYYY-MM-DD&responsavel__nome=   -> mesmos filtros de /api/transacoes/
+        &ordem=relevancia|data&limite=50 (máx. 500)
+    """
+    permission_classes = [IsAuthenticated]
+    LIMITE_MAXIMO = 500
+
+    @resposta_em_cache
+    def get(self, request):
+        try:
+            limite = max(1, min(int(request.query_params.get('limite', 50)), self.LIMITE_MAXIMO))
+        except ValueError:
+            return Response({"error": "Parâmetro 'limite' deve ser um número"}, status=400)
+
+        queryset = filtrar_transacoes(Transacao.objects.all(), request.query_params)
+        try:
+            resultados = buscar(
+                queryset, request.query_params.get('q'), limite=limite,
+                ordem=request.query_params.get('ordem', 'relevancia')
+            )
+        except ErroBusca as e:
+            return Response({"error": str(e)}, status=400)
+
+        return Response({
+            "resultados": resultados,
+            "indexada": busca_indexada(),
+        })
+
+
+class ExportarTransacoesView(APIView):
+    """
+    Exporta transações filtradas em streaming (memória constante)
+    GET /api/exportar-transacoes/?formato=csv|ndjson
+        filtros de /api/transacoes/: inicio, fim, responsavel__nome
+        filtros de /api/transacoes-fornecedor/: ano, mes, fornecedor (nome de exibição)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        params = request.query_params
+        formato = params.get('formato', 'csv')
+        if formato not in GERADORES:
+            return Response({"error": f"Formato inválido: use {', '.join(GERADORES)}"}, status=400)
+
+        queryset = filtrar_transacoes(Transacao.objects.all(), params)
+
+        ano = params.get('ano')
+        if ano:
+            try:
+                queryset = queryset.filter(**filtro_periodo(int(ano), params.get('mes')))
+            except ValueError:
+                return Response({"error": "Parâmetros 'ano'/'mes' inválidos"}, status=400)
+
+        fornecedor = params.get('fornecedor')
+        if fornecedor:
+            queryset = queryset.filter(
+                fornecedor_ref__in=obter_dimensao(Fornecedor).ids_de(obter_fornecedores_originais(fornecedor))
+            )
+
+        content_type, extensao = FORMATOS[formato]
+        resposta = StreamingHttpResponse(
+            GERADORES[formato](queryset.order_by('data', 'id')),
+            content_type=content_type
+        )
+        resposta['Content-Disposition'] = f'attachment; filename="transacoes.{extensao}"'
+        return resposta
+
+
 class ResumoGeralView(APIView):
     """
     Retorna resumo de setores e fornecedores com filtro de período
@@ -611,6 +798,7 @@ class ResumoGeralView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @resposta_em_cache
     def get(self, request):
         from datetime import timedelta
         
@@ -620,13 +808,17 @@ class ResumoGeralView(APIView):
         semana = request.query_params.get('semana') # Semana ISO 1-52 ou 53
         
         # Definir filtros de data baseado no período
+        # (inicio, fim) com fim exclusivo, para o motor colunar
         
         if periodo == 'tudo':
-            queryset = Transacao.objects.all()
+            queryset = AgregadoDiario.objects.all()
+            intervalo = (None, None)
         elif periodo == 'ano':
-            queryset = Transacao.objects.filter(data__year=ano)
+            queryset = AgregadoDiario.objects.filter(**filtro_periodo(ano))
+            intervalo = intervalo_periodo(ano)
         elif periodo == 'mes':
-            queryset = Transacao.objects.filter(data__year=ano, data__month=mes)
+            queryset = AgregadoDiario.objects.filter(**filtro_periodo(ano, mes))
+            intervalo = intervalo_periodo(ano, mes)
         elif periodo == 'semana':
             # Se não passar semana, usa a atual
             if not semana:
@@ -643,26 +835,39 @@ class ResumoGeralView(APIView):
             # Ajuste para datetime (com hora) se necessário, mas o Django lida bem com date em range se o campo for date
             # Se o campo data for DateTimeField, talvez precise ajustar o fim para 23:59:59
             # Assumindo que data é DateField ou que o filtro range funciona (normalmente funciona)
-            queryset = Transacao.objects.filter(data__range=[inicio_semana, fim_semana])
+            queryset = AgregadoDiario.objects.filter(data__range=[inicio_semana, fim_semana])
+            intervalo = (inicio_semana.date(), fim_semana.date() + timedelta(days=1))
         else:
-            queryset = Transacao.objects.filter(data__year=ano, data__month=mes)
+            queryset = AgregadoDiario.objects.filter(**filtro_periodo(ano, mes))
+            intervalo = intervalo_periodo(ano, mes)
         
         # Mapeamento de nomes de exibição para setores
         responsavel_display_map = get_responsavel_display_map()
         
-        # Top Setores
-        top_setores_raw = queryset.values('responsavel__nome').annotate(
-            total=Sum('valor')
-        ).order_by('-total')[:15]
-        
         # Top Fornecedores (com aplicação de configurações de exibição)
         config_map = get_fornecedor_config_map()
-        
-        top_fornecedores_raw = queryset.filter(
-            fornecedor__isnull=False
-        ).exclude(fornecedor='').values('fornecedor').annotate(
-            total=Sum('valor')
-        ).order_by('-total')
+
+        motor = obter_motor(*intervalo)
+        if motor is not None:
+            top_setores_raw, top_fornecedores_raw, total_geral = motor.resumo_geral(*intervalo)
+        else:
+            # Top Setores
+            top_setores_raw = queryset.values('responsavel__nome').annotate(
+                total=Sum('valor')
+            ).order_by('-total')[:15]
+
+            # Ocultos fora no SQL: os 15 primeiros restantes são o top final
+            ocultos = obter_dimensao(Fornecedor).ids_de(
+                nome for nome, config in config_map.items() if not config['exibir']
+            )
+            top_fornecedores_raw = com_nomes(queryset.filter(
+                fornecedor_ref__isnull=False
+            ).exclude(fornecedor_ref__in=ocultos).values('fornecedor_ref').annotate(
+                total=Sum('valor')
+            ).order_by('-total')[:15], Fornecedor, 'fornecedor_ref', 'fornecedor')
+
+            # Totais
+            total_geral = queryset.aggregate(total=Sum('valor'))['total'] or 0
         
         # Aplicar configurações: filtrar ocultos e substituir nomes
         top_fornecedores = []
@@ -677,9 +882,6 @@ class ResumoGeralView(APIView):
             if len(top_fornecedores) >= 15:
                 break
         
-        # Totais
-        total_geral = queryset.aggregate(total=Sum('valor'))['total'] or 0
-        
         return Response({
             "top_setores": [
                 {
@@ -696,16 +898,69 @@ class ResumoGeralView(APIView):
         })
 
 
-class ResponsavelViewSet(viewsets.ModelViewSet):
+class CacheResumosView(APIView):
+    """
+    Contadores do cache de resumos deste worker.
+    GET /api/cache-resumos/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({
+            **cache_resumos.estatisticas(),
+            'versao_dados': obter_versao()
+        })
+
+
+class MetricasView(APIView):
+    """
+    Latência, queries e tempos por endpoint deste worker (custos/metricas.py),
+    no formato texto do Prometheus.
+    GET /api/metrics/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return HttpResponse(
+            registro_metricas.texto_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+class ResponsavelViewSet(InvalidaCacheMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = ResponsavelCusto.objects.all()
     serializer_class = ResponsavelSerializer
 
-class TransacaoViewSet(viewsets.ModelViewSet):
+class TransacaoViewSet(InvalidaCacheMixin, viewsets.ModelViewSet):
+    """
+    GET /api/transacoes/?inicio=&fim=&responsavel__nome=
+        &limite=100&cursor=...   -> paginação por cursor (opcional, ver custos/paginacao.py)
+        &fields=data,valor       -> só essas colunas no SELECT e no JSON
+    """
     permission_classes = [IsAuthenticated]
     # Mantemos o select_related para performance
-    queryset = Transacao.objects.select_related('responsavel').all()
+    queryset = Transacao.objects.select_related('responsavel', 'lote').all()
     serializer_class = TransacaoSerializer
+    pagination_class = PaginacaoCursorTransacoes
+
+    def campos_pedidos(self):
+        """Lista de campos do ?fields= (só em leituras), ou None para todos."""
+        if not hasattr(self, '_campos_pedidos'):
+            self._campos_pedidos = None
+            fields = self.request.query_params.get('fields')
+            if fields and self.request.method == 'GET':
+                campos = [c.strip() for c in fields.split(',') if c.strip()]
+                invalidos = set(campos) - set(TransacaoSerializer().fields)
+                if invalidos:
+                    raise ValidationError({'fields': f"Campos desconhecidos: {', '.join(sorted(invalidos))}"})
+                self._campos_pedidos = campos
+        return self._campos_pedidos
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        contexto['campos'] = self.campos_pedidos()
+        return contexto
 
     def get_queryset(self):
         """
@@ -714,24 +969,46 @@ class TransacaoViewSet(viewsets.ModelViewSet):
         # Pega a queryset base (todas as transações)
         queryset = super().get_queryset()
 
-        # Tenta pegar os parâmetros da URL
-        data_inicio = self.request.query_params.get('inicio')
-        data_fim = self.request.query_params.get('fim')
+        # Sparse fieldset: o SELECT traz só o que vai ser serializado
+        # (data sempre, porque a paginação por cursor usa)
+        campos = self.campos_pedidos()
+        if campos is not None:
+            colunas = {'data'}
+            relacoes = []
+            for campo in campos:
+                if campo == 'responsavel_nome':
+                    colunas |= {'responsavel', 'responsavel__nome'}
+                    relacoes.append('responsavel')
+                elif campo == 'arquivo_origem':
+                    colunas |= {'lote', 'lote__arquivo_nome'}
+                    relacoes.append('lote')
+                else:
+                    colunas.add(campo)
+            queryset = queryset.select_related(None)
+            if relacoes:
+                queryset = queryset.select_related(*relacoes)
+            queryset = queryset.only(*colunas)
 
-        # Se o usuário mandou as datas, aplica o filtro SQL
-        if data_inicio and data_fim:
-            try:
-                # O formato esperado é YYYY-MM-DD
-                queryset = queryset.filter(data__range=[data_inicio, data_fim])
-            except ValueError:
-                pass # Se a data vier errada, ignora e retorna tudo
+        # Filtros via URL (inicio/fim, responsavel__nome)
+        return filtrar_transacoes(queryset, self.request.query_params)
+
+    # Edições individuais também precisam refletir no rollup diário
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        atualizar_agregados([serializer.instance.data])
 
-        # Filtra pelo nome do responsável (usado no modal de detalhes)
-        responsavel_nome = self.request.query_params.get('responsavel__nome')
-        if responsavel_nome:
-            queryset = queryset.filter(responsavel__nome=responsavel_nome)
+    @transaction.atomic
+    def perform_update(self, serializer):
+        data_anterior = serializer.instance.data
+        super().perform_update(serializer)
+        atualizar_agregados([data_anterior, serializer.instance.data])
 
-        return queryset
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        data = instance.data
+        super().perform_destroy(instance)
+        atualizar_agregados([data])
 
 
 class DashboardResumoView(APIView):
@@ -742,11 +1019,12 @@ class DashboardResumoView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
+    @resposta_em_cache
     def get(self, request):
         data_inicio = request.query_params.get('inicio')
         data_fim = request.query_params.get('fim')
         
-        queryset = Transacao.objects.all()
+        queryset = AgregadoDiario.objects.all()
         
         if data_inicio and data_fim:
             try:
@@ -801,7 +1079,49 @@ class DashboardResumoView(APIView):
             "resumo_tempo": chart_data
         })
 
+class JobImportacaoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status das importações assíncronas
+    GET /api/importacoes/
+    GET /api/importacoes/<id>/  (status, linhas processadas, linhas/s e erro)
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = JobImportacao.objects.all()
+    serializer_class = JobImportacaoSerializer
+
+
+class LoteImportacaoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Histórico das importações (um lote por arquivo)
+    GET  /api/lotes/
+    GET  /api/lotes/<id>/
+    POST /api/lotes/<id>/desfazer/  -> apaga as transações inseridas pelo lote
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = LoteImportacao.objects.select_related('usuario').all()
+    serializer_class = LoteImportacaoSerializer
+
+    @action(detail=True, methods=['post'])
+    def desfazer(self, request, pk=None):
+        lote = self.get_object()
+        try:
+            lote, apagadas = desfazer_lote(lote.id)
+        except ErroImportacao as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "message": f"Lote {lote.id} ({lote.arquivo_nome}) desfeito: {apagadas} transações apagadas.",
+            "apagadas": apagadas,
+            "lote": self.get_serializer(lote).data,
+        })
+
+
 class UploadExcelView(APIView):
+    """
+    POST /api/upload/                 -> importa na hora (201)
+    POST /api/upload/?assincrono=1    -> cria um JobImportacao e responde 202 com o id
+    POST /api/upload/?forcar=1        -> importa mesmo se o arquivo for idêntico a um lote ativo
+                                         (sem isso, responde 200 sem ler a planilha)
+    """
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
 
@@ -811,110 +1131,55 @@ class UploadExcelView(APIView):
         if not file_obj:
             return Response({"error": "Nenhum arquivo enviado"}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            # 1. Leitura rápida
-            # Se for CSV muito grande, use chunks, mas para 60k o pandas aguenta na RAM tranquilo
-            if file_obj.name.endswith('.csv'):
-                df = pd.read_csv(file_obj)
-            else:
-                df = pd.read_excel(file_obj)
-            
-            df.columns = df.columns.str.strip()
-            
-            # Validação
-            colunas_obrigatorias = ['MA', 'AMOUNTMST', 'TRANSDATE', 'Descrição Conta', 'Fornecedor']
-            for col in colunas_obrigatorias:
-                if col not in df.columns:
-                     return Response({"error": f"Coluna obrigatória não encontrada: {col}"}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Limpeza prévia de dados (Vectorized operations são mil vezes mais rápidas que loops)
-            # Remove linhas onde MA é vazio ou NaN
-            df = df.dropna(subset=['MA'])
-            df = df[df['MA'].astype(str).str.strip() != '']
-            
-            # Converter TRANSDATE para datetime para garantir formato correto
-            try:
-                # Tenta converter. Se falhar, o pandas tenta inferir.
-                # Assumindo que no Excel vem como datetime ou string aceitável
-                df['TRANSDATE'] = pd.to_datetime(df['TRANSDATE'])
-            except Exception as e:
-                return Response({"error": f"Erro ao processar coluna TRANSDATE: {e}"}, status=status.HTTP_400_BAD_REQUEST)
-
-            total_linhas = len(df)
-            objetos_transacao = []
-
-            with transaction.atomic():
-                # --- PASSO 0: PREVENÇÃO DE DUPLICIDADE ---
-                # Identifica quais datas estão sendo enviadas neste arquivo
-                # df['TRANSDATE'].dt.date retorna objetos python date
-                datas_no_arquivo = df['TRANSDATE'].dt.date.unique()
-                
-                if len(datas_no_arquivo) > 0:
-                    # Apaga TODAS as transações dessas datas antes de inserir as novas.
-                    # Isso garante que se o usuário subir Jan/2026 de novo, apaga e recria.
-                    # print(f"Removendo transações antigas para as datas: {datas_no_arquivo}")
-                    Transacao.objects.filter(data__in=datas_no_arquivo).delete()
-
-                # --- PASSO 1: OTIMIZAÇÃO DOS RESPONSÁVEIS (FOREIGN KEY) ---
-                # Em vez de buscar no banco 60.000 vezes, vamos buscar 1 vez.
-                
-                # Pega todos os nomes únicos de MA do Excel
-                nomes_unicos_excel = df['MA'].astype(str).str.strip().unique()
-                
-                # Busca os que já existem no banco
-                existentes = ResponsavelCusto.objects.filter(nome__in=nomes_unicos_excel)
-                mapa_responsaveis = {r.nome: r for r in existentes} # Dicionário {Nome: Objeto}
-                
-                # Identifica quais são novos e precisam ser criados
-                nomes_existentes = set(mapa_responsaveis.keys())
-                novos_para_criar = [
-                    ResponsavelCusto(nome=nome) 
-                    for nome in nomes_unicos_excel 
-                    if nome not in nomes_existentes
-                ]
-                
-                # Cria os novos em lote (1 query só)
-                if novos_para_criar:
-                    ResponsavelCusto.objects.bulk_create(novos_para_criar)
-                    # Atualiza o mapa com os recém criados
-                    novos_objetos = ResponsavelCusto.objects.filter(nome__in=[n.nome for n in novos_para_criar])
-                    mapa_responsaveis.update({r.nome: r for r in novos_objetos})
-
-                # --- PASSO 2: PREPARAÇÃO DAS TRANSAÇÕES NA MEMÓRIA ---
-                # Agora transformamos o DataFrame em dicionários (muito mais rápido que iterrows)
-                # Precisamos formatar a data de volta para string YYYY-MM-DD ou manter objeto date
-                # O Django aceita objeto date/datetime direto no model field
-                records = df.to_dict('records')
-                
-                for row in records:
-                    nome_ma = str(row['MA']).strip()
-                    responsavel_obj = mapa_responsaveis.get(nome_ma)
-                    
-                    if not responsavel_obj:
-                        continue # Segurança extra
-
-                    # AQUI É O PULO DO GATO:
-                    # Não damos .save() nem .create(). Apenas instanciamos na memória.
-                    objetos_transacao.append(
-                        Transacao(
-                            responsavel=responsavel_obj,
-                            data=row['TRANSDATE'], # Já é datetime/timestamp do pandas
-                            valor=row['AMOUNTMST'],
-                            descricao_conta=str(row['Descrição Conta']),
-                            txt_detalhe=str(row['TXT']) if 'TXT' in df.columns else '',
-                            fornecedor=str(row['Fornecedor']).strip() if 'Fornecedor' in df.columns and pd.notna(row.get('Fornecedor')) else None,
-                            arquivo_origem=file_obj.name
-                        )
-                    )
+        forcar = (request.query_params.get('forcar') or request.data.get('forcar')) in ('1', 'true', 'True')
+        assincrono = request.query_params.get('assincrono') or request.data.get('assincrono')
+        if assincrono in ('1', 'true', 'True'):
+            # O job importa sem verificar de novo: o reenvio idêntico é barrado aqui
+            existente = None if forcar else lote_identico(calcular_checksum(file_obj))
+            if existente:
+                return self._resposta_duplicado(existente.id)
+            job = enfileirar_importacao(file_obj, request.user)
+            return Response({
+                "message": "Importação enfileirada",
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": f"/api/importacoes/{job.id}/"
+            }, status=status.HTTP_202_ACCEPTED)
 
-                # --- PASSO 3: O GRANDE DISPARO (BULK INSERT) ---
-                # O Django divide automaticamente em lotes se for muito grande, mas vamos forçar batch_size
-                # Isso manda comandos SQL de 2000 em 2000 linhas.
-                Transacao.objects.bulk_create(objetos_transacao, batch_size=2000)
+        try:
+            # Leitura e gravação em blocos (ver custos/importacao.py):
+            # o pico de memória depende do tamanho do bloco, não do arquivo
+            resultado = importar_planilha(file_obj, file_obj.name, usuario=request.user, forcar=forcar)
+            if resultado['duplicado']:
+                return self._resposta_duplicado(resultado['lote'])
 
-            return Response({"message": f"Sucesso! {len(objetos_transacao)} linhas importadas. Dados anteriores das datas envolvidas foram substituídos."}, status=status.HTTP_201_CREATED)
+            return Response({
+                "message": (
+                    f"Sucesso! {resultado['linhas']} linhas processadas: "
+                    f"{resultado['inseridas']} inseridas, {resultado['removidas']} removidas "
+                    f"e {resultado['inalteradas']} inalteradas."
+                ),
+                "inseridas": resultado['inseridas'],
+                "removidas": resultado['removidas'],
+                "inalteradas": resultado['inalteradas'],
+                "datas_alteradas": resultado['datas_alteradas'],
+                "lote": resultado['lote'],
+            }, status=status.HTTP_201_CREATED)
 
+        except ErroImportacao as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # Importante: logar o erro no console para você ver o que houve
             print(f"Erro no upload: {e}") 
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _resposta_duplicado(self, lote_id):
+        lote = LoteImportacao.objects.get(pk=lote_id)
+        return Response({
+            "message": (
+                f"Arquivo idêntico ao lote {lote.id} ({lote.arquivo_nome}, "
+                f"{timezone.localtime(lote.iniciado_em):%d/%m/%Y %H:%M}): nada foi importado."
+            ),
+            "duplicado": True,
+            "lote": lote.id,
+        }, status=status.HTTP_200_OK)
\ No newline at end of file
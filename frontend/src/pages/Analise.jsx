@@ -70,21 +70,15 @@ export default function Analise() {
     const fetchDados = async () => {
         setLoading(true);
         try {
-            // Sempre busca metas
-            const resResp = await api.get('responsaveis/');
-            const mapMetas = {};
-            resResp.data.forEach(r => {
-                const chave = r.nome_exibicao || r.nome;
-                mapMetas[chave] = parseFloat(r.orcamento_mensal) || 0;
-            });
-            setMetas(mapMetas);
-
+            // Metas + resumos numa única requisição (mesmos formatos de resumo-mensal/resumo-diario)
             if (modo === 'anual') {
-                const resResumo = await api.get(`resumo-mensal/?ano=${anoSelecionado}`);
-                setDadosAgregados(resResumo.data);
+                const res = await api.get(`painel/?ano=${anoSelecionado}&widgets=metas,por_mes,por_setor_mes,totais`);
+                setMetas(res.data.metas);
+                setDadosAgregados({ por_mes: res.data.por_mes, por_setor_mes: res.data.por_setor_mes, totais: res.data.totais });
             } else {
-                const resDiario = await api.get(`resumo-diario/?ano=${anoSelecionado}&mes=${mesSelecionado}`);
-                setDadosMensal(resDiario.data);
+                const res = await api.get(`painel/?ano=${anoSelecionado}&mes=${mesSelecionado}&widgets=metas,por_dia,por_setor,totais`);
+                setMetas(res.data.metas);
+                setDadosMensal({ por_dia: res.data.por_dia, por_setor: res.data.por_setor, totais: res.data.totais });
             }
 
             setLoading(false);
@@ -122,8 +122,8 @@ function App() {
     setTransacoesFiltradas([]); // Limpa enquanto carrega
 
     try {
-      // Usa o nome original para filtrar no backend
-      let url = `transacoes/?responsavel__nome=${encodeURIComponent(nomeOriginal)}`;
+      // Usa o nome original para filtrar no backend (e pede só as colunas que o modal mostra)
+      let url = `transacoes/?responsavel__nome=${encodeURIComponent(nomeOriginal)}&fields=data,descricao_conta,txt_detalhe,valor`;
       // Aplica filtros de data se existirem
       if (dataInicio && dataFim) {
         url += `&inicio=${dataInicio}&fim=${dataFim}`;